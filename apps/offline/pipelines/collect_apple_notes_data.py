@@ -1,18 +1,69 @@
+from datetime import datetime, timezone
 from pathlib import Path
 
 from loguru import logger
 from zenml import pipeline
 
-from steps.collect_apple_notes_data import extract_apple_notes_documents
-from steps.infrastructure import save_documents_to_disk
+from steps.collect_apple_notes_data import (
+    extract_apple_notes_documents,
+    update_apple_notes_sync_state,
+)
+from steps.infrastructure import merge_documents_to_disk, save_documents_to_disk
 
 
 @pipeline
-def collect_apple_notes_data(notes_db_path: Path, data_dir: Path, to_s3: bool = False) -> None:
+def collect_apple_notes_data(
+    notes_db_path: Path,
+    data_dir: Path,
+    to_s3: bool = False,
+    corpus_format: str = "json",
+    incremental: bool = False,
+    immutable: bool = False,
+) -> None:
     apple_notes_data_dir = data_dir / "apple_notes"
     apple_notes_data_dir.mkdir(parents=True, exist_ok=True)
+    sync_state_path = data_dir / "apple_notes_sync_state.json"
 
     logger.info(f"Collecting pages from database '{notes_db_path}'")
-    documents_data = extract_apple_notes_documents(notes_db_path=notes_db_path)
+    documents_data, watermark = extract_apple_notes_documents(
+        notes_db_path=notes_db_path,
+        incremental=incremental,
+        sync_state_path=sync_state_path,
+        immutable=immutable,
+    )
 
-    result = save_documents_to_disk(documents=documents_data, output_dir=apple_notes_data_dir / "database")
\ No newline at end of file
+    if incremental:
+        # Every incremental sync writes the notes updated since the previous one to its
+        # own delta directory, consumed and deleted by `etl_apple_notes`, and merges
+        # them into the snapshot of the full sync.
+        run_dir = (
+            data_dir
+            / "apple_notes_delta"
+            / datetime.now(timezone.utc).strftime("run_%Y_%m_%d_%H_%M_%S_%f")
+        )
+        delta = save_documents_to_disk(
+            documents=documents_data,
+            output_dir=run_dir / "database",
+            corpus_format=corpus_format,
+        )
+        result = merge_documents_to_disk(
+            documents=documents_data,
+            output_dir=apple_notes_data_dir / "database",
+            corpus_format=corpus_format,
+        )
+        saved_invocation_ids = [delta.invocation_id, result.invocation_id]
+    else:
+        result = save_documents_to_disk(
+            documents=documents_data,
+            output_dir=apple_notes_data_dir / "database",
+            corpus_format=corpus_format,
+        )
+        saved_invocation_ids = [result.invocation_id]
+
+    # The watermark only moves once the documents can no longer be overwritten.
+    update_apple_notes_sync_state(
+        notes_db_path=notes_db_path,
+        watermark=watermark,
+        sync_state_path=sync_state_path,
+        after=saved_invocation_ids,
+    )
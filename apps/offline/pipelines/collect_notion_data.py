@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from pathlib import Path
 
 from loguru import logger
@@ -5,21 +6,69 @@ from zenml import step, pipeline
 
 from steps.collect_notion_data import (
     extract_notion_documents_metadata,
-    extract_notion_documents
+    extract_notion_documents,
+    update_notion_sync_state,
 )
 
-from steps.infrastructure import save_documents_to_disk
+from steps.infrastructure import merge_documents_to_disk, save_documents_to_disk
 
 @pipeline
-def collect_notion_data(database_ids: list[str], data_dir: Path, to_s3: bool = False) -> None:
+def collect_notion_data(
+    database_ids: list[str],
+    data_dir: Path,
+    to_s3: bool = False,
+    corpus_format: str = "json",
+    incremental: bool = False,
+) -> None:
     notion_data_dir = data_dir / "notion"
     notion_data_dir.mkdir(parents=True, exist_ok=True)
+    sync_state_path = data_dir / "notion_sync_state.json"
+
+    # Every incremental sync writes the pages edited since the previous one to its own
+    # delta directory, consumed and deleted by `etl_notion`, and merges them into the
+    # snapshot of the full sync.
+    run_dir = (
+        data_dir
+        / "notion_delta"
+        / datetime.now(timezone.utc).strftime("run_%Y_%m_%d_%H_%M_%S_%f")
+    )
 
     invocation_ids = []
     for index, database_id in enumerate(database_ids):
         logger.info(f"Collecting pages from database '{database_id}'")
-        documents_metadata = extract_notion_documents_metadata(database_id=database_id)
+        documents_metadata = extract_notion_documents_metadata(
+            database_id=database_id,
+            incremental=incremental,
+            sync_state_path=sync_state_path,
+        )
         documents_data = extract_notion_documents(documents_metadata=documents_metadata)
 
-        result = save_documents_to_disk(documents=documents_data, output_dir=notion_data_dir / f"database_{index}")
-        invocation_ids.append(result.invocation_id)
\ No newline at end of file
+        if incremental:
+            delta = save_documents_to_disk(
+                documents=documents_data,
+                output_dir=run_dir / f"database_{index}",
+                corpus_format=corpus_format,
+            )
+            result = merge_documents_to_disk(
+                documents=documents_data,
+                output_dir=notion_data_dir / f"database_{index}",
+                corpus_format=corpus_format,
+            )
+            saved_invocation_ids = [delta.invocation_id, result.invocation_id]
+        else:
+            result = save_documents_to_disk(
+                documents=documents_data,
+                output_dir=notion_data_dir / f"database_{index}",
+                corpus_format=corpus_format,
+            )
+            saved_invocation_ids = [result.invocation_id]
+        invocation_ids.append(result.invocation_id)
+
+        # The watermark only moves once the documents can no longer be overwritten.
+        update_notion_sync_state(
+            database_id=database_id,
+            documents_metadata=documents_metadata,
+            documents=documents_data,
+            sync_state_path=sync_state_path,
+            after=saved_invocation_ids,
+        )
@@ -1,11 +1,12 @@
 from zenml import pipeline
 
+from steps.computer_rag_vector_index import build_local_ann_index
 from steps.computer_rag_vector_index import chunk_embed_load
 from steps.computer_rag_vector_index import filter_by_quality
 from steps.infrastructure import fetch_from_mongodb
 
 from offline.application.rag.embeddings import EmbeddingModelType
-from offline.application.rag.retrievers import RetrieverType
+from offline.application.rag.retrievers import LOCAL_RETRIEVER_TYPES, RetrieverType
 from offline.application.rag.splitters import SummarizationType
 
 @pipeline
@@ -19,13 +20,23 @@ def compute_rag_vector_index(
     embedding_model_type: EmbeddingModelType,
     embedding_model_dim: int,
     chunk_size: int,
+    embedding_batch_max_tokens: int = 50_000,
+    embedding_batch_max_size: int = 512,
     contextual_summarization_type: SummarizationType = "none",
     contextual_agent_model_id: str | None = None,
     contextual_agent_max_characters: int | None = None,
+    contextual_agent_chunks_per_request: int = 16,
     mock: bool = False,
     processing_batch_size: int = 256,
     processing_max_workers: int = 10,
+    processing_queue_size: int = 8,
     device: str = "cpu",
+    incremental: bool = False,
+    stream_documents: bool = False,
+    fetch_batch_size: int = 1000,
+    ann_index: bool = False,
+    ann_n_lists: int | None = None,
+    ann_nprobe: int = 8,
 ) -> None:
     """Computes and stores RAG vector index from documents in MongoDB.
 
@@ -42,23 +53,42 @@ def compute_rag_vector_index(
         embedding_model_type: Type of embedding model (e.g. OpenAI, HuggingFace)
         embedding_model_dim: Dimension of the embedding vectors
         chunk_size: Size of text chunks for embedding
+        embedding_batch_max_tokens: Token budget of a single embedding request
+        embedding_batch_max_size: Maximum number of chunks in a single embedding request
         contextual_summarization_type: Type of summarization to apply to chunks
         contextual_agent_model_id: Model ID for contextual summarization agent
         contextual_agent_max_characters: Maximum characters for contextual summaries
+        contextual_agent_chunks_per_request: Number of chunks of a document situated by a
+            single contextual summarization request (1 for one request per chunk)
         mock: Whether to run in mock mode
-        processing_batch_size: Batch size for parallel processing
-        processing_max_workers: Number of worker threads for parallel processing
+        processing_batch_size: Number of documents to process in each batch
+        processing_max_workers: Number of worker threads splitting documents
+        processing_queue_size: Number of items buffered between the indexing stages
         device: Device to run embeddings on ('cpu' or 'cuda')
+        incremental: Whether to only index new or changed documents instead of rebuilding
+        stream_documents: Whether to stream documents from MongoDB inside the indexing step
+            instead of materializing them as an artifact
+        fetch_batch_size: Number of documents read per MongoDB query
+        ann_index: Whether to build an IVF index over the local vector index and report
+            its recall against exact search (only with the local retrievers)
+        ann_n_lists: Number of IVF lists, or None for 4 * sqrt(number of vectors)
+        ann_nprobe: Default number of IVF lists searched per query
 
     Returns:
         None
     """
 
-    documents = fetch_from_mongodb(
-        collection_name=extract_collection_name, limit=fetch_limit
-    )
+    if stream_documents:
+        documents = None
+    else:
+        documents = fetch_from_mongodb(
+            collection_name=extract_collection_name,
+            limit=fetch_limit,
+            exclude_fields=["child_urls", "summary"],
+            batch_size=fetch_batch_size,
+        )
 
-    documents = filter_by_quality(documents, content_quality_score_threshold)
+        documents = filter_by_quality(documents, content_quality_score_threshold)
 
     chunk_embed_load(
         documents=documents,
@@ -70,9 +100,23 @@ def compute_rag_vector_index(
         embedding_model_type=embedding_model_type,
         embedding_model_dim=embedding_model_dim,
         chunk_size=chunk_size,
+        embedding_batch_max_tokens=embedding_batch_max_tokens,
+        embedding_batch_max_size=embedding_batch_max_size,
         contextual_summarization_type=contextual_summarization_type,
         contextual_agent_model_id=contextual_agent_model_id,
         contextual_agent_max_characters=contextual_agent_max_characters,
+        contextual_agent_chunks_per_request=contextual_agent_chunks_per_request,
         mock=mock,
         device=device,
-    )
\ No newline at end of file
+        incremental=incremental,
+        extract_collection_name=extract_collection_name,
+        fetch_limit=fetch_limit,
+        fetch_batch_size=fetch_batch_size,
+        content_quality_score_threshold=content_quality_score_threshold,
+        processing_queue_size=processing_queue_size,
+    )
+
+    if retriever_type in LOCAL_RETRIEVER_TYPES and ann_index:
+        build_local_ann_index(
+            n_lists=ann_n_lists, nprobe=ann_nprobe, after="chunk_embed_load"
+        )
\ No newline at end of file
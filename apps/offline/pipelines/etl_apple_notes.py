@@ -6,7 +6,12 @@ from zenml import pipeline
 from steps.infrastructure import (
     read_documents_from_disk,
     save_documents_to_disk,
-    ingest_to_mongodb
+    ingest_to_mongodb,
+    delete_directories,
+)
+from steps.infrastructure.read_documents_from_disk import (
+    get_json_files,
+    get_packed_shards,
 )
 from steps.etl import (
     add_quality_score,
@@ -20,15 +25,55 @@ def etl_apple_notes(
     max_workers: int = 10,
     quality_agent_model_id: str = "gpt-4o-mini",
     quality_agent_mock: bool = True,
+    upsert: bool = False,
+    ingest_batch_size: int = 1000,
+    corpus_format: str = "json",
+    incremental: bool = False,
 ) -> None:
-    apple_data_dir = data_dir / "apple_notes"
-    logger.info(f"Reading apple data from {apple_data_dir}")
-    crawled_data_dir = data_dir / "apple_crawled"
-    logger.info(f"Reading apple data from {crawled_data_dir}")
+    if incremental:
+        # Only the delta directories fully written by the incremental syncs so far are
+        # processed, and deleted once ingested. Their notes are upserted into the
+        # collection instead of replacing it.
+        apple_data_dir = data_dir / "apple_notes_delta"
+        crawled_data_dir = data_dir / "apple_crawled_delta"
+        upsert = True
 
-    documents = read_documents_from_disk(
-        data_directory=apple_data_dir, nesting_level=1
-    )
+        delta_dirs = sorted(
+            path.relative_to(apple_data_dir)
+            for path in apple_data_dir.glob("run_*/*")
+            if path.is_dir() and path.suffix != ".tmp"
+        )
+        pending_delta_dirs = [
+            str(delta_dir)
+            for delta_dir in delta_dirs
+            if get_json_files(apple_data_dir / delta_dir)
+            or get_packed_shards(apple_data_dir / delta_dir)
+        ]
+        consumed_delta_dirs = [str(apple_data_dir / delta_dir) for delta_dir in delta_dirs]
+        if not pending_delta_dirs:
+            logger.info(f"No Apple Notes documents to process in {apple_data_dir}")
+            if consumed_delta_dirs:
+                delete_directories(
+                    directories=consumed_delta_dirs, delete_empty_parents=True
+                )
+
+            return
+
+        logger.info(f"Reading apple data from {apple_data_dir}: {pending_delta_dirs}")
+        documents = read_documents_from_disk(
+            data_directory=apple_data_dir,
+            nesting_level=1,
+            subdirectories=pending_delta_dirs,
+        )
+    else:
+        apple_data_dir = data_dir / "apple_notes"
+        crawled_data_dir = data_dir / "apple_crawled"
+
+        logger.info(f"Reading apple data from {apple_data_dir}")
+        documents = read_documents_from_disk(
+            data_directory=apple_data_dir, nesting_level=1
+        )
+    logger.info(f"Reading apple data from {crawled_data_dir}")
 
     enhanced_documents = add_quality_score(
         documents=documents,
@@ -37,10 +82,23 @@ def etl_apple_notes(
         max_workers=max_workers,
     )
 
-    save_documents_to_disk(documents=enhanced_documents, output_dir=crawled_data_dir)
+    save_documents_to_disk(
+        documents=enhanced_documents,
+        output_dir=crawled_data_dir,
+        corpus_format=corpus_format,
+    )
 
-    ingest_to_mongodb(
+    result = ingest_to_mongodb(
         models=enhanced_documents,
         collection_name=load_collection_name,
-        clear_collection=True,
-    )
\ No newline at end of file
+        clear_collection=not upsert,
+        upsert=upsert,
+        batch_size=ingest_batch_size,
+    )
+
+    if incremental:
+        delete_directories(
+            directories=consumed_delta_dirs,
+            delete_empty_parents=True,
+            after=result.invocation_id,
+        )
\ No newline at end of file
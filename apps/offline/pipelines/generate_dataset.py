@@ -26,7 +26,9 @@ def generate_dataset(
     data_dir: Path = Path("data/"),
 ) -> None:
     documents = fetch_from_mongodb(
-        collection_name=extract_collection_name, limit=fetch_limit
+        collection_name=extract_collection_name,
+        limit=fetch_limit,
+        exclude_fields=["child_urls", "summary"],
     )
 
     create_histograms(documents)
@@ -2,7 +2,9 @@ from.contextual_summarization import (
     ContextualSummarizationAgent,
     SimpleSummarizationAgent,
 )
+from .cache import LLMResponseCache, get_llm_response_cache
 from .quality import HeuristicQualityAgent, QualityScoreAgent
+from .scheduler import RateLimitScheduler, get_rate_limit_scheduler
 from .summarization import SummarizationAgent
 
 __all__ = [
@@ -10,5 +12,9 @@ __all__ = [
     "QualityScoreAgent",
     "SummarizationAgent",
     "ContextualSummarizationAgent",
-    "SimpleSummarizationAgent",    
+    "SimpleSummarizationAgent",
+    "LLMResponseCache",
+    "get_llm_response_cache",
+    "RateLimitScheduler",
+    "get_rate_limit_scheduler",
 ]
@@ -0,0 +1,114 @@
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from offline.config import settings
+from offline.infrastructure.cache import SQLiteCache
+
+
+class LLMResponseCache:
+    """Persistent cache of LLM completions, so unchanged prompts are never sent twice.
+
+    Entries are keyed by the model ID, the temperature and a hash of the prompt
+    messages. Only the text of the completion is stored. Without a backing cache,
+    every call goes straight to the model.
+
+    Attributes:
+        cache: The persistent cache storing the completions, or None to disable caching.
+    """
+
+    def __init__(self, cache: SQLiteCache | None) -> None:
+        self.cache = cache
+
+    @property
+    def hits(self) -> int:
+        return self.cache.hits if self.cache else 0
+
+    @property
+    def misses(self) -> int:
+        return self.cache.misses if self.cache else 0
+
+    async def get_or_request(
+        self,
+        model_id: str,
+        messages: list[dict[str, Any]],
+        temperature: float | None,
+        request: Callable[[], Awaitable[Any]],
+    ) -> str | None:
+        """Return the cached completion of the messages, or request and cache it.
+
+        Args:
+            model_id: The ID of the language model.
+            messages: The prompt messages sent to the model.
+            temperature: The sampling temperature, or None for the provider default.
+            request: Callable sending the completion request on a cache miss.
+
+        Returns:
+            str | None: The completion text, or None if the model returned no choices.
+        """
+
+        key = self.key(model_id, messages, temperature)
+        value = self.cache.get(key) if self.cache else None
+        if value is not None:
+            return value.decode("utf-8")
+
+        response = await request()
+        if not response.choices:
+            return None
+
+        content = response.choices[0].message.content
+        if content and self.cache:
+            self.cache.set(key, content.encode("utf-8"))
+
+        return content
+
+    @staticmethod
+    def key(
+        model_id: str, messages: list[dict[str, Any]], temperature: float | None
+    ) -> str:
+        prompt_hash = hashlib.sha256(
+            json.dumps(messages, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+        return f"{model_id}\0{temperature}\0{prompt_hash}"
+
+
+def get_llm_response_cache(use_cache: bool = True) -> LLMResponseCache:
+    """Gets the LLM response cache stored at `settings.LLM_CACHE_PATH`.
+
+    Args:
+        use_cache: Whether to cache LLM responses on disk.
+
+    Returns:
+        LLMResponseCache: The cache, which passes every call through to the model if
+            caching is disabled or no cache path is configured.
+    """
+
+    if not use_cache or settings.LLM_CACHE_PATH is None:
+        return LLMResponseCache(cache=None)
+
+    return LLMResponseCache(cache=get_llm_cache(settings.LLM_CACHE_PATH))
+
+
+@lru_cache
+def get_llm_cache(path: Path) -> SQLiteCache:
+    """Gets the process-wide SQLite cache of LLM responses stored at the given path.
+
+    Args:
+        path: Path of the SQLite file backing the cache.
+
+    Returns:
+        SQLiteCache: The cache, shared by every agent of the process.
+    """
+
+    ttl_seconds = (
+        settings.LLM_CACHE_TTL_DAYS * 24 * 3600 if settings.LLM_CACHE_TTL_DAYS else None
+    )
+
+    return SQLiteCache(
+        path,
+        max_size_bytes=settings.LLM_CACHE_MAX_SIZE_MB * 1024 * 1024,
+        ttl_seconds=ttl_seconds,
+    )
@@ -2,13 +2,18 @@ import asyncio
 import os
 import psutil
 
+from litellm import acompletion
 from pydantic import BaseModel
 from loguru import logger
 from openai import AsyncOpenAI
 from tqdm.asyncio import tqdm
 
+from offline import utils
 from offline.config import settings
 
+from .cache import get_llm_response_cache
+from .scheduler import RateLimitScheduler, get_rate_limit_scheduler
+
 class ContextualDocument(BaseModel):
     """A document with its chunk and contextual summarization.
 
@@ -34,6 +39,28 @@ class ContextualDocument(BaseModel):
         self.contextual_summarization = summary
         return self
 
+class ChunkContext(BaseModel):
+    """Context of a single chunk in a batched contextual summarization answer.
+
+    Attributes:
+        index: Index of the chunk within the request.
+        context: The succinct context situating the chunk within the document.
+    """
+
+    index: int
+    context: str
+
+
+class ContextualSummarizationResponseFormat(BaseModel):
+    """Format of batched contextual summarization responses from the language model.
+
+    Attributes:
+        contexts: One context per chunk of the request.
+    """
+
+    contexts: list[ChunkContext]
+
+
 class ContextualSummarizationAgent:
     """Generates summaries for documents using LiteLLM with async support.
 
@@ -41,11 +68,22 @@ class ContextualSummarizationAgent:
     generate concise summaries while preserving key information from the original
     documents. It supports both single and batch document processing.
 
+    By default, the chunks of a document are situated in groups of
+    `chunks_per_request` with a single structured request per group, instead of
+    sending the whole document once per chunk. All groups of a document share the
+    same prompt prefix (the document), so provider-side prompt caching also applies
+    across them. Chunks missing from a structured answer fall back to one request each.
+
     Attributes:
         max_characters: Maximum number of characters for the summary.
         model_id: The ID of the language model to use for summarization.
         mock: If True, returns mock summaries instead of using the model.
         max_concurrent_requests: Maximum number of concurrent API requests.
+        chunks_per_request: Maximum number of chunks situated by a single request.
+            1 sends one request per chunk.
+        scheduler: Rate limit scheduler the requests go through. Defaults to the
+            scheduler shared by every agent using the same model.
+        use_cache: Whether to serve unchanged prompts from the LLM response cache.
     """
 
     SYSTEM_PROMPT_TEMPLATE = """You are a helpful assistant specialized in summarizing documents relative to a given chunk.
@@ -57,6 +95,22 @@ Here is the chunk we want to situate within the whole document
 {chunk}
 </chunk> 
 Please give a short succinct context of maximum {characters} characters to situate this chunk within the overall document for the purposes of improving search retrieval of the chunk. Answer only with the succinct context and nothing else. 
+"""
+
+    BATCH_PROMPT_TEMPLATE = """You are a helpful assistant specialized in summarizing documents relative to given chunks.
+<document> 
+{content}
+</document> 
+Here are the chunks we want to situate within the whole document, each with its index
+{chunks}
+For each chunk, please give a short succinct context of maximum {characters} characters to situate it within the overall document for the purposes of improving search retrieval of the chunk.
+
+It is crucial that you return one context per chunk in the following JSON format:
+{{
+    "contexts": [
+        {{"index": <chunk index>, "context": "<succinct context>"}}
+    ]
+}}
 """
 
     def __init__(
@@ -65,11 +119,17 @@ Please give a short succinct context of maximum {characters} characters to situa
         max_characters: int = 128,
         mock: bool = False,
         max_concurrent_requests: int = 4,
+        chunks_per_request: int = 16,
+        scheduler: RateLimitScheduler | None = None,
+        use_cache: bool = True,
     ) -> None:
         self.model_id = model_id
         self.max_characters = max_characters
         self.mock = mock
         self.max_concurrent_requests = max_concurrent_requests
+        self.chunks_per_request = max(chunks_per_request, 1)
+        self.scheduler = scheduler or get_rate_limit_scheduler(model_id)
+        self.cache = get_llm_response_cache(use_cache)
 
     def __call__(self, content: str, chunks: list[str]) -> list[str]:
         """Process document chunks for contextual summarization.
@@ -117,29 +177,24 @@ Please give a short succinct context of maximum {characters} characters to situa
             ContextualDocument(content=content, chunk=chunk) for chunk in chunks
         ]
 
-        summarized_documents = await self.__process_batch(
-            documents, await_time_seconds=7
-        )
+        if self.chunks_per_request > 1 and len(documents) > 1:
+            await self.__process_chunk_groups(documents)
 
-        documents_with_summaries = [
-            doc
-            for doc in summarized_documents
-            if doc.contextual_summarization is not None
-        ]
+            missing_documents = [
+                doc for doc in documents if doc.contextual_summarization is None
+            ]
+            if missing_documents:
+                logger.info(
+                    f"Situating {len(missing_documents)} chunks missing from the batched answers one by one..."
+                )
+                await self.__process_batch(missing_documents)
+        else:
+            await self.__process_batch(documents)
 
-        documents_without_summaries = [
-            doc for doc in documents if doc.contextual_summarization is None
+        documents_with_summaries = [
+            doc for doc in documents if doc.contextual_summarization is not None
         ]
 
-        if documents_without_summaries:
-            logger.info(
-                f"Retrying {len(documents_without_summaries)} failed documents with increased await time..."
-            )
-            retry_results = await self.__process_batch(
-                documents_without_summaries, await_time_seconds=20
-            )
-            documents_with_summaries += retry_results
-
         end_mem = process.memory_info().rss
         memory_diff = end_mem - start_mem
         logger.debug(
@@ -153,11 +208,13 @@ Please give a short succinct context of maximum {characters} characters to situa
         logger.info(
             f"Contextual summarization results: "
             f"{success_count}/{total_chunks} chunks summarized successfully ✓ | "
-            f"{failed_count}/{total_chunks} chunks failed ✗"
+            f"{failed_count}/{total_chunks} chunks failed ✗ | "
+            f"LLM cache hits: {self.cache.hits}, misses: {self.cache.misses}"
         )
 
+        # Documents are updated in place, so iterate them in the original chunk order.
         contextual_chunks = []
-        for doc in documents_with_summaries:
+        for doc in documents:
             if doc.contextual_summarization is not None:
                 chunk = f"{doc.contextual_summarization}\n\n{doc.chunk}"
             else:
@@ -168,13 +225,15 @@ Please give a short succinct context of maximum {characters} characters to situa
         return contextual_chunks
         
     async def __process_batch(
-        self, documents: list[ContextualDocument], await_time_seconds: int
+        self, documents: list[ContextualDocument]
     ) -> list[ContextualDocument]:
-        """Process a batch of documents with specified await time.
+        """Process a batch of documents.
+
+        Rate limits are handled per request by the scheduler, which retries only the
+        requests that failed.
 
         Args:
             documents: List of documents to summarize
-            await_time_seconds: Time in seconds to wait between requests
 
         Returns:
             list[ContextualDocument]: Processed documents with summaries
@@ -182,10 +241,7 @@ Please give a short succinct context of maximum {characters} characters to situa
 
         semaphore = asyncio.Semaphore(self.max_concurrent_requests)
         tasks = [
-            self.__summarize_context(
-                document, semaphore, await_time_seconds=await_time_seconds
-            )
-            for document in documents
+            self.__summarize_context(document, semaphore) for document in documents
         ]
         results = []
         for coro in tqdm(
@@ -199,11 +255,113 @@ Please give a short succinct context of maximum {characters} characters to situa
 
         return results
     
+    async def __process_chunk_groups(
+        self, documents: list[ContextualDocument]
+    ) -> None:
+        """Situate the chunks of a document in groups of `chunks_per_request`.
+
+        Args:
+            documents: The chunks of a single document, updated in place.
+        """
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        groups = [
+            documents[i : i + self.chunks_per_request]
+            for i in range(0, len(documents), self.chunks_per_request)
+        ]
+
+        await asyncio.gather(
+            *[self.__summarize_chunk_group(group, semaphore) for group in groups]
+        )
+
+    async def __summarize_chunk_group(
+        self,
+        documents: list[ContextualDocument],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Generate the contextual summaries of several chunks with a single request.
+
+        Args:
+            documents: Chunks of the same document, updated in place.
+            semaphore: Semaphore for controlling concurrent requests.
+        """
+
+        if self.mock:
+            for document in documents:
+                document.add_contextual_summarization("This is a mock summary")
+
+            return
+
+        chunks = "\n".join(
+            f'<chunk index="{index}">\n{document.chunk}\n</chunk>'
+            for index, document in enumerate(documents)
+        )
+        prompt = self.BATCH_PROMPT_TEMPLATE.format(
+            characters=self.max_characters,
+            content=documents[0].content[
+                :6000,
+            ],
+            chunks=chunks,
+        )
+        messages = [
+            {
+                "role": "system",
+                "content": prompt,
+            },
+        ]
+
+        async with semaphore:
+            try:
+                answer = await self.cache.get_or_request(
+                    self.model_id,
+                    messages,
+                    temperature=0,
+                    request=lambda: self.scheduler.submit(
+                        lambda: acompletion(
+                            model=self.model_id,
+                            messages=messages,
+                            stream=False,
+                            temperature=0,
+                            response_format={"type": "json_object"},
+                        ),
+                        estimated_tokens=utils.count_tokens(prompt, model_id=self.model_id)
+                        + len(documents) * (self.max_characters // 3 + 16),
+                    ),
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to generate contextual summaries for {len(documents)} chunks: {str(e)}"
+                )
+                return
+
+        response = self.__parse_batch_output(answer)
+        if response is None:
+            logger.warning(
+                f"Failed to parse contextual summaries for {len(documents)} chunks"
+            )
+            return
+
+        for chunk_context in response.contexts:
+            if 0 <= chunk_context.index < len(documents) and chunk_context.context:
+                documents[chunk_context.index].add_contextual_summarization(
+                    chunk_context.context
+                )
+
+    def __parse_batch_output(
+        self, answer: str | None
+    ) -> ContextualSummarizationResponseFormat | None:
+        if not answer:
+            return None
+
+        try:
+            return ContextualSummarizationResponseFormat.model_validate_json(answer)
+        except Exception:
+            return None
+
     async def __summarize_context(
         self,
         document: ContextualDocument,
         semaphore: asyncio.Semaphore | None = None,
-        await_time_seconds: int = 2,
     ) -> ContextualDocument:
         
         """Generate a contextual summary for a single document.
@@ -211,7 +369,6 @@ Please give a short succinct context of maximum {characters} characters to situa
         Args:
             document: The document to summarize
             semaphore: Optional semaphore for controlling concurrent requests
-            await_time_seconds: Time in seconds to wait between requests
 
         Returns:
             ContextualDocument: Document with generated summary
@@ -222,30 +379,39 @@ Please give a short succinct context of maximum {characters} characters to situa
         
         async def process_document() -> ContextualDocument:
             try:
-                response = await acompletion(
-                    model=self.model_id,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": self.SYSTEM_PROMPT_TEMPLATE.format(
-                                characters=self.max_characters,
-                                content=document.content[
-                                    :6000,
-                                ],
-                                chunk=document.chunk
-                            ),
-                        },
+                prompt = self.SYSTEM_PROMPT_TEMPLATE.format(
+                    characters=self.max_characters,
+                    content=document.content[
+                        :6000,
                     ],
-                    stream=False,
+                    chunk=document.chunk
+                )
+                messages = [
+                    {
+                        "role": "system",
+                        "content": prompt,
+                    },
+                ]
+                context_summary = await self.cache.get_or_request(
+                    self.model_id,
+                    messages,
                     temperature=0,
+                    request=lambda: self.scheduler.submit(
+                        lambda: acompletion(
+                            model=self.model_id,
+                            messages=messages,
+                            stream=False,
+                            temperature=0,
+                        ),
+                        estimated_tokens=utils.count_tokens(prompt, model_id=self.model_id)
+                        + self.max_characters // 3,
+                    ),
                 )
-                await asyncio.sleep(await_time_seconds) # Rate limiting
 
-                if not response.choices:
+                if context_summary is None:
                     logger.warning("No contextual summary generated for chunk")
                     return document
 
-                context_summary: str = response.choices[0].message.content
                 return document.add_contextual_summarization(context_summary)
             except Exception as e:
                 logger.warning(f"Failed to generate contextual summary: {str(e)}")
@@ -269,6 +435,9 @@ class SimpleSummarizationAgent:
         model_id: The ID of the language model to use for summarization.
         mock: If True, returns mock summaries instead of using the model.
         max_concurrent_requests: Maximum number of concurrent API requests.
+        scheduler: Rate limit scheduler the requests go through. Defaults to the
+            scheduler shared by every agent using the same model.
+        use_cache: Whether to serve unchanged prompts from the LLM response cache.
     """
 
     SYSTEM_PROMPT_TEMPLATE = """Below is an instruction that describes a task, paired with an input that provides further context. Write a response that appropriately completes the request.
@@ -292,6 +461,8 @@ highlighting the most significant insights. Answer only with the succinct contex
         max_characters: int = 128,
         mock: bool = False,
         max_concurrent_requests: int = 4,
+        scheduler: RateLimitScheduler | None = None,
+        use_cache: bool = True,
     ) -> None:
         self.model_id = model_id
         self.base_url = base_url
@@ -299,6 +470,8 @@ highlighting the most significant insights. Answer only with the succinct contex
         self.max_characters = max_characters
         self.mock = mock
         self.max_concurrent_requests = max_concurrent_requests
+        self.scheduler = scheduler or get_rate_limit_scheduler(model_id)
+        self.cache = get_llm_response_cache(use_cache)
 
         if self.model_id == "tgi":
             assert self.base_url and self.api_key, (
@@ -353,9 +526,7 @@ highlighting the most significant insights. Answer only with the succinct contex
             f"Initial memory usage: {start_mem // (1024 * 1024)} MB"
         )
 
-        document = await self.__summarize(
-            document=ContextualDocument(content=content), await_time_seconds=20
-        )
+        document = await self.__summarize(document=ContextualDocument(content=content))
 
         end_mem = process.memory_info().rss
         memory_diff = end_mem - start_mem
@@ -379,13 +550,11 @@ highlighting the most significant insights. Answer only with the succinct contex
     async def __summarize(
         self,
         document: ContextualDocument,
-        await_time_seconds: int = 2,
     ) -> ContextualDocument:
         """Generate a contextual summary for a single document.
 
         Args:
             document: The document to summarize
-            await_time_seconds: Time in seconds to wait between requests
 
         Returns:
             ContextualDocument: Document with generated summary
@@ -396,26 +565,35 @@ highlighting the most significant insights. Answer only with the succinct contex
         
         async def process_document() -> ContextualDocument:
             try:
-                response = await self.client.completions.create(
-                    model=self.model_id,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": self.SYSTEM_PROMPT_TEMPLATE.format(
-                                characters=self.max_characters, content=document.content
-                            ),
-                        }
-                    ],
-                    stream=False,
+                prompt = self.SYSTEM_PROMPT_TEMPLATE.format(
+                    characters=self.max_characters, content=document.content
+                )
+                messages = [
+                    {
+                        "role": "system",
+                        "content": prompt,
+                    }
+                ]
+                context_summary = await self.cache.get_or_request(
+                    self.model_id,
+                    messages,
                     temperature=0,
+                    request=lambda: self.scheduler.submit(
+                        lambda: self.client.completions.create(
+                            model=self.model_id,
+                            messages=messages,
+                            stream=False,
+                            temperature=0,
+                        ),
+                        estimated_tokens=utils.count_tokens(prompt, model_id=self.model_id)
+                        + self.max_characters // 3,
+                    ),
                 )
-                await asyncio.sleep(await_time_seconds) # Rate limiting
 
-                if not response.choices:
+                if context_summary is None:
                     logger.warning("No contextual summary generated for chunk")
                     return document
                 
-                context_summary: str = response.choices[0].message.content
                 return document.add_contextual_summarization(context_summary)
             except Exception as e:
                 logger.warning(f"Failed to generate contextual summary: {str(e)}")
@@ -11,6 +11,9 @@ from tqdm.asyncio import tqdm
 from offline import utils
 from offline.domain import Document
 
+from .cache import get_llm_response_cache
+from .scheduler import RateLimitScheduler, get_rate_limit_scheduler
+
 class QualityScoreResponseFormat(BaseModel):
     """Format for quality score responses from the language model.
 
@@ -32,6 +35,9 @@ class QualityScoreAgent:
         model_id: The ID of the language model to use for quality evaluation.
         mock: If True, returns mock quality scores instead of using the model.
         max_concurrent_requests: Maximum number of concurrent API requests.
+        scheduler: Rate limit scheduler the requests go through. Defaults to the
+            scheduler shared by every agent using the same model.
+        use_cache: Whether to serve unchanged prompts from the LLM response cache.
     """
 
     SYSTEM_PROMPT_TEMPLATE = """You are an expert judge tasked with evaluating the quality of a given DOCUMENT.
@@ -59,10 +65,14 @@ DOCUMENT:
         model_id: str = "gpt-4o-mini",
         mock: bool = False,
         max_concurrent_requests: int = 10,
+        scheduler: RateLimitScheduler | None = None,
+        use_cache: bool = True,
     ) -> None:
         self.model_id = model_id
         self.mock = mock
         self.max_concurrent_requests = max_concurrent_requests
+        self.scheduler = scheduler or get_rate_limit_scheduler(model_id)
+        self.cache = get_llm_response_cache(use_cache)
 
     def __call__(
         self, documents: Document | list[Document]
@@ -91,7 +101,10 @@ DOCUMENT:
     async def __get_quality_score_batch(
         self, documents: list[Document]
     ) -> list[Document]:
-        """Asynchronously score multiple documents with retry mechanism.
+        """Asynchronously score multiple documents.
+
+        Rate limits are handled per request by the scheduler, which retries only the
+        requests that failed.
 
         Args:
             documents: List of documents to score.
@@ -107,24 +120,7 @@ DOCUMENT:
             f"Current process memory usage: {start_mem // (1024 * 1024)} MB"
         )
 
-        scored_documents = await self.__process_batch(documents, await_time_seconds=7)
-        documents_with_scores = [
-            doc for doc in scored_documents if doc.content_quality_score is not None
-        ]
-        documents_without_scores = [
-            doc for doc in scored_documents if doc.content_quality_score is None
-        ]
-
-        # Retry failed documents with increased await time, as most failures are due to rate limiting.
-        if documents_without_scores:
-            logger.info(
-                f"Retrying {len(documents_without_scores)} failed documents with increased await time..."
-            )
-            retry_results = await self.__process_batch(
-                documents_without_scores, await_time_seconds=20
-            )
-
-            documents_with_scores += retry_results
+        scored_documents = await self.__process_batch(documents)
 
         end_mem = process.memory_info().rss
         memory_diff = end_mem - start_mem
@@ -135,27 +131,21 @@ DOCUMENT:
         )
 
         success_count = len(
-            [doc for doc in scored_documents if hasattr(doc, "content_quality_score")]
+            [doc for doc in scored_documents if doc.content_quality_score is not None]
         )
         failed_count = total_docs - success_count
         logger.info(
             f"Quality scoring completed: "
             f"{success_count}/{total_docs} succeeded ✓ | "
-            f"{failed_count}/{total_docs} failed ✗"
+            f"{failed_count}/{total_docs} failed ✗ | "
+            f"LLM cache hits: {self.cache.hits}, misses: {self.cache.misses}"
         )
 
         return scored_documents
 
-    async def __process_batch(
-        self, documents: list[Document], await_time_seconds: int
-    ) -> list[Document]:
+    async def __process_batch(self, documents: list[Document]) -> list[Document]:
         semaphore = asyncio.Semaphore(self.max_concurrent_requests)
-        tasks = [
-            self.__get_quality_score(
-                document, semaphore, await_time_seconds=await_time_seconds
-            )
-            for document in documents
-        ]
+        tasks = [self.__get_quality_score(document, semaphore) for document in documents]
         results = []
         for coro in tqdm(
             asyncio.as_completed(tasks),
@@ -172,14 +162,12 @@ DOCUMENT:
         self,
         document: Document,
         semaphore: asyncio.Semaphore | None = None,
-        await_time_seconds: int = 2,
     ) -> Document | None:
         """Generate a summary for a single document.
 
         Args:
             document: The Document object to summarize.
             semaphore: Optional semaphore for controlling concurrent requests.
-            await_time_seconds: Time to wait for the model to respond.
         Returns:
             Document | None: Document with generated summary or None if failed.
         """
@@ -201,22 +189,32 @@ DOCUMENT:
                 )
 
             try:
-                response = await acompletion(
-                    model=self.model_id,
-                    messages=[
-                        {"role": "user", "content": input_user_prompt},
-                    ],
-                    stream=False,
+                messages = [
+                    {"role": "user", "content": input_user_prompt},
+                ]
+                raw_answer = await self.cache.get_or_request(
+                    self.model_id,
+                    messages,
+                    temperature=None,
+                    request=lambda: self.scheduler.submit(
+                        lambda: acompletion(
+                            model=self.model_id,
+                            messages=messages,
+                            stream=False,
+                        ),
+                        estimated_tokens=utils.count_tokens(
+                            input_user_prompt, model_id=self.model_id
+                        )
+                        + 16,
+                    ),
                 )
-                await asyncio.sleep(await_time_seconds)
 
-                if not response.choices:
+                if raw_answer is None:
                     logger.warning(
                         f"No quality score generated for document {document.id}"
                     )
                     return document
 
-                raw_answer = response.choices[0].message.content
                 quality_score = self.__parse_model_output(raw_answer)
 
                 if not quality_score:
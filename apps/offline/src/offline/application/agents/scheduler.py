@@ -0,0 +1,344 @@
+import asyncio
+import random
+import re
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Mapping, TypeVar
+
+from loguru import logger
+
+from offline.config import settings
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RateLimitError(Exception):
+    """Raised when a request still fails after all its retries."""
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously at `capacity / 60` units per second.
+
+    Attributes:
+        capacity: Maximum number of units available in one minute.
+        level: Number of units currently available.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.level = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(
+            self.capacity, self.level + (now - self.updated_at) * self.capacity / 60
+        )
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they already are)."""
+
+        self.refill()
+        # Requests bigger than the whole budget are let through once the bucket is full.
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+
+        return (amount - self.level) * 60 / self.capacity
+
+    def consume(self, amount: float) -> None:
+        self.refill()
+        self.level = min(self.capacity, self.level - amount)
+
+    def update_from_headers(self, limit: int | None, remaining: int | None) -> None:
+        """Align the budget with the limits reported by the provider."""
+
+        if limit:
+            self.capacity = limit
+        if remaining is not None:
+            self.refill()
+            self.level = min(self.level, remaining)
+
+
+class RateLimitScheduler:
+    """Schedules async LLM requests at the provider's requests and tokens per minute limits.
+
+    Every request reserves its estimated tokens from a tokens-per-minute budget and one
+    unit from a requests-per-minute budget before it is sent, so requests go out as fast
+    as the budgets allow instead of being padded with fixed sleeps. The budgets are
+    corrected with the actual token usage of each response and with the
+    `x-ratelimit-*` headers returned by the provider.
+
+    When the provider still answers with a 429 (or a transient error), only that request
+    is retried, after the delay requested by the `retry-after` headers or an exponential
+    backoff with jitter. A 429 also pauses every other request of the scheduler until the
+    delay is over, as the budget is shared.
+
+    The scheduler is meant to be shared by every agent calling the same model (see
+    `get_rate_limit_scheduler`), including across `asyncio.run` calls and threads.
+
+    Attributes:
+        requests_per_minute: Requests per minute budget.
+        tokens_per_minute: Tokens per minute budget.
+        max_concurrent_requests: Maximum number of requests in flight.
+        max_retries: Maximum number of retries of a single request.
+        base_delay_seconds: Initial backoff delay, doubled after every retry.
+        max_delay_seconds: Upper bound of the backoff delay.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = settings.LLM_TOKENS_PER_MINUTE,
+        max_concurrent_requests: int = 32,
+        max_retries: int = 6,
+        base_delay_seconds: float = 1.0,
+        max_delay_seconds: float = 60.0,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_retries = max_retries
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+
+        self.__requests = TokenBucket(requests_per_minute)
+        self.__tokens = TokenBucket(tokens_per_minute)
+        self.__paused_until = 0.0
+
+        # asyncio primitives are bound to an event loop, so every loop (e.g. one per
+        # splitting thread) gets its own. The budgets above are shared by all of them.
+        self.__budget_lock = threading.Lock()
+        self.__primitives: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, tuple[asyncio.Lock, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+        self.num_requests = 0
+        self.num_rate_limited = 0
+        self.num_failed = 0
+
+    async def submit(
+        self,
+        request: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        get_headers: Callable[[T], Mapping[str, Any] | None] | None = None,
+    ) -> T:
+        """Send a request once the budgets allow it, retrying it on rate limits.
+
+        Args:
+            request: Callable creating the request coroutine. It is called once per attempt.
+            estimated_tokens: Estimated prompt plus completion tokens of the request.
+            get_headers: Optional callable extracting the HTTP headers from a response.
+                Defaults to reading them from LiteLLM responses.
+
+        Returns:
+            T: The response of the request.
+
+        Raises:
+            RateLimitError: If the request is still rate limited after all retries.
+            Exception: Any non-retryable error raised by the request.
+        """
+
+        get_headers = get_headers or get_litellm_response_headers
+        lock, semaphore = self.__get_primitives()
+
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.__acquire(lock, estimated_tokens)
+
+                try:
+                    response = await request()
+                except Exception as e:
+                    status_code = get_status_code(e)
+                    if status_code not in RETRYABLE_STATUS_CODES and not isinstance(
+                        e, (asyncio.TimeoutError, ConnectionError)
+                    ):
+                        self.num_failed += 1
+                        raise
+
+                    delay = self.__get_retry_delay(e, attempt)
+                    if status_code == 429:
+                        with self.__budget_lock:
+                            self.num_rate_limited += 1
+                            self.__paused_until = max(
+                                self.__paused_until, time.monotonic() + delay
+                            )
+                    logger.debug(
+                        f"Request failed with status {status_code} (attempt {attempt + 1}/{self.max_retries + 1}). "
+                        f"Retrying in {delay:.1f}s: {str(e)}"
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+
+                self.num_requests += 1
+                self.__update_budgets(response, estimated_tokens, get_headers)
+
+                return response
+
+        self.num_failed += 1
+
+        raise RateLimitError(
+            f"Request still rate limited after {self.max_retries + 1} attempts."
+        )
+
+    def __get_primitives(self) -> tuple[asyncio.Lock, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        with self.__budget_lock:
+            if loop not in self.__primitives:
+                self.__primitives[loop] = (
+                    asyncio.Lock(),
+                    asyncio.Semaphore(self.max_concurrent_requests),
+                )
+
+            return self.__primitives[loop]
+
+    async def __acquire(self, lock: asyncio.Lock, estimated_tokens: int) -> None:
+        # Waiters queue on the lock, so the budgets are handed out in FIFO order.
+        async with lock:
+            while True:
+                with self.__budget_lock:
+                    wait_time = max(
+                        self.__paused_until - time.monotonic(),
+                        self.__requests.wait_time(1),
+                        self.__tokens.wait_time(estimated_tokens),
+                    )
+                    if wait_time <= 0:
+                        self.__requests.consume(1)
+                        self.__tokens.consume(estimated_tokens)
+                        return
+
+                await asyncio.sleep(wait_time)
+
+    def __update_budgets(
+        self,
+        response: Any,
+        estimated_tokens: int,
+        get_headers: Callable[[Any], Mapping[str, Any] | None],
+    ) -> None:
+        usage = getattr(response, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        try:
+            headers = get_headers(response)
+        except Exception:
+            headers = None
+
+        with self.__budget_lock:
+            if total_tokens:
+                # Give back (or take) the difference between the estimate and the actual usage.
+                self.__tokens.consume(total_tokens - estimated_tokens)
+
+            if not headers:
+                return
+
+            self.__requests.update_from_headers(
+                limit=get_int_header(headers, "x-ratelimit-limit-requests"),
+                remaining=get_int_header(headers, "x-ratelimit-remaining-requests"),
+            )
+            self.__tokens.update_from_headers(
+                limit=get_int_header(headers, "x-ratelimit-limit-tokens"),
+                remaining=get_int_header(headers, "x-ratelimit-remaining-tokens"),
+            )
+
+    def __get_retry_delay(self, error: Exception, attempt: int) -> float:
+        headers = get_error_headers(error)
+        retry_after = get_retry_after_seconds(headers) if headers else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay_seconds) + random.uniform(0, 1)
+
+        # Exponential backoff with full jitter.
+        delay = min(self.base_delay_seconds * 2**attempt, self.max_delay_seconds)
+
+        return random.uniform(delay / 2, delay)
+
+
+_schedulers: dict[str, RateLimitScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_rate_limit_scheduler(model_id: str) -> RateLimitScheduler:
+    """Get the scheduler shared by every agent calling the given model.
+
+    Args:
+        model_id: The ID of the language model.
+
+    Returns:
+        RateLimitScheduler: The shared scheduler of the model.
+    """
+
+    with _schedulers_lock:
+        if model_id not in _schedulers:
+            _schedulers[model_id] = RateLimitScheduler()
+
+        return _schedulers[model_id]
+
+
+def get_status_code(error: Exception) -> int | None:
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+
+    return status_code
+
+
+def get_error_headers(error: Exception) -> Mapping[str, Any] | None:
+    headers = getattr(error, "litellm_response_headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+
+    return headers
+
+
+def get_litellm_response_headers(response: Any) -> Mapping[str, Any] | None:
+    hidden_params = getattr(response, "_hidden_params", None) or {}
+
+    return hidden_params.get("additional_headers")
+
+
+def get_int_header(headers: Mapping[str, Any], name: str) -> int | None:
+    # LiteLLM prefixes the provider headers with "llm_provider-".
+    value = headers.get(name, headers.get(f"llm_provider-{name}"))
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def get_retry_after_seconds(headers: Mapping[str, Any]) -> float | None:
+    """Read how long to wait before retrying from the rate limit headers.
+
+    Supports `retry-after-ms`, `retry-after` (in seconds) and the OpenAI
+    `x-ratelimit-reset-*` durations such as "1s", "250ms" or "6m0s".
+    """
+
+    for name in ("retry-after-ms", "retry-after"):
+        value = headers.get(name, headers.get(f"llm_provider-{name}"))
+        try:
+            if value is not None:
+                return float(value) / 1000 if name.endswith("ms") else float(value)
+        except (TypeError, ValueError):
+            continue
+
+    reset_times = [
+        parse_duration(headers.get(name, headers.get(f"llm_provider-{name}")))
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    reset_times = [reset_time for reset_time in reset_times if reset_time is not None]
+
+    return max(reset_times) if reset_times else None
+
+
+def parse_duration(value: Any) -> float | None:
+    if value is None:
+        return None
+
+    matches = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", str(value))
+    if not matches:
+        return None
+
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+    return sum(float(amount) * units[unit] for amount, unit in matches)
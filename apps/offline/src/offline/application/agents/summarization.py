@@ -6,8 +6,12 @@ from litellm import acompletion
 from loguru import logger
 from tqdm.asyncio import tqdm
 
+from offline import utils
 from offline.domain import Document
 
+from .cache import get_llm_response_cache
+from .scheduler import RateLimitScheduler, get_rate_limit_scheduler
+
 class SummarizationAgent:
     """Generates summaries for documents using LiteLLM with async support.
     
@@ -20,6 +24,9 @@ class SummarizationAgent:
         model_id: The ID of the language model to use for summarization.
         mock: If True, returns mock summaries instead of using the model.
         max_concurrent_requests: Maximum number of concurrent API requests.
+        scheduler: Rate limit scheduler the requests go through. Defaults to the
+            scheduler shared by every agent using the same model.
+        use_cache: Whether to serve unchanged prompts from the LLM response cache.
     """
 
     SYSTEM_PROMPT_TEMPLATE = """You are a helpful assistant specialized in summarizing documents.
@@ -44,11 +51,15 @@ Return the document in markdown format regardless of the original format.
         model_id: str = "gpt-4o-mini",
         mock: bool = False,
         max_concurrent_requests: int = 10,
+        scheduler: RateLimitScheduler | None = None,
+        use_cache: bool = True,
     ) -> None:
         self.max_characters = max_characters
         self.model_id = model_id
         self.mock = mock
         self.max_concurrent_requests = max_concurrent_requests
+        self.scheduler = scheduler or get_rate_limit_scheduler(model_id)
+        self.cache = get_llm_response_cache(use_cache)
 
     def __call__(
             self, documents: Document | list[Document], temperature: float = 0.0
@@ -95,22 +106,10 @@ Return the document in markdown format regardless of the original format.
             f"Current process memory usage: {start_mem // (1024 * 1024)} MB"
         )
 
-        summarized_documents = await self.__process_batch(
-            documents, temperature, await_time_seconds=7
-        )
+        summarized_documents = await self.__process_batch(documents, temperature)
         documents_with_summaries = [
             doc for doc in summarized_documents if doc.summary is not None
         ]
-        documents_without_summaries = [doc for doc in documents if doc.summary is None]
-
-        if documents_without_summaries:
-            logger.info(
-                f"Retrying {len(documents_without_summaries)} failed documents with increased await time..."
-            )
-            retry_results = await self.__process_batch(
-                documents_without_summaries, temperature, await_time_seconds=20
-            )
-            documents_with_summaries += retry_results
 
         end_mem = process.memory_info().rss
         memory_diff = end_mem - start_mem
@@ -125,29 +124,30 @@ Return the document in markdown format regardless of the original format.
         logger.info(
             f"Summarization completed: "
             f"{success_count}/{total_docs} succeeded ✓ | "
-            f"{failed_count}/{total_docs} failed ✗"
+            f"{failed_count}/{total_docs} failed ✗ | "
+            f"LLM cache hits: {self.cache.hits}, misses: {self.cache.misses}"
         )
 
-        return documents_with_summaries
+        return summarized_documents
 
     async def __process_batch(
-            self, documents: list[Document], temperature: float, await_time_seconds: int
+            self, documents: list[Document], temperature: float
     ) -> list[Document]:
-        """Process a batch of documents with specified await time.
+        """Process a batch of documents.
+
+        Rate limits are handled per request by the scheduler, which retries only the
+        requests that failed.
 
         Args:
             documents: List of documents to summarize.
             temperature: Temperature for the summarization model.
-            await_time_seconds: Time to wait between requests.
         Returns:
             list[Document]: Processed documents with summaries.
         """
 
         semaphore = asyncio.Semaphore(self.max_concurrent_requests)
         tasks = [
-            self.__summarize(
-                document, semaphore, temperature, await_time_seconds=await_time_seconds
-            )
+            self.__summarize(document, semaphore, temperature)
             for document in documents
         ]
         results = []
@@ -167,7 +167,6 @@ Return the document in markdown format regardless of the original format.
             document: Document,
             semaphore: asyncio.Semaphore | None = None,
             temperature: float = 0.0,
-            await_time_seconds: int = 2,
     ) -> Document:
         """Generate a summary for a single document.
 
@@ -184,26 +183,35 @@ Return the document in markdown format regardless of the original format.
         
         async def process_document():
             try:
-                response = await acompletion(
-                    model=self.model_id,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": self.SYSTEM_PROMPT_TEMPLATE.format(
-                                characters=self.max_characters, content=document.content
-                            ),
-                        },
-                    ],
-                    stream=False,
-                    temperature=temperature
+                prompt = self.SYSTEM_PROMPT_TEMPLATE.format(
+                    characters=self.max_characters, content=document.content
+                )
+                messages = [
+                    {
+                        "role": "system",
+                        "content": prompt,
+                    },
+                ]
+                summary = await self.cache.get_or_request(
+                    self.model_id,
+                    messages,
+                    temperature=temperature,
+                    request=lambda: self.scheduler.submit(
+                        lambda: acompletion(
+                            model=self.model_id,
+                            messages=messages,
+                            stream=False,
+                            temperature=temperature
+                        ),
+                        estimated_tokens=utils.count_tokens(prompt, model_id=self.model_id)
+                        + self.max_characters // 3,
+                    ),
                 )
-                await asyncio.sleep(await_time_seconds)
 
-                if not response.choices:
+                if summary is None:
                     logger.warning(f"No summary generated for document {document.id}")
                     return document
                 
-                summary: str = response.choices[0].message.content
                 return document.add_summary(summary)
             
             except Exception as e:
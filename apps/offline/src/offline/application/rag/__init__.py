@@ -1,10 +1,18 @@
-from .embeddings import EmbeddingModelType, get_embedding_model
+from .embeddings import EmbeddingBatcher, EmbeddingModelType, get_embedding_model
+from .incremental import IncrementalIndex
+from .indexing import IndexingPipeline
+from .local import LocalHybridSearchRetriever, LocalVectorStore
 from .retrievers import get_retriever
 from .splitters import get_splitter
 
 __all__ = [
     "retrievers",
+    "EmbeddingBatcher",
     "EmbeddingModelType",
     "get_embedding_model",
     "get_splitter",
+    "LocalHybridSearchRetriever",
+    "LocalVectorStore",
+    "IncrementalIndex",
+    "IndexingPipeline",
 ]
\ No newline at end of file
@@ -1,26 +1,132 @@
-from typing import Literal, Union
+import hashlib
+from array import array
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Generic, Literal, TypeVar, Union
 
+import tiktoken
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_openai import OpenAIEmbeddings
 
+from offline.config import settings
+from offline.infrastructure.cache import SQLiteCache
+
 EmbeddingModelType = Literal["openai", "huggingface"]
-EmbeddingsModel = Union[OpenAIEmbeddings, HuggingFaceEmbeddings]
+
+T = TypeVar("T")
+
+class CachedEmbeddings(Embeddings):
+    """Embedding model wrapper that serves previously embedded texts from a cache.
+
+    Entries are content-addressed by the model id and the text, so re-embedding an
+    unchanged chunk (offline) or a repeated query (online) costs nothing. Vectors are
+    stored as float32 arrays. Attributes not defined here, such as `model`, are
+    forwarded to the wrapped embedding model.
+
+    Attributes:
+        embedding_model: The wrapped embedding model.
+        model_id: Identifier of the wrapped model, part of every cache key.
+        cache: The persistent cache storing the vectors.
+    """
+
+    def __init__(
+        self, embedding_model: Embeddings, model_id: str, cache: SQLiteCache
+    ) -> None:
+        self.embedding_model = embedding_model
+        self.model_id = model_id
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "embedding_model":
+            raise AttributeError(name)
+
+        return getattr(self.embedding_model, name)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed documents, only calling the wrapped model for uncached texts.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            list[list[float]]: One embedding per text, in the same order.
+        """
+
+        keys = [self.__key(text, "document") for text in texts]
+        vectors = {
+            key: self.__unpack(value) for key, value in self.cache.get_many(keys).items()
+        }
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            embeddings = self.embedding_model.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), embeddings))
+            self.cache.set_many(
+                {key: self.__pack(vector) for key, vector in new_vectors.items()}
+            )
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query, only calling the wrapped model if it is not cached.
+
+        Args:
+            text: The query to embed.
+
+        Returns:
+            list[float]: The query embedding.
+        """
+
+        key = self.__key(text, "query")
+        value = self.cache.get(key)
+        if value is not None:
+            return self.__unpack(value)
+
+        vector = self.embedding_model.embed_query(text)
+        self.cache.set(key, self.__pack(vector))
+
+        return vector
+
+    def __key(self, text: str, kind: str) -> str:
+        # Queries and documents are keyed separately, as some models embed them differently.
+        return hashlib.sha256(f"{self.model_id}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def __pack(vector: list[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def __unpack(value: bytes) -> list[float]:
+        vector = array("f")
+        vector.frombytes(value)
+
+        return vector.tolist()
+
+
+EmbeddingsModel = Union[OpenAIEmbeddings, HuggingFaceEmbeddings, CachedEmbeddings]
+
 
 def get_embedding_model(
     model_id: str,
     model_type: EmbeddingModelType = "huggingface",
     device: str = "cpu",
+    use_cache: bool = True,
 ) -> EmbeddingsModel:
     """Gets an instance of the configured embedding model.
 
     The function returns either an OpenAI or HuggingFace embedding model based on the
-    provided model type.
+    provided model type, wrapped in a persistent embedding cache unless disabled.
 
     Args:
         model_id (str): The ID/name of the embedding model to use
         model_type (EmbeddingModelType): The type of embedding model to use.
             Must be either "openai" or "huggingface". Defaults to "huggingface"
         device (str): The device to use for the embedding model. Defaults to "cpu"
+        use_cache (bool): Whether to cache embeddings on disk at
+            settings.EMBEDDING_CACHE_PATH. Defaults to True
 
     Returns:
         EmbeddingsModel: An embedding model instance based on the configuration settings
@@ -30,12 +136,37 @@ def get_embedding_model(
     """
 
     if model_type == "openai":
-        return get_openai_embedding_model(model_id)
+        embedding_model = get_openai_embedding_model(model_id)
     elif model_type == "huggingface":
-        return get_huggingface_embedding_model(model_id, device)
+        embedding_model = get_huggingface_embedding_model(model_id, device)
     else:
         raise ValueError(f"Invalid embedding model type: {model_type}")
 
+    if not use_cache or settings.EMBEDDING_CACHE_PATH is None:
+        return embedding_model
+
+    return CachedEmbeddings(
+        embedding_model,
+        model_id=f"{model_type}/{model_id}",
+        cache=get_embedding_cache(settings.EMBEDDING_CACHE_PATH),
+    )
+
+
+@lru_cache
+def get_embedding_cache(path: Path) -> SQLiteCache:
+    """Gets the process-wide embedding cache stored at the given path.
+
+    Args:
+        path (Path): Path of the SQLite file backing the cache
+
+    Returns:
+        SQLiteCache: The embedding cache, shared by every model of the process
+    """
+
+    return SQLiteCache(
+        path, max_size_bytes=settings.EMBEDDING_CACHE_MAX_SIZE_MB * 1024 * 1024
+    )
+
 def get_openai_embedding_model(model_id: str) -> OpenAIEmbeddings:
     """Gets an OpenAI embedding model instance.
 
@@ -71,3 +202,82 @@ def get_huggingface_embedding_model(
         encode_kwargs={"normalize_embeddings": False},
     )
 
+
+@dataclass
+class EmbeddingBatch(Generic[T]):
+    """A group of items whose texts are embedded in a single request.
+
+    Attributes:
+        items: The items (e.g. chunks) the texts belong to.
+        texts: The texts to embed, one per item.
+        num_tokens: Total number of tokens across all texts.
+    """
+
+    items: list[T] = field(default_factory=list)
+    texts: list[str] = field(default_factory=list)
+    num_tokens: int = 0
+
+
+class EmbeddingBatcher(Generic[T]):
+    """Accumulates texts across documents into token-budgeted embedding batches.
+
+    Instead of embedding whatever number of chunks a group of documents happens to
+    produce, texts are buffered until the next one would exceed the token budget or
+    the maximum batch size, which gives stable batch sizes and fewer round trips.
+
+    Attributes:
+        max_batch_tokens: Maximum number of tokens in a single batch. A text larger
+            than the budget is embedded in a batch of its own.
+        max_batch_size: Maximum number of texts in a single batch. Keep it below the
+            OpenAIEmbeddings chunk_size (1000) so a batch is sent as one request.
+    """
+
+    def __init__(
+        self,
+        max_batch_tokens: int = 50_000,
+        max_batch_size: int = 512,
+        encoding_name: str = "cl100k_base",
+    ) -> None:
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+        self.__batch: EmbeddingBatch[T] = EmbeddingBatch()
+
+    def add(self, item: T, text: str) -> EmbeddingBatch[T] | None:
+        """Buffer an item and return the previous batch if it is full.
+
+        Args:
+            item: The item the text belongs to.
+            text: The text to embed.
+
+        Returns:
+            EmbeddingBatch | None: The batch that was completed by adding this item,
+                or None if the item still fits in the current batch.
+        """
+
+        num_tokens = len(self.encoding.encode(text, disallowed_special=()))
+
+        full_batch = None
+        if self.__batch.items and (
+            self.__batch.num_tokens + num_tokens > self.max_batch_tokens
+            or len(self.__batch.items) >= self.max_batch_size
+        ):
+            full_batch = self.flush()
+
+        self.__batch.items.append(item)
+        self.__batch.texts.append(text)
+        self.__batch.num_tokens += num_tokens
+
+        return full_batch
+
+    def flush(self) -> EmbeddingBatch[T]:
+        """Return the current batch, even if it is not full, and start a new one.
+
+        Returns:
+            EmbeddingBatch: The buffered batch, possibly empty.
+        """
+
+        batch, self.__batch = self.__batch, EmbeddingBatch()
+
+        return batch
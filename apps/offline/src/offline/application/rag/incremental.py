@@ -0,0 +1,174 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from loguru import logger
+from pymongo.collection import Collection
+
+from offline.domain import Document
+
+
+@dataclass
+class IndexDiff:
+    """Difference between the source documents and what is already indexed.
+
+    Attributes:
+        new_ids: Ids of source documents that are not indexed yet.
+        changed_ids: Ids of indexed documents whose content changed.
+        removed_ids: Ids of indexed documents that are no longer in the source.
+        num_unchanged: Number of documents that are already up to date.
+    """
+
+    new_ids: set[str] = field(default_factory=set)
+    changed_ids: set[str] = field(default_factory=set)
+    removed_ids: set[str] = field(default_factory=set)
+    num_unchanged: int = 0
+
+
+class IncrementalIndex:
+    """Tracks which source documents a RAG collection was built from.
+
+    Every chunk (and parent document) written to the collection carries the id of its
+    source document and a content hash. The hash covers the document content, its
+    metadata and a fingerprint of the indexing configuration, so a change in any of
+    them marks the document as changed.
+
+    Attributes:
+        collection: The MongoDB collection holding the RAG chunks.
+        fingerprint: Fingerprint of the indexing configuration (embedding model, chunking, ...).
+        parent_id_key: Metadata key linking child chunks to their parent document in the
+            docstore, if the collection is populated by a parent document retriever.
+        id_field: Field holding the source document id.
+        hash_field: Field holding the content hash.
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        fingerprint: str,
+        parent_id_key: str | None = None,
+        id_field: str = "id",
+        hash_field: str = "content_hash",
+    ) -> None:
+        self.collection = collection
+        self.fingerprint = fingerprint
+        self.parent_id_key = parent_id_key
+        self.id_field = id_field
+        self.hash_field = hash_field
+
+    def content_hash(self, document: Document) -> str:
+        """Compute the hash stored next to every chunk of a document.
+
+        Args:
+            document: The source document.
+
+        Returns:
+            str: Hex digest of the configuration fingerprint, metadata and content.
+        """
+
+        hasher = hashlib.sha256()
+        hasher.update(self.fingerprint.encode("utf-8"))
+        hasher.update(document.metadata.model_dump_json().encode("utf-8"))
+        hasher.update(document.content.encode("utf-8"))
+
+        return hasher.hexdigest()
+
+    def get_indexed_hashes(self) -> dict[str, str]:
+        """Read the content hash of every indexed source document.
+
+        Returns:
+            dict[str, str]: Mapping of source document ids to their content hash.
+        """
+
+        cursor = self.collection.aggregate(
+            [
+                {"$match": {self.hash_field: {"$exists": True}}},
+                {
+                    "$group": {
+                        "_id": f"${self.id_field}",
+                        "hash": {"$first": f"${self.hash_field}"},
+                    }
+                },
+            ]
+        )
+
+        return {row["_id"]: row["hash"] for row in cursor}
+
+    def select(
+        self, documents: Iterable[Document], diff: IndexDiff, complete: bool = True
+    ) -> Iterator[Document]:
+        """Lazily yield the source documents that are new or changed.
+
+        The stale records of a changed document are deleted right before it is
+        yielded, so its new chunks never coexist with the old ones. Once the input is
+        exhausted, `diff.removed_ids` holds the indexed documents missing from it.
+
+        Args:
+            documents: The current source documents. They are consumed lazily.
+            diff: Filled with the outcome of the comparison while iterating.
+            complete: Whether `documents` holds the whole source. If False (e.g. the
+                source is read with a limit or a filter), indexed documents missing
+                from it may still exist, so `diff.removed_ids` is left empty.
+
+        Yields:
+            Document: Documents that have to be (re)indexed.
+        """
+
+        indexed_hashes = self.get_indexed_hashes()
+
+        source_ids = set()
+        for document in documents:
+            source_id = document.metadata.id
+            source_ids.add(source_id)
+
+            indexed_hash = indexed_hashes.get(source_id)
+            if indexed_hash == self.content_hash(document):
+                diff.num_unchanged += 1
+                continue
+
+            if indexed_hash is None:
+                diff.new_ids.add(source_id)
+            else:
+                diff.changed_ids.add(source_id)
+                self.delete({source_id})
+
+            yield document
+
+        if complete:
+            diff.removed_ids = set(indexed_hashes) - source_ids
+
+        logger.info(
+            f"Incremental index diff: {len(diff.new_ids)} new, "
+            f"{len(diff.changed_ids)} changed, {len(diff.removed_ids)} removed, "
+            f"{diff.num_unchanged} unchanged documents"
+        )
+
+    def delete(self, source_ids: set[str]) -> int:
+        """Delete every chunk and parent document built from the given source documents.
+
+        Args:
+            source_ids: Ids of the source documents to remove from the index.
+
+        Returns:
+            int: Number of deleted MongoDB documents.
+        """
+
+        if not source_ids:
+            return 0
+
+        query = {self.id_field: {"$in": list(source_ids)}}
+
+        deleted_count = 0
+        if self.parent_id_key:
+            parent_ids = self.collection.distinct(self.parent_id_key, query)
+            result = self.collection.delete_many({"_id": {"$in": parent_ids}})
+            deleted_count += result.deleted_count
+
+        result = self.collection.delete_many(query)
+        deleted_count += result.deleted_count
+
+        logger.debug(
+            f"Deleted {deleted_count} indexed records of {len(source_ids)} source documents."
+        )
+
+        return deleted_count
@@ -0,0 +1,346 @@
+import queue
+import threading
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, TypeVar
+from uuid import uuid4
+
+from langchain_core.documents import Document as LangChainDocument
+from langchain_mongodb.retrievers import MongoDBAtlasParentDocumentRetriever
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from loguru import logger
+from tqdm import tqdm
+
+from .embeddings import EmbeddingBatcher
+from .local import LocalVectorStore
+from .retrievers import RetrieverModel
+
+_SENTINEL = object()
+
+T = TypeVar("T")
+
+
+@dataclass
+class SplitDocument:
+    """Chunks produced from a single source document.
+
+    Attributes:
+        document_id: Id of the source document.
+        chunks: Chunks that have to be embedded and written to the vector store.
+        parents: (id, document) pairs written to the docstore of a parent document
+            retriever, keyed by the index of their last child in `chunks`.
+    """
+
+    document_id: str | None
+    chunks: list[LangChainDocument]
+    parents: dict[int, tuple[str, LangChainDocument]] = field(default_factory=dict)
+
+
+@dataclass
+class IndexingBatch:
+    """A batch of chunks embedded and written together by the write stage.
+
+    Attributes:
+        chunks: Chunks to embed and write to the vector store.
+        parents: Parent documents whose last child is in this batch, written to the
+            docstore once the chunks are written.
+        document_ids: Ids of the source documents whose last chunk is in this batch.
+    """
+
+    chunks: list[LangChainDocument]
+    parents: list[tuple[str, LangChainDocument]]
+    document_ids: list[str | None]
+
+
+@dataclass
+class IndexingStats:
+    """Counters collected while running the indexing pipeline.
+
+    A document counts as indexed only once all of its chunks are written. If any of
+    them fails to be split, embedded or written, its id is added to `failed_ids`,
+    even though some of its other chunks may already be written.
+    """
+
+    documents: int = 0
+    chunks: int = 0
+    failed_documents: int = 0
+    failed_chunks: int = 0
+    failed_ids: set[str] = field(default_factory=set, repr=False)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **counters: int) -> None:
+        with self.lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def fail(self, document_ids: Iterable[str | None], num_chunks: int = 0) -> None:
+        """Record documents that could not be fully indexed.
+
+        Args:
+            document_ids: Ids of the failed documents. Ids already failed are counted once.
+            num_chunks: Number of chunks that were not written.
+        """
+
+        with self.lock:
+            new_ids = set(document_ids) - self.failed_ids - {None}
+            self.failed_ids.update(new_ids)
+            self.failed_documents += len(new_ids)
+            self.failed_chunks += num_chunks
+
+
+class IndexingPipeline:
+    """Streams documents into the vector store through split → batch → write stages.
+
+    Each stage runs in its own thread(s) and is connected to the next one through a
+    bounded queue, so memory stays constant regardless of the corpus size and
+    splitting overlaps with embedding and writing.
+
+    Chunks are grouped into token-budgeted batches that span document boundaries,
+    and every batch is embedded and written with a single `add_documents` call of
+    the vector store, so the embedding model sees stable batch sizes regardless of
+    document length.
+
+    Attributes:
+        retriever: MongoDB Atlas retriever whose vector store (and docstore) is populated.
+        splitter: Text splitter used to chunk documents for non-parent retrievers.
+        batcher: Groups chunks into embedding batches. Defaults to a batcher with
+            its default token budget.
+        batch_size: Number of documents split by a splitting thread at a time.
+        max_workers: Number of splitting threads.
+        queue_size: Maximum number of items buffered between two stages.
+        id_key: Metadata key holding the id of the source document of a chunk.
+    """
+
+    def __init__(
+        self,
+        retriever: RetrieverModel,
+        splitter: RecursiveCharacterTextSplitter,
+        batcher: EmbeddingBatcher[LangChainDocument] | None = None,
+        batch_size: int = 4,
+        max_workers: int = 2,
+        queue_size: int = 8,
+        id_key: str = "id",
+    ) -> None:
+        assert batch_size > 0, "batch_size must be positive"
+
+        self.retriever = retriever
+        self.splitter = splitter
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.queue_size = max(queue_size, max_workers)
+        self.id_key = id_key
+
+        self.vectorstore = retriever.vectorstore
+        self.batcher = batcher or EmbeddingBatcher()
+
+    def run(
+        self, documents: Iterable[LangChainDocument], total: int | None = None
+    ) -> IndexingStats:
+        """Run all stages over the documents until the input is exhausted.
+
+        Args:
+            documents: Iterable of LangChain documents. It is consumed lazily.
+            total: Optional number of documents, used only for progress reporting.
+
+        Returns:
+            IndexingStats: Counters of processed and failed documents and chunks, and
+                the ids of the documents that were not fully indexed.
+        """
+
+        split_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        batch_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        write_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stats = IndexingStats()
+
+        with tqdm(total=total, desc="Processing documents", unit="doc") as pbar:
+            threads = [
+                threading.Thread(
+                    target=self.__split_stage,
+                    args=(split_queue, batch_queue, stats),
+                    name=f"indexing-split-{i}",
+                )
+                for i in range(self.max_workers)
+            ]
+            threads.append(
+                threading.Thread(
+                    target=self.__batch_stage,
+                    args=(batch_queue, write_queue),
+                    name="indexing-batch",
+                )
+            )
+            threads.append(
+                threading.Thread(
+                    target=self.__write_stage,
+                    args=(write_queue, stats, pbar),
+                    name="indexing-write",
+                )
+            )
+            for thread in threads:
+                thread.start()
+
+            try:
+                for document_batch in batched(documents, self.batch_size):
+                    split_queue.put(document_batch)
+            finally:
+                for _ in range(self.max_workers):
+                    split_queue.put(_SENTINEL)
+
+                for thread in threads:
+                    thread.join()
+
+        logger.info(
+            f"Indexed {stats.documents} documents into {stats.chunks} chunks. "
+            f"Failed documents: {stats.failed_documents}, failed chunks: {stats.failed_chunks}"
+        )
+
+        return stats
+
+    def __split_stage(
+        self, split_queue: queue.Queue, batch_queue: queue.Queue, stats: IndexingStats
+    ) -> None:
+        while True:
+            document_batch = split_queue.get()
+            if document_batch is _SENTINEL:
+                batch_queue.put(_SENTINEL)
+                return
+
+            for document in document_batch:
+                try:
+                    split_document = self.__split(document)
+                except Exception as e:
+                    logger.warning(
+                        f"Error splitting document '{document.metadata.get('title')}': {str(e)}"
+                    )
+                    stats.fail([document.metadata.get(self.id_key)])
+                    continue
+
+                batch_queue.put(split_document)
+
+    def __split(self, document: LangChainDocument) -> SplitDocument:
+        """Split a document the same way the retriever would when adding it.
+
+        Args:
+            document: The LangChain document to split.
+
+        Returns:
+            SplitDocument: The chunks to embed and, for parent document retrievers,
+                the parent documents to store.
+        """
+
+        document_id = document.metadata.get(self.id_key)
+        if not isinstance(self.retriever, MongoDBAtlasParentDocumentRetriever):
+            return SplitDocument(
+                document_id=document_id,
+                chunks=self.splitter.split_documents([document]),
+            )
+
+        chunks = []
+        parents = {}
+        for parent in self.retriever.parent_splitter.split_documents([document]):
+            parent_id = str(uuid4())
+            children = self.retriever.child_splitter.split_documents([parent])
+            if not children:
+                continue
+
+            for child in children:
+                child.metadata[self.retriever.id_key] = parent_id
+
+            chunks.extend(children)
+            parents[len(chunks) - 1] = (parent_id, parent)
+
+        return SplitDocument(document_id=document_id, chunks=chunks, parents=parents)
+
+    def __batch_stage(self, batch_queue: queue.Queue, write_queue: queue.Queue) -> None:
+        # Parents and documents completed by the chunks of the batch being filled.
+        parents: list[tuple[str, LangChainDocument]] = []
+        document_ids: list[str | None] = []
+        finished_workers = 0
+        while finished_workers < self.max_workers:
+            split_document = batch_queue.get()
+            if split_document is _SENTINEL:
+                finished_workers += 1
+                continue
+
+            for index, chunk in enumerate(split_document.chunks):
+                batch = self.batcher.add(chunk, chunk.page_content)
+                if batch is not None:
+                    write_queue.put(
+                        IndexingBatch(
+                            chunks=batch.items, parents=parents, document_ids=document_ids
+                        )
+                    )
+                    parents, document_ids = [], []
+
+                # A parent is written with the batch of its last child, so it is only
+                # written if all of its children are.
+                if index in split_document.parents:
+                    parents.append(split_document.parents[index])
+
+            document_ids.append(split_document.document_id)
+
+        write_queue.put(
+            IndexingBatch(
+                chunks=self.batcher.flush().items,
+                parents=parents,
+                document_ids=document_ids,
+            )
+        )
+        write_queue.put(_SENTINEL)
+
+    def __write_stage(
+        self, write_queue: queue.Queue, stats: IndexingStats, pbar: tqdm
+    ) -> None:
+        while True:
+            batch = write_queue.get()
+            if batch is _SENTINEL:
+                if isinstance(self.vectorstore, LocalVectorStore):
+                    self.vectorstore.flush()
+                return
+
+            try:
+                self.__write(batch)
+            except Exception as e:
+                logger.warning(
+                    f"Error embedding and writing batch of {len(batch.chunks)} chunks: {str(e)}"
+                )
+                # The parents of the batch are dropped with its chunks. Documents with
+                # chunks in the batch are only partly indexed, if at all.
+                stats.fail(
+                    [chunk.metadata.get(self.id_key) for chunk in batch.chunks]
+                    + batch.document_ids,
+                    num_chunks=len(batch.chunks),
+                )
+            else:
+                # Batches are written in order, so the earlier chunks of a completed
+                # document have already succeeded or failed.
+                num_documents = sum(
+                    document_id not in stats.failed_ids
+                    for document_id in batch.document_ids
+                )
+                stats.add(documents=num_documents, chunks=len(batch.chunks))
+
+            pbar.update(len(batch.document_ids))
+
+    def __write(self, batch: IndexingBatch) -> None:
+        if batch.chunks:
+            # A single embedding request per batch, as sized by the batcher.
+            self.vectorstore.add_documents(batch.chunks, batch_size=len(batch.chunks))
+
+        if batch.parents:
+            self.retriever.docstore.mset(batch.parents)
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Lazily group the items of an iterable into lists of `size` items.
+
+    Args:
+        iterable: The items to group.
+        size: Number of items per list. The last list may be shorter.
+
+    Yields:
+        list[T]: The next group of items.
+    """
+
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
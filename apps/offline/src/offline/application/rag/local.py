@@ -0,0 +1,274 @@
+from pathlib import Path
+from typing import Any, Iterable
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document as LangChainDocument
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from loguru import logger
+
+from offline.infrastructure.local import BM25Index, LocalVectorIndex
+from offline.infrastructure.local.bm25 import reciprocal_rank_fusion
+
+
+class LocalVectorStore(VectorStore):
+    """LangChain vector store backed by a memory-mapped `LocalVectorIndex`.
+
+    Queries are answered in-process with a NumPy top-k search, without MongoDB. The
+    search is exact unless an IVF index was built over the vectors, in which case the
+    `nprobe` search kwarg tunes its recall. Documents are stored with their text under
+    `text_key`, like the MongoDB Atlas vector stores, so the same chunks can be
+    indexed in both.
+
+    With a `fulltext_index`, the chunk texts are also indexed with BM25 as they are
+    added, which enables `fulltext_search_with_score` and `hybrid_search_with_score`.
+
+    Attributes:
+        index: The on-disk vector index.
+        text_key: Key of the chunk text in the stored records.
+        fulltext_index: Optional BM25 index over the same rows.
+    """
+
+    def __init__(
+        self,
+        index: LocalVectorIndex,
+        embedding: Embeddings,
+        text_key: str = "chunk",
+        fulltext_index: BM25Index | None = None,
+    ) -> None:
+        self.index = index
+        self.text_key = text_key
+        self.fulltext_index = fulltext_index
+        self._embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        embeddings = self._embedding.embed_documents(texts)
+
+        return self.add_embeddings(texts, embeddings, metadatas)
+
+    def add_embeddings(
+        self,
+        texts: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict] | None = None,
+    ) -> list[str]:
+        """Add already embedded texts to the index.
+
+        Args:
+            texts: The texts of the chunks.
+            embeddings: One embedding per text.
+            metadatas: Optional metadata of each text.
+
+        Returns:
+            list[str]: The row ids of the added texts.
+        """
+
+        metadatas = metadatas or [{} for _ in texts]
+        first_row = self.index.count
+        self.index.add(
+            embeddings,
+            [
+                {self.text_key: text, **metadata}
+                for text, metadata in zip(texts, metadatas)
+            ],
+        )
+        if self.fulltext_index is not None:
+            self.fulltext_index.add(first_row, texts)
+
+        return [str(first_row + i) for i in range(len(texts))]
+
+    def flush(self) -> None:
+        """Persist the full-text postings accumulated while adding texts."""
+
+        if self.fulltext_index is not None:
+            self.fulltext_index.save()
+
+    def clear(self) -> None:
+        self.index.clear()
+        # Also drop a full-text index left by a previous build, so it never gets out
+        # of sync with the vector rows.
+        (self.fulltext_index or BM25Index(self.index.directory)).clear()
+
+    def similarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[LangChainDocument]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[LangChainDocument, float]]:
+        embedding = self._embedding.embed_query(query)
+
+        return self.similarity_search_by_vector_with_score(embedding, k, **kwargs)
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, **kwargs: Any
+    ) -> list[LangChainDocument]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_by_vector_with_score(
+                embedding, k, **kwargs
+            )
+        ]
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: list[float], k: int = 4, **kwargs: Any
+    ) -> list[tuple[LangChainDocument, float]]:
+        results = self.index.search(
+            embedding,
+            k,
+            nprobe=kwargs.get("nprobe"),
+            exact=kwargs.get("exact", False),
+        )
+
+        return self._to_documents(results)
+
+    def fulltext_search_with_score(
+        self, query: str, k: int = 4
+    ) -> list[tuple[LangChainDocument, float]]:
+        """Search the chunk texts with BM25.
+
+        Args:
+            query: The query text.
+            k: Number of results.
+
+        Returns:
+            list[tuple[LangChainDocument, float]]: The documents with their BM25 score.
+        """
+
+        return self._to_documents(self.__fulltext_search(query, k))
+
+    def hybrid_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        vector_penalty: float = 60.0,
+        fulltext_penalty: float = 60.0,
+        **kwargs: Any,
+    ) -> list[tuple[LangChainDocument, float]]:
+        """Fuse the vector and BM25 results with reciprocal rank fusion.
+
+        Args:
+            query: The query text.
+            k: Number of results retrieved from each search and returned.
+            vector_penalty: Rank penalty of the vector search results.
+            fulltext_penalty: Rank penalty of the full-text search results.
+            **kwargs: Additional kwargs of the vector search, e.g. `nprobe`.
+
+        Returns:
+            list[tuple[LangChainDocument, float]]: The documents with their fused score.
+        """
+
+        embedding = self._embedding.embed_query(query)
+        vector_results = self.index.search(
+            embedding,
+            k,
+            nprobe=kwargs.get("nprobe"),
+            exact=kwargs.get("exact", False),
+        )
+        fulltext_results = self.__fulltext_search(query, k)
+
+        results = reciprocal_rank_fusion(
+            [(vector_results, vector_penalty), (fulltext_results, fulltext_penalty)]
+        )
+
+        return self._to_documents(results[:k])
+
+    def __fulltext_search(self, query: str, k: int) -> list[tuple[int, float]]:
+        assert self.fulltext_index is not None, (
+            "The vector store was created without a full-text index"
+        )
+
+        if self.fulltext_index.count != self.index.count:
+            logger.warning(
+                f"Full-text index has {self.fulltext_index.count} rows but the vector "
+                f"index has {self.index.count}. Skipping full-text search."
+            )
+            return []
+
+        return self.fulltext_index.search(query, k)
+
+    def _to_documents(
+        self, results: list[tuple[int, float]]
+    ) -> list[tuple[LangChainDocument, float]]:
+        records = self.index.get_records([row for row, _ in results])
+
+        documents = []
+        for (_, score), record in zip(results, records):
+            text = record.pop(self.text_key, "")
+            documents.append(
+                (LangChainDocument(page_content=text, metadata=record), score)
+            )
+
+        return documents
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1].
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        directory: Path | None = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        assert directory is not None, "directory is required to create a local vector store"
+
+        vectorstore = cls(LocalVectorIndex(directory), embedding, **kwargs)
+        vectorstore.add_texts(texts, metadatas)
+
+        return vectorstore
+
+
+class LocalHybridSearchRetriever(BaseRetriever):
+    """Hybrid search retriever over a `LocalVectorStore` with a full-text index.
+
+    Local counterpart of `MongoDBAtlasHybridSearchRetriever`: the vector and BM25
+    results are fused in-process with reciprocal rank fusion, using the same penalty
+    knobs, so hybrid search does not require Atlas Search.
+
+    Attributes:
+        vectorstore: The local vector store, created with a full-text index.
+        top_k: Number of documents retrieved from each search and returned.
+        vector_penalty: Rank penalty of the vector search results.
+        fulltext_penalty: Rank penalty of the full-text search results.
+        vector_search_kwargs: Additional kwargs of the vector search, e.g. `nprobe`.
+    """
+
+    vectorstore: LocalVectorStore
+    top_k: int = 4
+    vector_penalty: float = 60.0
+    fulltext_penalty: float = 60.0
+    vector_search_kwargs: dict[str, Any] = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[LangChainDocument]:
+        results = self.vectorstore.hybrid_search_with_score(
+            query,
+            k=self.top_k,
+            vector_penalty=self.vector_penalty,
+            fulltext_penalty=self.fulltext_penalty,
+            **self.vector_search_kwargs,
+        )
+
+        documents = []
+        for document, score in results:
+            document.metadata["score"] = score
+            documents.append(document)
+
+        return documents
@@ -1,22 +1,31 @@
 from typing import Literal, Union
 
+from langchain_core.vectorstores import VectorStoreRetriever
 from langchain_mongodb import MongoDBAtlasVectorSearch
-
+from langchain_mongodb.docstores import MongoDBDocStore
 from langchain_mongodb.retrievers import (
     MongoDBAtlasHybridSearchRetriever,
     MongoDBAtlasParentDocumentRetriever,
 )
 from loguru import logger
+from pymongo.collection import Collection
 
 from offline.config import settings
+from offline.infrastructure.local import BM25Index, LocalVectorIndex
+from offline.infrastructure.mongo import get_mongo_client
 
 from .embeddings import EmbeddingModelType, EmbeddingsModel, get_embedding_model
+from .local import LocalHybridSearchRetriever, LocalVectorStore
 from .splitters import get_splitter
 
-RetrieverType = Literal["contextual", "parent"]
+RetrieverType = Literal["contextual", "parent", "local", "local_hybrid"]
 RetrieverModel = Union[
-    MongoDBAtlasHybridSearchRetriever, MongoDBAtlasParentDocumentRetriever
+    MongoDBAtlasHybridSearchRetriever,
+    MongoDBAtlasParentDocumentRetriever,
+    VectorStoreRetriever,
+    LocalHybridSearchRetriever,
 ]
+LOCAL_RETRIEVER_TYPES = ("local", "local_hybrid")
 
 def get_retriever(
     embedding_model_id: str,
@@ -38,16 +47,19 @@ def get_retriever(
         return get_hybrid_search_retriever(embedding_model, k)
     elif retriever_type == "parent":
         return get_parent_document_retriever(embedding_model, k)
+    elif retriever_type == "local":
+        return get_local_retriever(embedding_model, k)
+    elif retriever_type == "local_hybrid":
+        return get_local_hybrid_search_retriever(embedding_model, k)
     else:
         raise ValueError(f"Invalid retriever type: {retriever_type}")
     
 def get_hybrid_search_retriever(
     embedding_model = EmbeddingsModel, k: int = 3,
 ) -> MongoDBAtlasHybridSearchRetriever:
-    vectorstore = MongoDBAtlasVectorSearch.from_connection_string(
-        connection_string=settings.MONGODB_URI,
+    vectorstore = MongoDBAtlasVectorSearch(
+        collection=get_rag_collection(),
         embedding=embedding_model,
-        namespace=f"{settings.MONGODB_DATABASE_NAME}.rag",
         text_key="chunk",
         embedding_key="embedding",
         relevance_score_fn="dotProduct",
@@ -66,15 +78,93 @@ def get_hybrid_search_retriever(
 def get_parent_document_retriever(
         embedding_model: EmbeddingsModel, k: int = 3
 ) -> MongoDBAtlasParentDocumentRetriever:
-    retriever = MongoDBAtlasParentDocumentRetriever.from_connection_string(
-        connection_string=settings.MONGODB_URI,
-        embedding_model=embedding_model,
+    collection = get_rag_collection()
+    vectorstore = MongoDBAtlasVectorSearch(
+        collection=collection,
+        embedding=embedding_model,
+        text_key="page_content",
+    )
+    # The index on the retriever's `id_key` is created with the search indexes, by
+    # MongoDBIndex.create, instead of on every call.
+    docstore = MongoDBDocStore(collection=collection, text_key="page_content")
+
+    retriever = MongoDBAtlasParentDocumentRetriever(
+        vectorstore=vectorstore,
+        docstore=docstore,
         child_splitter=get_splitter(200),
         parent_splitter=get_splitter(800),
-        database_name=settings.MONGODB_DATABASE_NAME,
-        collection_name="rag",
-        text_key="page_content",
         search_kwargs={"k": k},
     )
 
-    return retriever
\ No newline at end of file
+    return retriever
+
+def get_local_retriever(
+    embedding_model: EmbeddingsModel, k: int = 3
+) -> VectorStoreRetriever:
+    """Get a retriever searching the local vector index in-process.
+
+    If an IVF index was built over the vectors, the search is approximate and
+    `settings.LOCAL_VECTOR_INDEX_NPROBE` sets its recall/latency trade-off.
+
+    Args:
+        embedding_model: The model used to embed the queries.
+        k: Number of documents to retrieve.
+
+    Returns:
+        VectorStoreRetriever: Retriever over the index at `settings.LOCAL_VECTOR_INDEX_DIR`.
+    """
+
+    vectorstore = LocalVectorStore(
+        index=LocalVectorIndex(settings.LOCAL_VECTOR_INDEX_DIR),
+        embedding=embedding_model,
+        text_key="chunk",
+    )
+
+    return vectorstore.as_retriever(
+        search_kwargs={"k": k, "nprobe": settings.LOCAL_VECTOR_INDEX_NPROBE}
+    )
+
+def get_local_hybrid_search_retriever(
+    embedding_model: EmbeddingsModel, k: int = 3
+) -> LocalHybridSearchRetriever:
+    """Get a hybrid search retriever over the local vector and BM25 indexes.
+
+    The in-process counterpart of `get_hybrid_search_retriever`, with the same
+    reciprocal rank fusion penalties, that does not require Atlas Search.
+
+    Args:
+        embedding_model: The model used to embed the queries.
+        k: Number of documents to retrieve.
+
+    Returns:
+        LocalHybridSearchRetriever: Retriever over the indexes at `settings.LOCAL_VECTOR_INDEX_DIR`.
+    """
+
+    vectorstore = LocalVectorStore(
+        index=LocalVectorIndex(settings.LOCAL_VECTOR_INDEX_DIR),
+        embedding=embedding_model,
+        text_key="chunk",
+        fulltext_index=BM25Index(settings.LOCAL_VECTOR_INDEX_DIR),
+    )
+
+    return LocalHybridSearchRetriever(
+        vectorstore=vectorstore,
+        top_k=k,
+        vector_penalty=50,
+        fulltext_penalty=50,
+        vector_search_kwargs={"nprobe": settings.LOCAL_VECTOR_INDEX_NPROBE},
+    )
+
+def get_rag_collection() -> Collection:
+    """Get the RAG collection through the process-wide MongoDB client.
+
+    Building the vector stores on top of the shared client, instead of letting
+    LangChain open a new one per retriever, keeps a single connection pool per process.
+
+    Returns:
+        Collection: The MongoDB collection holding the RAG chunks.
+    """
+
+    client = get_mongo_client(settings.MONGODB_URI, appname="offline")
+
+    return client[settings.MONGODB_DATABASE_NAME]["rag"]
@@ -45,7 +45,7 @@ def get_splitter(
         handler = SimpleSummarizationAgent(**kwargs)
 
     
-    return HandlerRecursiveCharacterTextSplitter.from_tikoken_encoder(
+    return HandlerRecursiveCharacterTextSplitter.from_tiktoken_encoder(
         encoding_name="cl100k_base",
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
@@ -74,7 +74,7 @@ class HandlerRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
             **kwargs: Additional keyword arguments passed to RecursiveCharacterTextSplitter.
         """
 
-        super().__init__()(*args, **kwargs)
+        super().__init__(*args, **kwargs)
 
         self.handler = handler if handler is not None else lambda _, x: x
 
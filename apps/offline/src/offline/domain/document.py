@@ -55,6 +55,21 @@ class Document(BaseModel):
         json_data = file_path.read_text(encoding="utf-8")
 
         return cls.model_validate_json(json_data)
+
+    @classmethod
+    def from_files(cls, file_paths: list[Path]) -> list["Document"]:
+        """Read several Document objects from JSON files.
+
+        Used as the unit of work when loading documents with a process pool.
+
+        Args:
+            file_paths: Paths to the JSON files containing document data.
+
+        Returns:
+            list[Document]: The documents, in the same order as the files.
+        """
+
+        return [cls.from_file(file_path) for file_path in file_paths]
     
     def add_summary(self, summary: str) -> "Document":
         self.summary = summary
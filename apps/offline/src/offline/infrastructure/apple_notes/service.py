@@ -1,31 +1,69 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
-from typing import Generic, Type, TypeVar
+from typing import Generic, Iterator, Type, TypeVar
 import sqlite3
 
 from loguru import logger
 from pydantic import BaseModel
 from markdownify import markdownify
 
-from offline.domain import Document
+from offline.infrastructure.sync_state import Watermark
 
 T = TypeVar("T", bound=BaseModel)
 
+MAX_DOCUMENT_SIZE = 16_000_000  # Just under MongoDB's 16MB limit.
+
+
 class AppleNotesDBService(Generic[T]):
     """Client for interacting with Apple Notes
+
+    Notes are streamed from the SQLite database in batches of `batch_size` rows, and
+    their HTML bodies are converted to markdown in parallel by a pool of
+    `max_workers` processes, so only one batch of notes is held in memory at a time.
+    The database is opened read-only. If `immutable` is True, it is also read without
+    locking and ignoring its write-ahead log, which is faster but returns wrong results
+    if anything writes to the database, so it must only be used on a frozen copy.
+
+    Attributes:
+        model: The Pydantic model the notes are parsed into.
+        notes_db_path: Path of the Apple Notes SQLite database.
+        batch_size: Number of notes fetched and converted at a time.
+        max_workers: Number of processes converting the notes to markdown.
+        num_fetched: Number of notes fetched by the last extraction.
+        num_filtered: Number of notes filtered out by the last extraction, as too large.
+        watermark: Latest `updated` value of the rows scanned by the last extraction,
+            including the notes filtered out as too large, so they are not read again
+            by the next incremental extraction.
     """
 
     def __init__(
         self,
         model: Type[T],
-        notes_db_path: Path
+        notes_db_path: Path,
+        batch_size: int = 256,
+        max_workers: int | None = None,
+        immutable: bool = False,
     ) -> None:
+        assert batch_size > 0, "batch_size must be positive"
+
         self.model = model
         self.notes_db_path = notes_db_path
+        self.batch_size = batch_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        self.num_fetched = 0
+        self.num_filtered = 0
+        self.watermark: Watermark | None = None
 
+        uri = f"{Path(notes_db_path).resolve().as_uri()}?mode=ro"
+        if immutable:
+            uri += "&immutable=1"
         try:
-            self.conn = sqlite3.connect(self.notes_db_path)
+            self.conn = sqlite3.connect(uri, uri=True)
         except Exception as e:
             logger.error(f"Failed to initialize AppleNotesDBService {e}")
+            raise
 
         logger.info(
             f"Connected to Apple Notes DB instance:\n notes_db_path: {notes_db_path}"
@@ -50,64 +88,121 @@ class AppleNotesDBService(Generic[T]):
         """
 
         self.close()
-    
-    def fetch_documents(self) -> Document:
-        """Extract content from a Apple Notes database
+
+    def fetch_documents(
+        self, updated_after: Watermark | None = None
+    ) -> Iterator[list[T]]:
+        """Extract content from a Apple Notes database, one batch at a time.
+
+        `num_fetched`, `num_filtered` and `watermark` describe the whole extraction once
+        every batch is consumed.
+
+        Args:
+            updated_after: Optional watermark. If set, only the notes updated after it
+                are extracted.
+
+        Yields:
+            list[T]: The notes of each batch of `batch_size` rows, without the ones over
+                MongoDB's size limit.
         """
 
+        self.num_fetched = 0
+        self.num_filtered = 0
+        self.watermark = updated_after
+
+        query = "SELECT id, title, body, created, updated FROM notes"
+        params: tuple = ()
+        if updated_after is not None:
+            query += " WHERE updated > ?"
+            params = (updated_after,)
+
         try:
-            query = "SELECT id, title, body, created, updated FROM notes"
             cursor = self.conn.cursor()
-            cursor.execute(query)
-            documents = list(cursor.fetchall())
-            logger.debug(f"Fetched {len(documents)} documents with query: {query}")
-            return self.__parse_documents(documents)
+            cursor.execute(query, params)
         except Exception as e:
             logger.error(f"Error fetching documents: {e}")
             raise
 
-    def __parse_documents(self, documents: list[dict]) -> list[T]:
-        """Convert Apple Notes documents to Pydantic model instances.
+        executor = (
+            ProcessPoolExecutor(max_workers=self.max_workers)
+            if self.max_workers > 1
+            else None
+        )
+        try:
+            while rows := cursor.fetchmany(self.batch_size):
+                self.num_fetched += len(rows)
+                yield self.__parse_documents(rows, executor)
+
+                logger.debug(f"Fetched {self.num_fetched} documents with query: {query}")
+        finally:
+            cursor.close()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        logger.info(f"Total documents from Apple Notes: {self.num_fetched}")
+        logger.info(
+            f"Documents kept (under size limit): {self.num_fetched - self.num_filtered}"
+        )
+        logger.info(f"Documents filtered (over size limit): {self.num_filtered}")
+
+    def iter_documents(self, updated_after: Watermark | None = None) -> Iterator[T]:
+        """Stream the notes of the Apple Notes database.
+
+        Args:
+            updated_after: Optional watermark. If set, only the notes updated after it
+                are extracted.
+
+        Yields:
+            T: The extracted notes, without the ones over MongoDB's size limit.
+        """
+
+        for documents in self.fetch_documents(updated_after=updated_after):
+            yield from documents
+
+    def __parse_documents(
+        self, rows: list[tuple], executor: Executor | None
+    ) -> list[T]:
+        """Convert a batch of Apple Notes rows to Pydantic model instances.
         Filter out documents that exceed MongoDB's 16MB limit.
         """
-        
-        parsed_documents = []
-        filtered_count = 0
-        MAX_SIZE = 16000000  # Just under 16MB
-        
-        for doc in documents:
+
+        bodies = [row[2] or "" for row in rows]
+        if executor is not None:
+            chunksize = max(1, len(bodies) // (self.max_workers * 4))
+            contents = executor.map(markdownify, bodies, chunksize=chunksize)
+        else:
+            contents = map(markdownify, bodies)
+
+        documents = []
+        for row, content in zip(rows, contents):
+            note_id, title, _, created, updated = row
+            if updated is not None and (self.watermark is None or updated > self.watermark):
+                self.watermark = updated
+
+            doc_size = len(content.encode("utf-8")) + len((title or "").encode("utf-8"))
+            if doc_size > MAX_DOCUMENT_SIZE:
+                self.num_filtered += 1
+                logger.warning(f"Filtering out document with title '{title}' due to size ({doc_size} bytes)")
+                continue
+
             note_to_doc = {
-                "id": doc[0].split('/')[-1],
-                "content": markdownify(doc[2]),
+                "id": note_id.split('/')[-1],
+                "content": content,
                 "metadata": {
-                    "id": doc[0],
+                    "id": note_id,
                     "url": None,
-                    "title": doc[1],
+                    "title": title,
                     "properties": {
-                        "created": doc[3],
-                        "updated": doc[4]
+                        "created": created,
+                        "updated": updated
                     }
                 }
             }
-            
-            doc_size = len(str(note_to_doc))
-            if doc_size > MAX_SIZE:
-                filtered_count += 1
-                logger.warning(f"Filtering out document with title '{doc[1]}' due to size ({doc_size} bytes)")
-                continue
-                
-            parsed_doc = self.model.model_validate(note_to_doc)
-            parsed_documents.append(parsed_doc)
-
-        total_documents = len(documents)
-        kept_documents = len(parsed_documents)
-        
-        logger.info(f"Total documents from Apple Notes: {total_documents}")
-        logger.info(f"Documents kept (under size limit): {kept_documents}")
-        logger.info(f"Documents filtered (over size limit): {filtered_count}")
-
-        return parsed_documents
-        
+
+            documents.append(self.model.model_validate(note_to_doc))
+
+        return documents
+
     def close(self) -> None:
         """Close the AppleNotes connection.
 
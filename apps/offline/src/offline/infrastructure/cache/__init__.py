@@ -0,0 +1,5 @@
+from .sqlite import SQLiteCache
+
+__all__ = [
+    "SQLiteCache",
+]
\ No newline at end of file
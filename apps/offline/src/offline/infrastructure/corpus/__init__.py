@@ -0,0 +1,13 @@
+from .packed import (
+    PackedCorpusReader,
+    PackedCorpusWriter,
+    is_packed_corpus,
+    read_shard,
+)
+
+__all__ = [
+    "PackedCorpusReader",
+    "PackedCorpusWriter",
+    "is_packed_corpus",
+    "read_shard",
+]
\ No newline at end of file
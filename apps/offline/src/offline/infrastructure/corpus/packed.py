@@ -0,0 +1,320 @@
+import gzip
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Generic, Iterator, Type, TypeVar
+
+from loguru import logger
+from pydantic import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+INDEX_FILE_NAME = "corpus.idx"
+SUPERSEDED_FILE_NAME = "corpus.superseded"
+INDEX_HEADER = "# packed-corpus v2 jsonl.gz"
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """Location of a single record within the shards of a packed corpus.
+
+    Attributes:
+        shard: File name of the shard holding the record.
+        offset: Byte offset of the compressed block holding the record within the shard.
+        length: Byte length of the compressed block.
+        position: Line of the record within the decompressed block.
+    """
+
+    shard: str
+    offset: int
+    length: int
+    position: int
+
+
+def is_packed_corpus(directory: Path) -> bool:
+    """Check whether a directory holds a packed corpus.
+
+    Args:
+        directory: The directory to check.
+
+    Returns:
+        bool: True if the directory contains a packed corpus index.
+    """
+
+    return (directory / INDEX_FILE_NAME).is_file()
+
+
+class PackedCorpusWriter(Generic[T]):
+    """Writes pydantic records into a packed corpus of gzip-compressed JSONL shards.
+
+    Records are compressed in blocks of `records_per_block` records, each block as its
+    own gzip member, so a shard is still a regular `.jsonl.gz` file that can be
+    decompressed and read sequentially, while the id → (shard, block offset, block
+    length, position in block) index written next to the shards gives random access
+    to any record by decompressing a single block. The index does not use the `.json`
+    extension, so packed corpora are not mistaken for a directory of JSON documents.
+
+    If an id is written more than once, the index points to its last record, and the
+    earlier ones are listed in a superseded file, so reading the shards sequentially
+    skips them too.
+
+    Attributes:
+        directory: Directory the shards and index are written to.
+        records_per_shard: Maximum number of records per shard.
+        records_per_block: Maximum number of records compressed together. Larger
+            blocks compress better but make random access decompress more records.
+        id_field: Field of the records used as key of the index.
+        compresslevel: gzip compression level.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        records_per_shard: int = 10_000,
+        records_per_block: int = 64,
+        id_field: str = "id",
+        compresslevel: int = 6,
+    ) -> None:
+        assert records_per_block > 0, "records_per_block must be positive"
+
+        self.directory = Path(directory)
+        self.records_per_shard = records_per_shard
+        self.records_per_block = records_per_block
+        self.id_field = id_field
+        self.compresslevel = compresslevel
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.__index: dict[str, IndexEntry] = {}
+        # (shard, line within the shard) of the last record written for every id.
+        self.__locations: dict[str, tuple[str, int]] = {}
+        self.__superseded: list[tuple[str, int]] = []
+        self.__block: list[bytes] = []
+        self.__block_ids: list[str] = []
+        self.__shard_file = None
+        self.__shard_name = ""
+        self.__shard_records = 0
+        self.__num_shards = 0
+
+    def __enter__(self) -> "PackedCorpusWriter[T]":
+        """Enable context manager support.
+
+        Returns:
+            PackedCorpusWriter: The current instance.
+        """
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Flush the last shard and write the index when exiting context.
+
+        Args:
+            exc_type: Type of exception that occurred, if any.
+            exc_val: Exception instance that occurred, if any.
+            exc_tb: Traceback of exception that occurred, if any.
+        """
+
+        self.close()
+
+    def write(self, record: T) -> None:
+        """Append a record to the current block, compressing it once it is full.
+
+        Args:
+            record: The record to write. If an id is written twice, only the last
+                record is indexed and read back.
+        """
+
+        if self.__shard_file is None or self.__shard_records >= self.records_per_shard:
+            self.__open_shard()
+
+        record_id = str(getattr(record, self.id_field))
+        previous_location = self.__locations.get(record_id)
+        if previous_location is not None:
+            self.__superseded.append(previous_location)
+        self.__locations[record_id] = (self.__shard_name, self.__shard_records)
+
+        self.__block.append((record.model_dump_json() + "\n").encode("utf-8"))
+        self.__block_ids.append(record_id)
+        self.__shard_records += 1
+
+        if len(self.__block) >= self.records_per_block:
+            self.__flush_block()
+
+    def close(self) -> None:
+        """Close the current shard and write the index."""
+
+        if self.__shard_file is not None:
+            self.__flush_block()
+            self.__shard_file.close()
+            self.__shard_file = None
+
+        with open(self.directory / INDEX_FILE_NAME, "w", encoding="utf-8") as f:
+            f.write(f"{INDEX_HEADER}\n")
+            for record_id, entry in self.__index.items():
+                f.write(
+                    f"{record_id}\t{entry.shard}\t{entry.offset}\t{entry.length}\t{entry.position}\n"
+                )
+
+        with open(self.directory / SUPERSEDED_FILE_NAME, "w", encoding="utf-8") as f:
+            for shard, line_number in self.__superseded:
+                f.write(f"{shard}\t{line_number}\n")
+
+        logger.debug(
+            f"Wrote packed corpus with {len(self.__index)} records in {self.__num_shards} shards to '{self.directory}'"
+        )
+        if self.__superseded:
+            logger.debug(
+                f"{len(self.__superseded)} records are superseded by a later record with the same id."
+            )
+
+    def __flush_block(self) -> None:
+        if not self.__block:
+            return
+
+        data = gzip.compress(b"".join(self.__block), compresslevel=self.compresslevel)
+        offset = self.__shard_file.tell()
+        self.__shard_file.write(data)
+
+        for position, record_id in enumerate(self.__block_ids):
+            self.__index[record_id] = IndexEntry(
+                shard=self.__shard_name, offset=offset, length=len(data), position=position
+            )
+
+        self.__block, self.__block_ids = [], []
+
+    def __open_shard(self) -> None:
+        if self.__shard_file is not None:
+            self.__flush_block()
+            self.__shard_file.close()
+
+        self.__shard_name = f"shard-{self.__num_shards:05d}.jsonl.gz"
+        self.__shard_file = open(self.directory / self.__shard_name, "wb")
+        self.__shard_records = 0
+        self.__num_shards += 1
+
+
+class PackedCorpusReader(Generic[T]):
+    """Reads the records of a packed corpus written by `PackedCorpusWriter`.
+
+    Attributes:
+        directory: Directory holding the shards and index.
+        model: The pydantic model records are validated into.
+    """
+
+    def __init__(self, directory: Path, model: Type[T]) -> None:
+        self.directory = Path(directory)
+        self.model = model
+        self.__index = self.__read_index()
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self.__index
+
+    @property
+    def ids(self) -> list[str]:
+        return list(self.__index)
+
+    @property
+    def shards(self) -> list[Path]:
+        # Shard names are zero-padded, so sorting them gives the order they were written in.
+        shard_names = sorted({entry.shard for entry in self.__index.values()})
+
+        return [self.directory / shard_name for shard_name in shard_names]
+
+    def get(self, record_id: str) -> T | None:
+        """Read a single record by id with one seek, read and block decompression.
+
+        Args:
+            record_id: Id of the record.
+
+        Returns:
+            T | None: The record, or None if it is not in the corpus.
+        """
+
+        entry = self.__index.get(record_id)
+        if entry is None:
+            return None
+
+        with open(self.directory / entry.shard, "rb") as f:
+            f.seek(entry.offset)
+            data = f.read(entry.length)
+
+        line = gzip.decompress(data).split(b"\n")[entry.position]
+
+        return self.model.model_validate_json(line)
+
+    def __iter__(self) -> Iterator[T]:
+        """Iterate over every indexed record, reading the shards sequentially."""
+
+        for shard in self.shards:
+            yield from read_shard(shard, self.model)
+
+    def __read_index(self) -> dict[str, IndexEntry]:
+        index_path = self.directory / INDEX_FILE_NAME
+        if not index_path.is_file():
+            raise FileNotFoundError(f"Packed corpus index not found: '{index_path}'")
+
+        index = {}
+        with open(index_path, encoding="utf-8") as f:
+            header = f.readline().rstrip("\n")
+            if header != INDEX_HEADER:
+                raise ValueError(f"Unsupported packed corpus format: '{header}'")
+
+            for line in f:
+                record_id, shard, offset, length, position = line.rstrip("\n").split("\t")
+                index[record_id] = IndexEntry(
+                    shard=shard,
+                    offset=int(offset),
+                    length=int(length),
+                    position=int(position),
+                )
+
+        return index
+
+
+def read_shard(shard_path: Path, model: Type[T]) -> list[T]:
+    """Read every record of a single shard, skipping superseded records.
+
+    Used as the unit of work when loading packed corpora with a process pool. Records
+    superseded by a later record with the same id, in this shard or another, are
+    skipped, so every id is read once, as in the index.
+
+    Args:
+        shard_path: Path of the `.jsonl.gz` shard.
+        model: The pydantic model records are validated into.
+
+    Returns:
+        list[T]: The records of the shard, in the order they were written.
+    """
+
+    superseded = read_superseded(shard_path.parent).get(shard_path.name, set())
+    with gzip.open(shard_path, "rt", encoding="utf-8") as f:
+        return [
+            model.model_validate_json(line)
+            for line_number, line in enumerate(f)
+            if line_number not in superseded and line.strip()
+        ]
+
+
+def read_superseded(directory: Path) -> dict[str, set[int]]:
+    """Read the records of a packed corpus superseded by a later record with the same id.
+
+    Args:
+        directory: Directory holding the shards and index.
+
+    Returns:
+        dict[str, set[int]]: Line numbers of the superseded records, by shard file name.
+            Empty if the directory has no superseded file.
+    """
+
+    superseded_path = directory / SUPERSEDED_FILE_NAME
+    if not superseded_path.is_file():
+        return {}
+
+    superseded: dict[str, set[int]] = {}
+    with open(superseded_path, encoding="utf-8") as f:
+        for line in f:
+            shard, line_number = line.rstrip("\n").split("\t")
+            superseded.setdefault(shard, set()).add(int(line_number))
+
+    return superseded
@@ -0,0 +1,349 @@
+import json
+import time
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+from loguru import logger
+
+from .ivf import IVFIndex, recall_at_k
+
+
+class LocalVectorIndex:
+    """On-disk vector index searched in-process with NumPy.
+
+    The index is a directory holding:
+        - `vectors.f32`: the L2-normalized embeddings as a raw row-major float32 matrix,
+          memory-mapped for search so only the pages touched are loaded in RAM.
+        - `records.jsonl`: one JSON record (text and metadata) per row.
+        - `records.offsets`: int64 byte offsets of the records, so any row is read with
+          a single seek.
+        - `manifest.json`: the embedding dimension and number of rows.
+
+    Vectors are normalized when added, so the dot product used for search is the
+    cosine similarity. Rows are only ever appended; `clear` drops the whole index.
+
+    An optional IVF index (see `IVFIndex`) built with `build_ivf` and stored in the
+    same directory makes searches approximate, with `nprobe` as the recall/latency
+    knob. Adding rows drops it, as the new rows would not be reachable through it.
+
+    Attributes:
+        directory: Directory holding the index files.
+        dim: Dimension of the embeddings.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    RECORDS_FILE = "records.jsonl"
+    OFFSETS_FILE = "records.offsets"
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, directory: Path, dim: int | None = None) -> None:
+        self.directory = Path(directory)
+        self.dim = dim
+
+        manifest = self.__read_manifest()
+        if manifest:
+            assert dim is None or dim == manifest["dim"], (
+                f"Index at '{self.directory}' has dimension {manifest['dim']}, got {dim}"
+            )
+            self.dim = manifest["dim"]
+
+        self.__vectors: np.memmap | None = None
+        self.__offsets: np.ndarray | None = None
+        self.__ivf: IVFIndex | None = None
+        self.__ivf_loaded = False
+
+    @property
+    def count(self) -> int:
+        vectors_path = self.directory / self.VECTORS_FILE
+        if not self.dim or not vectors_path.exists():
+            return 0
+
+        return vectors_path.stat().st_size // (self.dim * 4)
+
+    @property
+    def version(self) -> str:
+        """Stamp that changes whenever the index files are rewritten.
+
+        It is derived from the modification time of the manifests of the index and of
+        the IVF and BM25 indexes stored next to it, so it can be checked with a few
+        `stat` calls.
+        """
+
+        stamps = [
+            f"{path.name}:{path.stat().st_mtime_ns}"
+            for path in sorted(self.directory.glob("*.json"))
+        ]
+
+        return f"{self.count}|{'|'.join(stamps)}"
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The (count, dim) float32 matrix of normalized embeddings, memory-mapped."""
+
+        if self.__vectors is None:
+            count = self.count
+            if count == 0:
+                return np.empty((0, self.dim or 0), dtype=np.float32)
+
+            self.__vectors = np.memmap(
+                self.directory / self.VECTORS_FILE,
+                dtype=np.float32,
+                mode="r",
+                shape=(count, self.dim),
+            )
+
+        return self.__vectors
+
+    @property
+    def ivf(self) -> IVFIndex | None:
+        """The IVF index of the vectors, if one was built for the current rows."""
+
+        if not self.__ivf_loaded and IVFIndex.exists(self.directory):
+            self.__ivf_loaded = True
+            ivf = IVFIndex.load(self.directory)
+            if ivf.count == self.count:
+                self.__ivf = ivf
+            else:
+                logger.warning(
+                    f"Ignoring stale IVF index at '{self.directory}' "
+                    f"({ivf.count} rows indexed, {self.count} rows stored)"
+                )
+
+        return self.__ivf
+
+    def clear(self) -> None:
+        """Remove every row from the index."""
+
+        for file_name in (
+            self.VECTORS_FILE,
+            self.RECORDS_FILE,
+            self.OFFSETS_FILE,
+            self.MANIFEST_FILE,
+        ):
+            (self.directory / file_name).unlink(missing_ok=True)
+        IVFIndex.delete(self.directory)
+
+        self.__invalidate()
+
+    def add(
+        self, embeddings: Sequence[Sequence[float]], records: Sequence[dict[str, Any]]
+    ) -> None:
+        """Append embeddings and their records to the index.
+
+        Args:
+            embeddings: One embedding per record.
+            records: JSON serializable records returned with the search results.
+        """
+
+        if len(embeddings) == 0:
+            return
+
+        assert len(embeddings) == len(records), "Expected one record per embedding"
+
+        vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        assert vectors.shape[1] == self.dim, (
+            f"Expected embeddings of dimension {self.dim}, got {vectors.shape[1]}"
+        )
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / self.VECTORS_FILE, "ab") as f:
+            vectors.tofile(f)
+
+        offsets = []
+        with open(self.directory / self.RECORDS_FILE, "ab") as f:
+            for record in records:
+                offsets.append(f.tell())
+                f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+
+        with open(self.directory / self.OFFSETS_FILE, "ab") as f:
+            np.asarray(offsets, dtype=np.int64).tofile(f)
+
+        self.__write_manifest()
+        IVFIndex.delete(self.directory)
+        self.__invalidate()
+
+    def build_ivf(
+        self, n_lists: int | None = None, nprobe: int = 8, seed: int = 0
+    ) -> IVFIndex:
+        """Build and save an IVF index over the current rows.
+
+        Args:
+            n_lists: Number of inverted lists. Defaults to 4 * sqrt(count).
+            nprobe: Default number of lists searched per query.
+            seed: Seed of the k-means training.
+
+        Returns:
+            IVFIndex: The built index.
+        """
+
+        ivf = IVFIndex.build(self.vectors, n_lists=n_lists, nprobe=nprobe, seed=seed)
+        ivf.save(self.directory)
+        self.__ivf = ivf
+        self.__ivf_loaded = True
+
+        return ivf
+
+    def search(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        nprobe: int | None = None,
+        exact: bool = False,
+    ) -> list[tuple[int, float]]:
+        """Top-k search by cosine similarity.
+
+        The search is approximate when an IVF index exists, exact otherwise.
+
+        Args:
+            embedding: The query embedding.
+            k: Number of results.
+            nprobe: Number of IVF lists searched. Defaults to the one the IVF index
+                was built with.
+            exact: Scan every row even if an IVF index exists.
+
+        Returns:
+            list[tuple[int, float]]: (row, score) pairs sorted by decreasing score.
+        """
+
+        vectors = self.vectors
+        if len(vectors) == 0:
+            return []
+
+        query = normalize(np.asarray(embedding, dtype=np.float32))
+
+        ivf = None if exact else self.ivf
+        if ivf is None:
+            return top_k(vectors @ query, k)
+
+        rows = ivf.candidates(query, nprobe)
+        scores = vectors[rows] @ query
+
+        return [(int(rows[i]), score) for i, score in top_k(scores, k)]
+
+    def recall_report(
+        self,
+        k: int = 10,
+        num_queries: int = 200,
+        nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32),
+        seed: int = 0,
+    ) -> dict[str, Any]:
+        """Measure the recall and latency of the IVF search against exact search.
+
+        Queries are rows sampled from the index itself.
+
+        Args:
+            k: Number of results per query.
+            num_queries: Number of sampled queries.
+            nprobes: The `nprobe` values to evaluate.
+            seed: Seed of the query sample.
+
+        Returns:
+            dict[str, Any]: The recall@k and mean latency of every `nprobe`, along
+                with the latency of the exact search.
+        """
+
+        assert self.ivf is not None, "Build the IVF index before measuring its recall"
+
+        rng = np.random.default_rng(seed)
+        num_queries = min(num_queries, self.count)
+        query_rows = np.sort(rng.choice(self.count, size=num_queries, replace=False))
+        queries = np.asarray(self.vectors[query_rows])
+
+        def run(**search_kwargs) -> tuple[list[list[int]], float]:
+            start_time = time.perf_counter()
+            results = [
+                [row for row, _ in self.search(query, k, **search_kwargs)]
+                for query in queries
+            ]
+            latency_ms = (time.perf_counter() - start_time) * 1000 / num_queries
+
+            return results, latency_ms
+
+        exact_results, exact_latency_ms = run(exact=True)
+
+        report = {
+            "k": k,
+            "num_queries": num_queries,
+            "count": self.count,
+            "n_lists": self.ivf.n_lists,
+            "default_nprobe": self.ivf.nprobe,
+            "exact_latency_ms": round(exact_latency_ms, 3),
+            "nprobe": {},
+        }
+        for nprobe in sorted(set(nprobes)):
+            if nprobe > self.ivf.n_lists:
+                continue
+
+            results, latency_ms = run(nprobe=nprobe)
+            report["nprobe"][str(nprobe)] = {
+                "recall": round(recall_at_k(results, exact_results), 4),
+                "latency_ms": round(latency_ms, 3),
+            }
+
+        return report
+
+    def get_records(self, rows: Sequence[int]) -> list[dict[str, Any]]:
+        """Read the records of the given rows.
+
+        Args:
+            rows: Rows returned by a search.
+
+        Returns:
+            list[dict[str, Any]]: The records, in the order of the rows.
+        """
+
+        if self.__offsets is None:
+            self.__offsets = np.fromfile(
+                self.directory / self.OFFSETS_FILE, dtype=np.int64
+            )
+
+        records = []
+        with open(self.directory / self.RECORDS_FILE, "rb") as f:
+            for row in rows:
+                f.seek(int(self.__offsets[row]))
+                records.append(json.loads(f.readline()))
+
+        return records
+
+    def __invalidate(self) -> None:
+        self.__vectors = None
+        self.__offsets = None
+        self.__ivf = None
+        self.__ivf_loaded = False
+
+    def __read_manifest(self) -> dict[str, Any] | None:
+        manifest_path = self.directory / self.MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
+
+        return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    def __write_manifest(self) -> None:
+        manifest = {"version": 1, "dim": self.dim, "count": self.count}
+        (self.directory / self.MANIFEST_FILE).write_text(
+            json.dumps(manifest), encoding="utf-8"
+        )
+
+        logger.debug(f"Local vector index at '{self.directory}' has {manifest['count']} rows")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k(scores: np.ndarray, k: int) -> list[tuple[int, float]]:
+    """Rows of the k highest scores, sorted by decreasing score."""
+
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+
+    rows = np.argpartition(-scores, k - 1)[:k]
+    rows = rows[np.argsort(-scores[rows])]
+
+    return [(int(row), float(scores[row])) for row in rows]
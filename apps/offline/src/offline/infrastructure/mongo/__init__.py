@@ -1,7 +1,13 @@
-from .service import MongoDBService
+from .client import close_mongo_clients, get_mongo_client
+from .service import IngestionStats, MongoDBService
 from .indexes import MongoDBIndex
+from .versions import IndexVersionStamp
 
 __all__ = [
+    "close_mongo_clients",
+    "get_mongo_client",
+    "IndexVersionStamp",
+    "IngestionStats",
     "MongoDBService",
     "MongoDBIndex",
 ]
\ No newline at end of file
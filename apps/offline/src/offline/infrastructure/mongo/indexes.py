@@ -1,4 +1,5 @@
 from langchain_mongodb.index import create_fulltext_search_index
+from loguru import logger
 
 from offline.infrastructure.mongo.service import MongoDBService
 
@@ -8,7 +9,7 @@ class MongoDBIndex:
         retriever,
         mongodb_client: MongoDBService,
     ) -> None:
-        self.retriever = retriever,
+        self.retriever = retriever
         self.mongodb_client = mongodb_client
 
     def create(
@@ -16,15 +17,46 @@ class MongoDBIndex:
         embedding_dim: int,
         is_hybrid: bool = False,
     ) -> None:
-        vectorstore = self.retriever[0].vectorstore
+        """Create the vector (and fulltext) search indexes if they don't exist yet.
 
-        vectorstore.create_vector_search_index(
-            dimensions=embedding_dim,
-        )
+        Existing indexes are left in place, as Atlas keeps them up to date when
+        documents are inserted or deleted. For parent document retrievers, the
+        field linking the chunks to their parent document is also indexed, as
+        parents are looked up by it.
 
-        if is_hybrid:
+        Args:
+            embedding_dim: Dimension of the embedding vectors.
+            is_hybrid: Whether to also create the fulltext search index.
+        """
+
+        id_key = getattr(self.retriever, "id_key", None)
+        if id_key:
+            # No-op if the index already exists.
+            self.mongodb_client.collection.create_index([(id_key, 1)])
+
+        vectorstore = self.retriever.vectorstore
+        existing_indexes = {
+            index["name"]
+            for index in self.mongodb_client.collection.list_search_indexes()
+        }
+
+        if vectorstore._index_name in existing_indexes:
+            logger.info(f"Vector search index '{vectorstore._index_name}' already exists.")
+        else:
+            vectorstore.create_vector_search_index(
+                dimensions=embedding_dim,
+            )
+
+        if not is_hybrid:
+            return
+
+        if self.retriever.search_index_name in existing_indexes:
+            logger.info(
+                f"Fulltext search index '{self.retriever.search_index_name}' already exists."
+            )
+        else:
             create_fulltext_search_index(
                 collection=self.mongodb_client.collection,
                 field=vectorstore._text_key,
                 index_name=self.retriever.search_index_name
-            )
\ No newline at end of file
+            )
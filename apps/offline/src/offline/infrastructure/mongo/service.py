@@ -1,14 +1,41 @@
-from typing import Generic, Type, TypeVar
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Generic, Iterable, Iterator, Type, TypeVar
 
 from bson import ObjectId
 from loguru import logger
 from pydantic import BaseModel
-from pymongo import MongoClient, errors
+from pymongo import ReplaceOne, errors
 
 from offline.config import settings
+from offline.infrastructure.mongo.client import get_mongo_client
 
 T = TypeVar("T", bound=BaseModel)
 
+@dataclass
+class IngestionStats:
+    """Counters reported by a bulk write.
+
+    Attributes:
+        inserted: Number of inserted documents.
+        upserted: Number of documents inserted through an upsert.
+        matched: Number of existing documents matched and replaced through an upsert,
+            whether or not their content changed.
+        failed: Number of documents rejected by MongoDB.
+        seconds: Total time spent writing.
+    """
+
+    inserted: int = 0
+    upserted: int = 0
+    matched: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.upserted + self.matched
+
 class MongoDBService(Generic[T]):
     """Service class for MongoDB operations, supporting ingestion, querying, and validation.
 
@@ -26,7 +53,7 @@ class MongoDBService(Generic[T]):
         collection_name: Name of the MongoDB collection.
         database_name: Name of the MongoDB database.
         mongodb_uri: MongoDB connection URI.
-        client: MongoDB client instance for database connections.
+        client: Process-wide MongoDB client shared with the other services.
         database: Reference to the target MongoDB database.
         collection: Reference to the target MongoDB collection.
     """
@@ -58,8 +85,7 @@ class MongoDBService(Generic[T]):
         self.mongodb_uri = mongodb_uri
         
         try:
-            self.client = MongoClient(mongodb_uri, appname="offline")
-            self.client.admin.command("ping")
+            self.client = get_mongo_client(mongodb_uri, appname="offline")
         except Exception as e:
             logger.error(f"Failed to initialize MongoDBService: {e}")
             raise
@@ -109,40 +135,124 @@ class MongoDBService(Generic[T]):
             logger.error(f"Error clearing the collection: {e}")
             raise
 
-    def ingest_documents(self, documents: list[T]) -> None:
+    def ingest_documents(self, documents: list[T], batch_size: int = 1000) -> None:
         """Insert multiple documents into the MongoDB collection.
 
         Args:
             documents: List of Pydantic model instances to insert.
+            batch_size: Number of documents serialized and inserted at once.
 
         Raises:
             ValueError: If documents is empty or contains non-Pydantic model items.
             errors.PyMongoError: If the insertion operation fails.
         """
 
-        try:
-            if not documents or not all(
-                isinstance(doc, BaseModel) for doc in documents
-            ):
-                raise ValueError("Documents must be a list of Pydantic models.")
-            
-            dict_documents = [doc.model_dump() for doc in documents]
+        if not documents or not all(
+            isinstance(doc, BaseModel) for doc in documents
+        ):
+            raise ValueError("Documents must be a list of Pydantic models.")
+
+        stats = self.bulk_write_documents(documents, batch_size=batch_size)
+        logger.debug(f"Inserted {stats.inserted} documents into MongoDB.")
+
+    def bulk_write_documents(
+        self,
+        documents: Iterable[T],
+        batch_size: int = 1000,
+        upsert: bool = False,
+        id_field: str = "id",
+    ) -> IngestionStats:
+        """Stream documents into the collection in unordered batches.
+
+        Documents are serialized one batch at a time, so the full corpus is never held
+        in memory as dictionaries. Writes are unordered: a document rejected by MongoDB
+        is logged and counted instead of failing the rest of its batch.
 
+        Args:
+            documents: Iterable of Pydantic model instances to write.
+            batch_size: Number of documents serialized and written at once.
+            upsert: If True, replace the document with the same `id_field` value, or
+                insert it if it doesn't exist. Otherwise, always insert.
+            id_field: Field used to match documents when upserting.
+
+        Returns:
+            IngestionStats: Counters of written and failed documents.
+
+        Raises:
+            errors.PyMongoError: If a batch fails for a reason other than individual
+                document write errors.
+        """
+
+        if upsert:
+            self.collection.create_index(id_field)
+
+        stats = IngestionStats()
+        iterator = iter(documents)
+        while batch := list(islice(iterator, batch_size)):
+            dict_documents = [doc.model_dump() for doc in batch]
             for doc in dict_documents:
                 doc.pop("_id", None)
 
-            self.collection.insert_many(dict_documents)
-            logger.debug(f"Inserted {len(documents)} documents into MongoDB.")
-        except errors.PyMongoError as e:
-            logger.error(f"Error inserting documents: {e}")
-            raise
+            start_time = time.perf_counter()
+            try:
+                if upsert:
+                    result = self.collection.bulk_write(
+                        [
+                            ReplaceOne({id_field: doc[id_field]}, doc, upsert=True)
+                            for doc in dict_documents
+                        ],
+                        ordered=False,
+                    )
+                    stats.upserted += result.upserted_count
+                    stats.matched += result.matched_count
+                else:
+                    result = self.collection.insert_many(dict_documents, ordered=False)
+                    stats.inserted += len(result.inserted_ids)
+            except errors.BulkWriteError as e:
+                details = e.details
+                write_errors = details.get("writeErrors", [])
+                stats.inserted += details.get("nInserted", 0)
+                stats.upserted += details.get("nUpserted", 0)
+                stats.matched += details.get("nMatched", 0)
+                stats.failed += len(write_errors)
+                for write_error in write_errors[:5]:
+                    logger.warning(
+                        f"Failed to write document at index {write_error.get('index')}: {write_error.get('errmsg')}"
+                    )
+            except errors.PyMongoError as e:
+                logger.error(f"Error writing documents: {e}")
+                raise
+
+            elapsed = time.perf_counter() - start_time
+            stats.seconds += elapsed
+            logger.debug(
+                f"Wrote batch of {len(batch)} documents in {elapsed:.2f}s "
+                f"({len(batch) / max(elapsed, 1e-9):.0f} docs/s)"
+            )
+
+        logger.info(
+            f"Bulk write completed: {stats.written} written "
+            f"({stats.inserted} inserted, {stats.upserted} upserted, {stats.matched} matched), "
+            f"{stats.failed} failed in {stats.seconds:.2f}s "
+            f"({stats.written / max(stats.seconds, 1e-9):.0f} docs/s)"
+        )
+
+        return stats
     
-    def fetch_documents(self, limit: int, query: dict) -> list[T]:
+    def fetch_documents(
+        self,
+        limit: int,
+        query: dict,
+        projection: dict | None = None,
+        batch_size: int = 1000,
+    ) -> list[T]:
         """Retrieve documents from the Mongo DB collection based on a query.
 
         Args:
             limit: Maximum number of documents to retrieve.
             query: MongoDB query filter to apply.
+            projection: Optional MongoDB projection, e.g. {"child_urls": 0} to skip a field.
+            batch_size: Number of documents read by each query.
 
         Returns:
             List of Pydantic model instances matching the query criteria.
@@ -153,69 +263,117 @@ class MongoDBService(Generic[T]):
         """
 
         try:
-            documents = list(self.collection.find(query).limit(limit))
+            documents = list(
+                self.iter_documents(
+                    query=query, limit=limit, projection=projection, batch_size=batch_size
+                )
+            )
             logger.debug(f"Fetched {len(documents)} documents with query {query}")
-            return self.__parse_documents(documents)
+            return documents
         except Exception as e:
             logger.error(f"Error fetching documents: {e}")
             raise
+
+    def iter_documents(
+        self,
+        query: dict | None = None,
+        limit: int = 0,
+        projection: dict | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[T]:
+        """Lazily stream documents from the Mongo DB collection.
+
+        Documents are read in batches of `batch_size`, in `_id` order, and validated into
+        Pydantic models one by one as they are consumed, so only a single batch is held
+        in memory. Every batch is a separate query resuming after the last `_id` read,
+        instead of one long-lived cursor, so a consumer slower than the server's cursor
+        idle timeout, e.g. while embedding a batch, never hits `CursorNotFound`.
+
+        Args:
+            query: MongoDB query filter to apply. Defaults to all documents.
+            limit: Maximum number of documents to retrieve. 0 means no limit.
+            projection: Optional MongoDB projection, e.g. {"child_urls": 0} to skip a field.
+            batch_size: Number of documents read by each query.
+
+        Yields:
+            Pydantic model instances matching the query criteria.
+        """
+
+        if projection is not None:
+            # The _id of the last document read is needed to resume the next batch.
+            projection = {**projection, "_id": 1}
+
+        last_id = None
+        num_read = 0
+        while limit <= 0 or num_read < limit:
+            batch_query = query or {}
+            if last_id is not None:
+                id_range = {"_id": {"$gt": last_id}}
+                batch_query = {"$and": [batch_query, id_range]} if batch_query else id_range
+
+            num_requested = batch_size if limit <= 0 else min(batch_size, limit - num_read)
+            batch = list(
+                self.collection.find(batch_query, projection=projection)
+                .sort("_id", 1)
+                .limit(num_requested)
+            )
+            if not batch:
+                break
+
+            last_id = batch[-1]["_id"]
+            num_read += len(batch)
+            for doc in batch:
+                yield self.__parse_document(doc)
+
+            if len(batch) < num_requested:
+                break
     
-    def __parse_documents(self, documents: list[dict]) -> list[T]:
-        """Convert MongoDB documents to Pydantic model instances.
+    def __parse_document(self, doc: dict) -> T:
+        """Convert a MongoDB document to a Pydantic model instance.
 
         Converts MongoDB ObjectId fields to strings and transforms the document structure
         to match the Pydantic model schema.
 
         Args:
-            documents: List of MongoDB documents to parse.
+            doc: MongoDB document to parse.
 
         Returns:
-            List of validated Pydantic model instances.
+            Validated Pydantic model instance.
         """
 
-        parsed_documents = []
-        for doc in documents:
-            for key, value in doc.items():
-                if isinstance(value, ObjectId):
-                    doc[key] = str(value)
+        for key, value in doc.items():
+            if isinstance(value, ObjectId):
+                doc[key] = str(value)
 
-            _id = doc.pop("_id", None)
-            doc["id"] = _id
+        _id = doc.pop("_id", None)
+        doc["id"] = _id
 
-            parsed_doc = self.model.model_validate(doc)
-            parsed_documents.append(parsed_doc)
+        return self.model.model_validate(doc)
 
-        return parsed_documents
-                
+    def get_collection_count(self, query: dict | None = None) -> int:
+        """Count the number of documents in the collection.
 
-    def get_collection_count(self) -> int:
-        """Count the total number of documents in the collection.
+        Args:
+            query: Optional MongoDB query filter. Defaults to all documents.
 
         Returns:
-            Total number of documents in the collection.
+            Number of documents in the collection matching the query.
 
         Raises:
             errors.PyMongoError: If the count operation fails.
         """
     
         try:
-            return self.collection.count_documents({})
+            return self.collection.count_documents(query or {})
         except errors.PyMongoError as e:
             logger.error(f"Error counting documents in MongoDB: {e}")
             raise
 
     def close(self) -> None:
-        """Close the MongoDB connection.
+        """Release the MongoDB connection.
 
-        This method should be called when the service is no longer needed
-        to properly release resources, unless using the context manager.
+        The underlying client is shared by the whole process and is closed at exit
+        (see `close_mongo_clients`), so this only detaches the service from it.
         """
 
-        self.client.close()
-        logger.debug("Closed MongoDB connection.")
-
-
-
-
-
-
+        logger.debug(f"Released MongoDB connection to collection '{self.collection_name}'.")
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from loguru import logger
+from pymongo.collection import Collection
+
+
+class IndexVersionStamp:
+    """Version stamp of a RAG collection, changed every time it is (re)indexed.
+
+    The stamps of all collections live in a small side collection of the same
+    database, keyed by collection name, so readers can tell whether results cached
+    for a collection are still valid with a single point lookup.
+
+    Attributes:
+        collection: The RAG collection the stamp belongs to.
+    """
+
+    COLLECTION_NAME = "index_versions"
+
+    def __init__(self, collection: Collection) -> None:
+        self.collection = collection
+        self.__versions = collection.database[self.COLLECTION_NAME]
+
+    def bump(self) -> str:
+        """Mark the collection as changed.
+
+        Returns:
+            str: The new version.
+        """
+
+        version = uuid4().hex
+        self.__versions.update_one(
+            {"_id": self.collection.name},
+            {"$set": {"version": version, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+        logger.debug(f"Collection '{self.collection.name}' is now at version '{version}'")
+
+        return version
+
+    def get(self) -> str | None:
+        """Read the current version of the collection.
+
+        Returns:
+            str | None: The version, or None if the collection was never stamped.
+        """
+
+        stamp = self.__versions.find_one({"_id": self.collection.name}, {"version": 1})
+
+        return stamp["version"] if stamp else None
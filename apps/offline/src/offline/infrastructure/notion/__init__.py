@@ -1,4 +1,12 @@
+from .crawler import NotionBlockCrawler, NotionCrawlError
 from .database import NotionDatabaseClient
 from .document import NotionDocumentClient
+from .renderer import NotionBlockRenderer
 
-__all__ = ["NotionDatabaseClient", "NotionDocumentClient"]
\ No newline at end of file
+__all__ = [
+    "NotionBlockCrawler",
+    "NotionCrawlError",
+    "NotionDatabaseClient",
+    "NotionDocumentClient",
+    "NotionBlockRenderer",
+]
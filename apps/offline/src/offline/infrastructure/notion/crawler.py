@@ -0,0 +1,344 @@
+import asyncio
+import random
+import time
+
+import httpx
+from loguru import logger
+
+from offline.config import settings
+
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+RETRYABLE_STATUS_CODES = {409, 429, 500, 502, 503, 504}
+
+
+class AsyncRateLimiter:
+    """Token bucket spacing async requests at `rate` requests per second.
+
+    Attributes:
+        rate: Number of requests allowed per second, on average.
+        burst: Maximum number of requests sent back to back.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        assert rate > 0, "rate must be positive"
+
+        self.rate = rate
+        self.burst = burst
+
+        self.__level = float(burst)
+        self.__updated_at = time.monotonic()
+        self.__lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request can be sent."""
+
+        async with self.__lock:
+            while True:
+                self.__refill()
+                if self.__level >= 1:
+                    self.__level -= 1
+                    return
+
+                await asyncio.sleep((1 - self.__level) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request for `seconds`, e.g. after a 429 response."""
+
+        self.__refill()
+        self.__level = min(self.__level, 0.0) - seconds * self.rate
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.__level = min(
+            self.burst, self.__level + (now - self.__updated_at) * self.rate
+        )
+        self.__updated_at = now
+
+
+class NotionCrawlError(Exception):
+    """Raised when a block of a Notion page cannot be retrieved."""
+
+
+class NotionBlockCrawler:
+    """Async crawler of the block trees of Notion pages.
+
+    Pages are crawled by a pool of `max_concurrent_pages` workers sharing one HTTP
+    client, so connections are kept alive across requests. Within a page, the children
+    of all the blocks of a level are retrieved concurrently, and at most
+    `max_concurrent_requests` requests are in flight overall. The children of every
+    block are read page by page, following `next_cursor` until `has_more` is false,
+    and all requests go through a token bucket that keeps the crawler under the Notion
+    rate limit. Rate-limited and transient failures are retried with the delay
+    requested by the `Retry-After` header or an exponential backoff.
+
+    Failures are isolated per page: a page that takes longer than
+    `page_timeout_seconds` or with a block that cannot be retrieved is left out of the
+    results and reported in `failed_pages`, while the other pages are still crawled.
+
+    The children of a block are attached to it under the "children" key. Sub-pages
+    (`child_page` blocks) are only crawled up to `max_child_page_depth` levels deep,
+    while the children of other blocks, e.g. toggles or nested lists, always are.
+
+    Attributes:
+        api_key: The Notion API secret key used for authentication.
+        requests_per_second: Average number of requests per second.
+        max_concurrent_requests: Maximum number of requests in flight.
+        max_concurrent_pages: Maximum number of pages crawled at the same time.
+        page_timeout_seconds: Maximum duration of the crawl of a single page.
+        max_child_page_depth: Depth up to which sub-pages are crawled.
+        page_size: Number of blocks requested per page.
+        max_retries: Maximum number of retries of a single request.
+        timeout_seconds: Timeout of a single request.
+        num_requests: Number of requests sent by the last crawl.
+        num_retries: Number of retried requests of the last crawl.
+        failed_pages: Error of every page the last crawl failed on, by page ID.
+        duration_seconds: Duration of the last crawl.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        requests_per_second: float = settings.NOTION_REQUESTS_PER_SECOND,
+        max_concurrent_requests: int = settings.NOTION_MAX_CONCURRENT_REQUESTS,
+        max_concurrent_pages: int = settings.NOTION_MAX_CONCURRENT_PAGES,
+        page_timeout_seconds: float = settings.NOTION_PAGE_TIMEOUT_SECONDS,
+        max_child_page_depth: int = 3,
+        page_size: int = 100,
+        max_retries: int = 5,
+        timeout_seconds: float = 30.0,
+    ) -> None:
+        assert max_concurrent_pages > 0, "max_concurrent_pages must be positive"
+
+        self.api_key = api_key
+        self.requests_per_second = requests_per_second
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_concurrent_pages = max_concurrent_pages
+        self.page_timeout_seconds = page_timeout_seconds
+        self.max_child_page_depth = max_child_page_depth
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.timeout_seconds = timeout_seconds
+
+        self.num_requests = 0
+        self.num_retries = 0
+        self.failed_pages: dict[str, str] = {}
+        self.duration_seconds = 0.0
+
+    def crawl(self, block_ids: list[str]) -> dict[str, list[dict]]:
+        """Crawl the block trees of several pages.
+
+        Args:
+            block_ids: IDs of the pages (or blocks) to crawl.
+
+        Returns:
+            dict[str, list[dict]]: The child blocks of every page crawled successfully,
+                with their own children nested under the "children" key.
+        """
+
+        return asyncio.run(self.acrawl(block_ids))
+
+    async def acrawl(self, block_ids: list[str]) -> dict[str, list[dict]]:
+        """Async version of `crawl`."""
+
+        self.num_requests = 0
+        self.num_retries = 0
+        self.failed_pages = {}
+        started_at = time.perf_counter()
+
+        limiter = AsyncRateLimiter(
+            rate=self.requests_per_second, burst=max(int(self.requests_per_second), 1)
+        )
+        requests_semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        roots: dict[str, list[dict]] = {}
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for block_id in dict.fromkeys(block_ids):
+            queue.put_nowait(block_id)
+        num_pages = queue.qsize()
+
+        async with httpx.AsyncClient(
+            base_url=NOTION_API_URL,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Notion-Version": NOTION_VERSION,
+            },
+            timeout=self.timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrent_requests,
+                max_keepalive_connections=self.max_concurrent_requests,
+            ),
+        ) as client:
+            workers = [
+                asyncio.create_task(
+                    self.__worker(
+                        client, limiter, requests_semaphore, queue, roots, num_pages
+                    )
+                )
+                for _ in range(min(self.max_concurrent_pages, max(num_pages, 1)))
+            ]
+            try:
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        self.duration_seconds = time.perf_counter() - started_at
+        logger.info(
+            f"Crawled {len(roots)}/{num_pages} Notion pages ({len(self.failed_pages)} "
+            f"failed) with {self.num_requests} requests ({self.num_retries} retries) "
+            f"in {self.duration_seconds:.1f}s"
+        )
+
+        return {block_id: roots[block_id] for block_id in block_ids if block_id in roots}
+
+    async def __worker(
+        self,
+        client: httpx.AsyncClient,
+        limiter: AsyncRateLimiter,
+        requests_semaphore: asyncio.Semaphore,
+        queue: asyncio.Queue,
+        roots: dict[str, list[dict]],
+        num_pages: int,
+    ) -> None:
+        while True:
+            block_id = await queue.get()
+            try:
+                children: list[dict] = []
+                async with asyncio.timeout(self.page_timeout_seconds):
+                    await self.__expand(
+                        client, limiter, requests_semaphore, block_id, 0, children
+                    )
+                roots[block_id] = children
+            except TimeoutError:
+                self.failed_pages[block_id] = (
+                    f"timed out after {self.page_timeout_seconds:g}s"
+                )
+                logger.error(
+                    f"Crawling Notion page '{block_id}' timed out after "
+                    f"{self.page_timeout_seconds:g}s. Skipping it."
+                )
+            except Exception as e:
+                if isinstance(e, ExceptionGroup):
+                    e = e.exceptions[0]
+                self.failed_pages[block_id] = f"{type(e).__name__}: {e}"
+                logger.opt(exception=e).error(
+                    f"Error crawling Notion page '{block_id}'. Skipping it."
+                )
+            finally:
+                queue.task_done()
+
+            num_done = len(roots) + len(self.failed_pages)
+            if num_done % 50 == 0 or num_done == num_pages:
+                logger.info(f"Crawled {num_done}/{num_pages} Notion pages")
+
+    async def __expand(
+        self,
+        client: httpx.AsyncClient,
+        limiter: AsyncRateLimiter,
+        requests_semaphore: asyncio.Semaphore,
+        block_id: str,
+        depth: int,
+        children: list[dict],
+    ) -> None:
+        """Retrieve the children of a block, then the children of those concurrently."""
+
+        blocks = await self.__retrieve_child_blocks(
+            client, limiter, requests_semaphore, block_id
+        )
+        children.extend(blocks)
+
+        # A failed subtree cancels its siblings and fails the whole page.
+        async with asyncio.TaskGroup() as task_group:
+            for block in blocks:
+                if self.__should_expand(block, depth):
+                    block["children"] = []
+                    task_group.create_task(
+                        self.__expand(
+                            client,
+                            limiter,
+                            requests_semaphore,
+                            block["id"],
+                            depth + 1,
+                            block["children"],
+                        )
+                    )
+
+    def __should_expand(self, block: dict, depth: int) -> bool:
+        if block.get("type") == "child_page":
+            return depth < self.max_child_page_depth
+
+        return bool(block.get("has_children"))
+
+    async def __retrieve_child_blocks(
+        self,
+        client: httpx.AsyncClient,
+        limiter: AsyncRateLimiter,
+        requests_semaphore: asyncio.Semaphore,
+        block_id: str,
+    ) -> list[dict]:
+        """Retrieve every child block of a block, following the pagination cursors."""
+
+        blocks = []
+        params = {"page_size": self.page_size}
+        while True:
+            async with requests_semaphore:
+                data = await self.__get(
+                    client, limiter, f"/blocks/{block_id}/children", params
+                )
+
+            blocks.extend(data.get("results", []))
+            if not data.get("has_more") or not data.get("next_cursor"):
+                break
+            params = {"page_size": self.page_size, "start_cursor": data["next_cursor"]}
+
+        return blocks
+
+    async def __get(
+        self,
+        client: httpx.AsyncClient,
+        limiter: AsyncRateLimiter,
+        url: str,
+        params: dict,
+    ) -> dict:
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            self.num_requests += 1
+
+            delay = min(2**attempt, 60) * (0.5 + random.random() / 2)
+            try:
+                response = await client.get(url, params=params)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    if response.is_error:
+                        raise NotionCrawlError(
+                            f"Failed to retrieve Notion page content from '{url}'. Status "
+                            f"code: {response.status_code}, Response: {response.text}"
+                        )
+
+                    return response.json()
+
+                error = f"status code {response.status_code}"
+                retry_after = response.headers.get("retry-after")
+                if retry_after:
+                    try:
+                        delay = float(retry_after)
+                    except ValueError:
+                        pass
+                if response.status_code == 429:
+                    limiter.pause(delay)
+
+            if attempt == self.max_retries:
+                break
+
+            self.num_retries += 1
+            logger.debug(f"Retrying Notion request '{url}' in {delay:.1f}s after {error}")
+            await asyncio.sleep(delay)
+
+        raise NotionCrawlError(
+            f"Failed to retrieve Notion page content from '{url}' after "
+            f"{self.max_retries + 1} attempts: {error}"
+        )
@@ -27,12 +27,23 @@ class NotionDatabaseClient:
 
         self.api_key = api_key
 
-    def query_notion_database(self, database_id: str, query_json: str | None = None) -> list[DocumentMetadata]:
+    def query_notion_database(
+        self,
+        database_id: str,
+        query_json: str | None = None,
+        edited_after: str | None = None,
+        page_size: int = 100,
+    ) -> list[DocumentMetadata]:
         """Query a Notion database and return its results.
 
+        Every page of results is read, following the pagination cursors.
+
         Args:
             database_id: The ID of the Notion database to query.
             query_json: Optional JSON str containing query parameters.
+            edited_after: Optional ISO 8601 timestamp. If set, only the pages edited on or
+                after it are returned.
+            page_size: Number of pages requested per round trip (at most 100).
 
         Returns:
             A list of dictionaries containing the query results.
@@ -52,12 +63,31 @@ class NotionDatabaseClient:
             except json.JSONDecodeError:
                 logger.opt(exception=True).debug("invalid JSON format for query")
                 return []
-        
+
+        if edited_after:
+            # Notion rounds last_edited_time to the minute, so pages edited in the same
+            # minute as the watermark are queried again rather than missed.
+            edited_filter = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": edited_after},
+            }
+            if "filter" in query_payload:
+                edited_filter = {"and": [query_payload["filter"], edited_filter]}
+            query_payload["filter"] = edited_filter
+        query_payload["page_size"] = page_size
+
+        results = []
         try:
-            response = requests.post(url, headers=headers, json=query_payload, timeout=10)
-            response.raise_for_status()
-            results = response.json()
-            results = results["results"]
+            with requests.Session() as session:
+                while True:
+                    response = session.post(url, headers=headers, json=query_payload, timeout=10)
+                    response.raise_for_status()
+                    response_data = response.json()
+                    results.extend(response_data["results"])
+
+                    if not response_data.get("has_more") or not response_data.get("next_cursor"):
+                        break
+                    query_payload["start_cursor"] = response_data["next_cursor"]
         except requests.exceptions.RequestException:
             logger.opt(exception=True).debug("Error querying Notion Database")
             return []
@@ -82,6 +112,7 @@ class NotionDatabaseClient:
         
         properties = self.__flatten_properties(page.get("properties", {}))
         title = properties.pop("Goal")
+        properties["last_edited_time"] = page.get("last_edited_time")
 
         if page.get("parent"):
             properties["parent"] = {
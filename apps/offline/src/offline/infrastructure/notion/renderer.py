@@ -0,0 +1,250 @@
+from dataclasses import dataclass
+
+from loguru import logger
+
+# Characters stripped from both ends of the content of every nesting level.
+WHITESPACE = "\n "
+
+
+@dataclass
+class _Level:
+    """A nesting level of the rendered content.
+
+    Attributes:
+        indent: Whether the content of the level is indented by one more tab.
+        num_tabs: Number of tabs prefixed to every line of the level.
+        started: Whether the level already holds non-whitespace content.
+        pending: Trailing whitespace of the level, written only if more content follows.
+    """
+
+    indent: bool
+    num_tabs: int
+    started: bool = False
+    pending: str = ""
+
+
+class _IndentedWriter:
+    """Single buffer the rendered blocks are written to, with the nesting tracked as state.
+
+    The content of every nesting level is stripped of its leading and trailing newlines
+    and spaces, and the content of indented levels has a tab prefixed to each of its
+    lines. Instead of rendering every level to a string and re-indenting it in its
+    parent, the writer holds back trailing whitespace until more content follows and
+    indents every line once, as it is written, so rendering takes linear time.
+    """
+
+    def __init__(self) -> None:
+        self.__parts: list[str] = []
+        self.__levels: list[_Level] = [_Level(indent=False, num_tabs=0)]
+
+    def open(self, indent: bool) -> None:
+        """Open a nesting level, indented by one more tab if `indent` is True."""
+
+        parent = self.__levels[-1]
+        self.__levels.append(_Level(indent=indent, num_tabs=parent.num_tabs + indent))
+
+    def close(self) -> None:
+        """Close the innermost nesting level, dropping its trailing whitespace."""
+
+        assert len(self.__levels) > 1, "No nesting level to close"
+
+        level = self.__levels.pop()
+        if level.indent and not level.started:
+            # An empty indented level still renders as a single tab.
+            self.write("\t")
+
+    def write(self, text: str) -> None:
+        """Write text to the innermost nesting level."""
+
+        level = self.__levels[-1]
+        if level.started:
+            text = level.pending + text
+            body = text.rstrip(WHITESPACE)
+            level.pending = text[len(body) :]
+            if body:
+                self.__emit(body, level.num_tabs)
+
+            return
+
+        text = text.lstrip(WHITESPACE)
+        if not text:
+            return
+
+        body = text.rstrip(WHITESPACE)
+        level.pending = text[len(body) :]
+
+        # The first content of a level also starts its parents that are still empty,
+        # each one prefixing its first line with a tab if it is indented.
+        index = len(self.__levels) - 1
+        num_prefix_tabs = 0
+        while index >= 0 and not self.__levels[index].started:
+            self.__levels[index].started = True
+            num_prefix_tabs += self.__levels[index].indent
+            index -= 1
+
+        if index >= 0 and self.__levels[index].pending:
+            started = self.__levels[index]
+            self.__emit(started.pending, started.num_tabs)
+            started.pending = ""
+
+        self.__parts.append("\t" * num_prefix_tabs)
+        self.__emit(body, level.num_tabs)
+
+    def getvalue(self) -> str:
+        """The rendered content, without its trailing whitespace."""
+
+        return "".join(self.__parts)
+
+    def __emit(self, text: str, num_tabs: int) -> None:
+        if num_tabs:
+            text = text.replace("\n", "\n" + "\t" * num_tabs)
+        self.__parts.append(text)
+
+
+class NotionBlockRenderer:
+    """Renders Notion block trees to text and extracts their URLs.
+
+    The blocks are rendered in a single pass into one buffer, so deeply nested pages
+    render in linear time and memory.
+
+    Attributes:
+        max_child_page_depth: Depth up to which sub-pages are rendered.
+    """
+
+    def __init__(self, max_child_page_depth: int = 3) -> None:
+        self.max_child_page_depth = max_child_page_depth
+
+    def render(self, blocks: list[dict]) -> tuple[str, list[str]]:
+        """Render Notion blocks into text content and extract their URLs.
+
+        Args:
+            blocks: List of Notion block objects, with their children nested under the
+                "children" key.
+
+        Returns:
+            tuple[str, list[str]]: A tuple containing:
+                - Rendered text content as a string
+                - List of unique extracted URLs
+        """
+
+        writer = _IndentedWriter()
+        urls: dict[str, None] = {}
+        self.__render_blocks(blocks, writer, urls, depth=0)
+
+        return writer.getvalue(), list(urls)
+
+    def __render_blocks(
+        self,
+        blocks: list[dict],
+        writer: _IndentedWriter,
+        urls: dict[str, None],
+        depth: int,
+    ) -> None:
+        for block in blocks:
+            block_type = block.get("type")
+
+            if block_type in {
+                "heading_1",
+                "heading_2",
+                "heading_3",
+            }:
+                rich_text = block[block_type].get("rich_text", [])
+                writer.write(f"# {self.__render_rich_text(rich_text)}\n\n")
+                self.__extract_urls(rich_text, urls)
+            elif block_type in {
+                "paragraph",
+                "quote",
+            }:
+                rich_text = block[block_type].get("rich_text", [])
+                writer.write(f"{self.__render_rich_text(rich_text)}\n")
+                self.__extract_urls(rich_text, urls)
+            elif block_type in {"bulleted_list_item", "numbered_list_item"}:
+                rich_text = block[block_type].get("rich_text", [])
+                writer.write(f"- {self.__render_rich_text(rich_text)}\n")
+                self.__extract_urls(rich_text, urls)
+            elif block_type == "to_do":
+                rich_text = block["to_do"].get("rich_text", [])
+                writer.write(f"[] {self.__render_rich_text(rich_text)}\n")
+                self.__extract_urls(rich_text, urls)
+            elif block_type == "code":
+                rich_text = block["code"].get("rich_text", [])
+                writer.write(f"```\n{self.__render_rich_text(rich_text)}\n````\n")
+                self.__extract_urls(rich_text, urls)
+            elif block_type == "image":
+                writer.write(
+                    f"[Image]({block['image'].get('external', {}).get('url', 'No URL')})\n"
+                )
+            elif block_type == "divider":
+                writer.write("---\n\n")
+            elif block_type == "child_page" and depth < self.max_child_page_depth:
+                child_title = block.get("child_page", {}).get("title", "Untitled")
+                writer.write(f"\n\n<child_page>\n# {child_title}\n\n")
+
+                writer.open(indent=False)
+                self.__render_blocks(block.get("children", []), writer, urls, depth + 1)
+                writer.close()
+                writer.write("\n</child_page>\n\n")
+            elif block_type == "link_preview":
+                url = block.get("link_preview", {}).get("url", "")
+                writer.write(f"[Link Preview]({url})\n")
+
+                urls[self.__normalize_url(url)] = None
+            else:
+                logger.warning(f"Unknown block type: {block_type}")
+
+            # Render the children of bullet points, toggles or similar structures,
+            # indented. Subpages (child_page) are rendered individually as a block.
+            if block_type != "child_page" and block.get("has_children"):
+                writer.open(indent=True)
+                self.__render_blocks(block.get("children", []), writer, urls, depth + 1)
+                writer.close()
+                writer.write("\n\n")
+
+    def __render_rich_text(self, rich_text: list[dict]) -> str:
+        """Render Notion rich text blocks into plain text with markdown formatting.
+
+        Args:
+            rich_text: List of Notion rich text objects to render.
+
+        Returns:
+            str: Formatted text content.
+        """
+
+        return "".join(
+            f"[{segment.get('plain_text', '')}]({segment.get('href', '')})"
+            if segment.get("href")
+            else segment.get("plain_text", "")
+            for segment in rich_text
+        )
+
+    def __extract_urls(self, rich_text: list[dict], urls: dict[str, None]) -> None:
+        """Extract URLs from Notion rich text blocks.
+
+        Args:
+            rich_text: List of Notion rich text objects to extract URLs from.
+            urls: Ordered set the normalized URLs are added to.
+        """
+
+        for text in rich_text:
+            url = None
+            if text.get("href"):
+                url = text["href"]
+            elif "url" in text.get("annotations", {}):
+                url = text["annotations"]["url"]
+
+            if url:
+                urls[self.__normalize_url(url)] = None
+
+    def __normalize_url(self, url: str) -> str:
+        """Normalize a URL by ensuring it ends with a forward slash.
+
+        Args:
+            url: URL to normalize.
+
+        Returns:
+            str: Normalized URL with trailing slash.
+        """
+
+        if not url.endswith("/"):
+            url += "/"
+        return url
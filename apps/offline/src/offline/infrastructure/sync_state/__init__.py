@@ -0,0 +1,6 @@
+from .json_state import SyncState, Watermark
+
+__all__ = [
+    "SyncState",
+    "Watermark",
+]
@@ -0,0 +1,64 @@
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+
+Watermark = str | int | float
+
+
+class SyncState:
+    """Watermarks of the incremental syncs of data sources, persisted as JSON.
+
+    The watermark of a source, e.g. a Notion database, is the latest edit time of the
+    documents extracted by its previous sync. The next sync only extracts the
+    documents edited since then.
+
+    Attributes:
+        path: Path of the JSON file holding the watermarks.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+
+    def get_watermark(self, source_id: str) -> Watermark | None:
+        """Get the watermark of a source.
+
+        Args:
+            source_id: The ID of the source, e.g. a Notion database ID.
+
+        Returns:
+            Watermark | None: The watermark, or None if the source was never synced.
+        """
+
+        return self.__read().get(source_id, {}).get("watermark")
+
+    def set_watermark(self, source_id: str, watermark: Watermark) -> None:
+        """Persist the watermark of a source.
+
+        Args:
+            source_id: The ID of the source, e.g. a Notion database ID.
+            watermark: The latest edit time of the synced documents.
+        """
+
+        state = self.__read()
+        state[source_id] = {
+            "watermark": watermark,
+            "synced_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+        # Write to a temporary file first, so a crash never leaves a truncated state.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(state, indent=4), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+        logger.info(f"Set the sync watermark of '{source_id}' to {watermark}")
+
+    def __read(self) -> dict[str, dict]:
+        if not self.path.exists():
+            return {}
+
+        return json.loads(self.path.read_text(encoding="utf-8"))
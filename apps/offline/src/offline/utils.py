@@ -16,6 +16,24 @@ def generate_rand_hex(length: int) -> str:
     hex_chars = string.hexdigits.lower()
     return "".join(random.choice(hex_chars) for _ in range(length))
 
+def count_tokens(text: str, model_id: str) -> int:
+    """Count the number of tokens of a text using the tiktoken tokenizer.
+
+    Args:
+        text: The input text.
+        model_id: The model name to determine encoding.
+
+    Returns:
+        int: The number of tokens of the text.
+    """
+
+    try:
+        encoding = tiktoken.encoding_for_model(model_id)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+
+    return len(encoding.encode(text, disallowed_special=()))
+
 def clip_tokens(text: str, max_tokens: int, model_id: str) -> str:
     """Clip the text to a maximum number of tokens using the tiktoken tokenizer.
 
@@ -1,5 +1,7 @@
 from .extract_apple_notes_documents import extract_apple_notes_documents
+from .update_apple_notes_sync_state import update_apple_notes_sync_state
 
 __all__ = [
     "extract_apple_notes_documents",
-]
\ No newline at end of file
+    "update_apple_notes_sync_state",
+]
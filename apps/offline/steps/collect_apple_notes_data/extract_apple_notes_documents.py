@@ -1,30 +1,78 @@
 from pathlib import Path
+from typing import Tuple
+
+from loguru import logger
 from typing_extensions import Annotated
 from zenml import step, get_step_context
 
 from offline.domain import Document
 from offline.infrastructure.apple_notes import AppleNotesDBService
+from offline.infrastructure.sync_state import SyncState, Watermark
 
 @step
-def extract_apple_notes_documents(notes_db_path: Path) -> Annotated[list[Document], "apple_notes_documents"]:
+def extract_apple_notes_documents(
+    notes_db_path: Path,
+    incremental: bool = False,
+    sync_state_path: Path | None = None,
+    batch_size: int = 256,
+    max_workers: int | None = None,
+    immutable: bool = False,
+) -> Tuple[
+    Annotated[list[Document], "apple_notes_documents"],
+    Annotated[Watermark | None, "apple_notes_watermark"],
+]:
     """Extract content from Apple Notes.
 
     Args:
-        documents_metadata: List of document metadata to extract content from.
+        notes_db_path: Path of the Apple Notes SQLite database.
+        incremental: If True, only extract the notes updated since the watermark of the
+            previous sync of the database.
+        sync_state_path: Path of the sync state holding the watermarks. Required if
+            `incremental` is True.
+        batch_size: Number of notes fetched and converted at a time.
+        max_workers: Number of processes converting the notes to markdown. Defaults to
+            the number of CPUs.
+        immutable: If True, read the database without locking. Only safe on a frozen
+            copy of the database that nothing writes to.
 
     Returns:
         list[Document]: List of documents with their extracted content.
+        Watermark | None: Latest update of the scanned notes, including the ones
+            filtered out as too large, or the previous watermark if no note changed.
     """
-    
-    with AppleNotesDBService(model=Document, notes_db_path=notes_db_path) as service:
-        documents = service.fetch_documents()
+
+    updated_after = None
+    if incremental:
+        assert sync_state_path is not None, "sync_state_path is required in incremental mode"
+
+        updated_after = SyncState(sync_state_path).get_watermark(str(notes_db_path))
+        if updated_after is None:
+            logger.info(f"{notes_db_path} was never synced. Running a full sync.")
+        else:
+            logger.info(f"Extracting the notes of {notes_db_path} updated after {updated_after}")
+
+    with AppleNotesDBService(
+        model=Document,
+        notes_db_path=notes_db_path,
+        batch_size=batch_size,
+        max_workers=max_workers,
+        immutable=immutable,
+    ) as service:
+        documents = []
+        for batch in service.fetch_documents(updated_after=updated_after):
+            documents.extend(batch)
+        watermark = service.watermark
 
     step_context = get_step_context()
     step_context.add_output_metadata(
         output_name="apple_notes_documents",
         metadata={
-            "len_documents": len(documents)
+            "len_documents": len(documents),
+            "num_fetched": service.num_fetched,
+            "num_filtered": service.num_filtered,
+            "updated_after": updated_after if updated_after is not None else "",
+            "watermark": watermark if watermark is not None else "",
         },
     )
     
-    return documents
+    return documents, watermark
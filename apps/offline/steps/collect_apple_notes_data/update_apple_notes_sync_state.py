@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from loguru import logger
+from typing_extensions import Annotated
+from zenml import step, get_step_context
+
+from offline.infrastructure.sync_state import SyncState, Watermark
+
+@step
+def update_apple_notes_sync_state(
+    notes_db_path: Path,
+    watermark: Watermark | None,
+    sync_state_path: Path,
+) -> Annotated[Watermark | None, "watermark"]:
+    """Move the watermark of an Apple Notes database to the latest update of its notes.
+
+    The watermark is the latest update of the rows scanned by the extraction, not of
+    the extracted documents, so the notes filtered out as too large are not read again
+    by every sync.
+
+    It must run after the documents are saved, so a failed sync is fully retried by the
+    next one.
+
+    Args:
+        notes_db_path: Path of the synced Apple Notes SQLite database.
+        watermark: The watermark computed by the extraction of the sync.
+        sync_state_path: Path of the sync state holding the watermarks.
+
+    Returns:
+        Watermark | None: The new watermark, or None if the database was never synced.
+    """
+
+    sync_state = SyncState(sync_state_path)
+    previous_watermark = sync_state.get_watermark(str(notes_db_path))
+    if watermark is not None and watermark != previous_watermark:
+        sync_state.set_watermark(str(notes_db_path), watermark)
+    else:
+        watermark = previous_watermark
+        logger.info(f"No updated notes in {notes_db_path}. Keeping its watermark.")
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(
+        output_name="watermark",
+        metadata={
+            "notes_db_path": str(notes_db_path),
+            "watermark": watermark if watermark is not None else "",
+        },
+    )
+
+    return watermark
@@ -1,6 +1,7 @@
 from .extract_notion_documents_metadata import extract_notion_documents_metadata
 from .extract_notion_documents import extract_notion_documents
+from .update_notion_sync_state import update_notion_sync_state
 
 __all__ = [
-    "extract_notion_documents_metadata", "extract_notion_documents"
-]
\ No newline at end of file
+    "extract_notion_documents_metadata", "extract_notion_documents", "update_notion_sync_state"
+]
@@ -1,3 +1,4 @@
+from loguru import logger
 from typing_extensions import Annotated
 from zenml import step, get_step_context
 
@@ -5,27 +6,57 @@ from offline.domain import Document, DocumentMetadata
 from offline.infrastructure.notion import NotionDocumentClient
 
 @step
-def extract_notion_documents(documents_metadata: list[DocumentMetadata]) -> Annotated[list[Document], "notion_documents"]:
+def extract_notion_documents(
+    documents_metadata: list[DocumentMetadata],
+    max_concurrent_pages: int | None = None,
+    page_timeout_seconds: float | None = None,
+) -> Annotated[list[Document], "notion_documents"]:
     """Extract content from multiple Notion documents.
 
+    Pages are extracted in parallel. A page that fails or takes longer than
+    `page_timeout_seconds` is skipped and reported in the output metadata, without
+    stopping the others.
+
     Args:
         documents_metadata: List of document metadata to extract content from.
+        max_concurrent_pages: Number of pages extracted at the same time. Defaults to
+            settings.NOTION_MAX_CONCURRENT_PAGES.
+        page_timeout_seconds: Maximum duration of the extraction of a single page.
+            Defaults to settings.NOTION_PAGE_TIMEOUT_SECONDS.
 
     Returns:
         list[Document]: List of documents with their extracted content.
     """
 
     client = NotionDocumentClient()
-    documents = []
-    for document_metadata in documents_metadata:
-        documents.append(client.extract_document(document_metadata))
+    if max_concurrent_pages is not None:
+        client.crawler.max_concurrent_pages = max_concurrent_pages
+    if page_timeout_seconds is not None:
+        client.crawler.page_timeout_seconds = page_timeout_seconds
+
+    documents = client.extract_documents(documents_metadata)
+
+    crawler = client.crawler
+    if crawler.failed_pages:
+        logger.warning(
+            f"Failed to extract {len(crawler.failed_pages)}/{len(documents_metadata)} "
+            f"Notion pages: {list(crawler.failed_pages)}"
+        )
 
     step_context = get_step_context()
     step_context.add_output_metadata(
         output_name="notion_documents",
         metadata={
-            "len_documents": len(documents)
+            "len_documents": len(documents),
+            "num_failed_pages": len(crawler.failed_pages),
+            "failed_pages": crawler.failed_pages,
+            "num_requests": crawler.num_requests,
+            "num_retries": crawler.num_retries,
+            "duration_seconds": round(crawler.duration_seconds, 2),
+            "pages_per_second": round(
+                len(documents) / crawler.duration_seconds, 2
+            ) if crawler.duration_seconds > 0 else 0.0,
         },
     )
 
-    return documents
\ No newline at end of file
+    return documents
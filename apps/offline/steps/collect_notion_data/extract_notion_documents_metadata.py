@@ -1,23 +1,46 @@
+from pathlib import Path
+
 from loguru import logger
 from typing_extensions import Annotated
 from zenml import step, get_step_context
 
 from offline.domain import DocumentMetadata
 from offline.infrastructure.notion import NotionDatabaseClient
+from offline.infrastructure.sync_state import SyncState
 
 @step
-def extract_notion_documents_metadata(database_id: str) -> Annotated[list[DocumentMetadata], "notion_documents_metadata"]:
+def extract_notion_documents_metadata(
+    database_id: str,
+    incremental: bool = False,
+    sync_state_path: Path | None = None,
+) -> Annotated[list[DocumentMetadata], "notion_documents_metadata"]:
     """Extract metadata from Notion documents in a specified database.
 
     Args:
         database_id: The ID of the Notion database to query.
+        incremental: If True, only extract the documents edited since the watermark of
+            the previous sync of the database.
+        sync_state_path: Path of the sync state holding the watermarks. Required if
+            `incremental` is True.
     
     Returns:
         A list of DocumentMetadata objects containing the extracted information.
 
     """
+    edited_after = None
+    if incremental:
+        assert sync_state_path is not None, "sync_state_path is required in incremental mode"
+
+        edited_after = SyncState(sync_state_path).get_watermark(database_id)
+        if edited_after is None:
+            logger.info(f"Database {database_id} was never synced. Running a full sync.")
+        else:
+            logger.info(f"Extracting the documents of {database_id} edited since {edited_after}")
+
     client = NotionDatabaseClient()
-    documents_metadata = client.query_notion_database(database_id)
+    documents_metadata = client.query_notion_database(
+        database_id, edited_after=edited_after
+    )
 
     logger.info(
         f"Extracted {len(documents_metadata)} documents metadata from {database_id}"
@@ -29,7 +52,8 @@ def extract_notion_documents_metadata(database_id: str) -> Annotated[list[Docume
         metadata={
             "database_id": database_id,
             "len_documents_metadata": len(documents_metadata),
+            "edited_after": edited_after or "",
         }
     )
 
-    return documents_metadata
\ No newline at end of file
+    return documents_metadata
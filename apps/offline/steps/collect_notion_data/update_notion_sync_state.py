@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from loguru import logger
+from typing_extensions import Annotated
+from zenml import step, get_step_context
+
+from offline.domain import Document, DocumentMetadata
+from offline.infrastructure.sync_state import SyncState
+
+@step
+def update_notion_sync_state(
+    database_id: str,
+    documents_metadata: list[DocumentMetadata],
+    documents: list[Document],
+    sync_state_path: Path,
+) -> Annotated[str | None, "watermark"]:
+    """Move the watermark of a database to the latest edit of its extracted documents.
+
+    It must run after the documents are saved, so a failed sync is fully retried by the
+    next one. If some documents failed to be extracted, the watermark stops at the
+    oldest of them, so the next sync retries them.
+
+    Args:
+        database_id: The ID of the synced Notion database.
+        documents_metadata: Metadata of the documents queried by the sync.
+        documents: The documents extracted by the sync.
+        sync_state_path: Path of the sync state holding the watermarks.
+
+    Returns:
+        str | None: The new watermark, or None if the database was never synced.
+    """
+
+    sync_state = SyncState(sync_state_path)
+    # ISO 8601 timestamps in UTC sort chronologically as strings.
+    extracted_ids = {document.id for document in documents}
+    edited_times = [
+        metadata.properties["last_edited_time"]
+        for metadata in documents_metadata
+        if metadata.properties.get("last_edited_time")
+    ]
+    failed_edited_times = [
+        metadata.properties["last_edited_time"]
+        for metadata in documents_metadata
+        if metadata.id not in extracted_ids and metadata.properties.get("last_edited_time")
+    ]
+    if failed_edited_times:
+        watermark = min(failed_edited_times)
+        previous_watermark = sync_state.get_watermark(database_id)
+        if previous_watermark is None or watermark > previous_watermark:
+            sync_state.set_watermark(database_id, watermark)
+        else:
+            watermark = previous_watermark
+        logger.warning(
+            f"{len(failed_edited_times)} documents of {database_id} failed. The next sync "
+            f"retries them from {watermark}."
+        )
+    elif edited_times:
+        watermark = max(edited_times)
+        sync_state.set_watermark(database_id, watermark)
+    else:
+        watermark = sync_state.get_watermark(database_id)
+        logger.info(f"No edited documents in {database_id}. Keeping its watermark.")
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(
+        output_name="watermark",
+        metadata={
+            "database_id": database_id,
+            "watermark": watermark or "",
+        },
+    )
+
+    return watermark
@@ -1,7 +1,9 @@
+from .build_local_ann_index import build_local_ann_index
 from .filter_by_quality import filter_by_quality
 from .chunk_embed_load import chunk_embed_load
 
 __all__ = [
+    "build_local_ann_index",
     "filter_by_quality",
     "chunk_embed_load",
 ]
\ No newline at end of file
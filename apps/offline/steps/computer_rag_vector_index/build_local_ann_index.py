@@ -0,0 +1,54 @@
+from typing_extensions import Annotated
+from loguru import logger
+from zenml import step, get_step_context
+
+from offline.config import settings
+from offline.infrastructure.local import LocalVectorIndex
+
+
+@step
+def build_local_ann_index(
+    n_lists: int | None = None,
+    nprobe: int = 8,
+    recall_k: int = 10,
+    recall_num_queries: int = 200,
+) -> Annotated[dict, "ann_recall_report"]:
+    """Build an IVF index over the local vector index and report its recall.
+
+    The IVF index is written next to the vectors at `settings.LOCAL_VECTOR_INDEX_DIR`,
+    where the online 'local' retriever loads it. Its recall@k against exact search is
+    measured for a range of `nprobe` values around the default one and attached to the
+    step output as metadata.
+
+    Args:
+        n_lists: Number of inverted lists. Defaults to 4 * sqrt(number of vectors).
+        nprobe: Default number of lists searched per query. Defaults to 8.
+        recall_k: Number of results per query used to measure recall. Defaults to 10.
+        recall_num_queries: Number of queries sampled to measure recall. Defaults to 200.
+
+    Returns:
+        dict: The recall and latency report.
+    """
+
+    index = LocalVectorIndex(settings.LOCAL_VECTOR_INDEX_DIR)
+    assert index.count > 0, (
+        f"The local vector index at '{settings.LOCAL_VECTOR_INDEX_DIR}' is empty"
+    )
+
+    index.build_ivf(n_lists=n_lists, nprobe=nprobe)
+
+    nprobes = {1, max(nprobe // 2, 1), nprobe, nprobe * 2, nprobe * 4}
+    report = index.recall_report(
+        k=recall_k, num_queries=recall_num_queries, nprobes=sorted(nprobes)
+    )
+    for probe, metrics in report["nprobe"].items():
+        logger.info(
+            f"nprobe={probe}: recall@{recall_k}={metrics['recall']:.3f}, "
+            f"{metrics['latency_ms']:.2f} ms/query "
+            f"(exact: {report['exact_latency_ms']:.2f} ms/query)"
+        )
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(output_name="ann_recall_report", metadata=report)
+
+    return report
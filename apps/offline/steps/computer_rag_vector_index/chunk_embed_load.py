@@ -1,25 +1,25 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Generator
-from zenml import step
+from contextlib import ExitStack
+from typing import Iterator
+
 from loguru import logger
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_mongodb.retrievers import (
-    MongoDBAtlasParentDocumentRetriever,
-)
+from zenml import step
 from langchain_core.documents import Document as LangChainDocument
-from tqdm import tqdm
 
 from offline.domain.document import Document
 from offline.application.rag import get_retriever
+from offline.application.rag.incremental import IncrementalIndex, IndexDiff
+from offline.application.rag.indexing import IndexingPipeline
 from offline.application.rag.splitters import get_splitter
-from offline.application.rag.retrievers import RetrieverType
-from offline.application.rag.embeddings import EmbeddingModelType
+from offline.application.rag.retrievers import LOCAL_RETRIEVER_TYPES, RetrieverType
+from offline.application.rag.embeddings import EmbeddingBatcher, EmbeddingModelType
 from offline.application.rag.splitters import SummarizationType
-from offline.infrastructure.mongo import MongoDBService, MongoDBIndex
+from offline.infrastructure.mongo import IndexVersionStamp, MongoDBService, MongoDBIndex
+
+from .filter_by_quality import get_quality_query
 
 @step
 def chunk_embed_load(
-    documents: list[Document],
+    documents: list[Document] | None,
     collection_name: str,
     processing_batch_size: int,
     processing_max_workers: int,
@@ -28,31 +28,72 @@ def chunk_embed_load(
     embedding_model_type: EmbeddingModelType,
     embedding_model_dim: int,
     chunk_size: int,
+    embedding_batch_max_tokens: int = 50_000,
+    embedding_batch_max_size: int = 512,
     contextual_summarization_type: SummarizationType = "none",
     contextual_agent_model_id: str | None = None,
     contextual_agent_max_characters: int | None = None,
+    contextual_agent_chunks_per_request: int = 16,
     mock: bool = False,
     device: str = "cpu",
+    incremental: bool = False,
+    extract_collection_name: str | None = None,
+    fetch_limit: int = 0,
+    fetch_batch_size: int = 1000,
+    content_quality_score_threshold: float = 0.0,
+    processing_queue_size: int = 8,
 ) -> None:
     """Process documents by chunking, embedding, and loading into MongoDB.
 
+    Documents are streamed through split, batch and write stages connected by
+    bounded queues, so the stages overlap and memory does not grow with the corpus.
+    If `documents` is None, they are streamed straight from `extract_collection_name`
+    in batches of `_id` range queries instead of being passed in as an artifact.
+
+    In incremental mode, documents are diffed by id and content hash against the
+    collection: only new or changed documents are indexed, chunks of changed or removed
+    documents are deleted, and the existing search indexes are left in place. Removed
+    documents are only detected if the source is read in full, without a fetch limit
+    or quality threshold. In both modes, documents that were only partly written are
+    deleted again, so no content hash is recorded for them and the next incremental run
+    indexes them again, and the version stamp of the collection is bumped once it is
+    written.
+
+    With the "local" and "local_hybrid" retrievers, chunks are written to the local
+    vector index at `settings.LOCAL_VECTOR_INDEX_DIR` instead of MongoDB, which is
+    always rebuilt. With "local_hybrid", a BM25 index of the chunks is built alongside.
+
     Args:
-        documents: List of documents to process.
+        documents: List of documents to process, or None to stream them from MongoDB.
         collection_name: Name of MongoDB collection to store documents.
         processing_batch_size: Number of documents to process in each batch.
-        processing_max_workers: Maximum number of concurrent processing threads.
+        processing_max_workers: Number of concurrent splitting threads.
         retriever_type: Type of retriever to use for document processing.
         embedding_model_id: Identifier for the embedding model.
         embedding_model_type: Type of embedding model to use.
         embedding_model_dim: Dimension of the embedding vectors.
         chunk_size: Size of text chunks for splitting documents.
+        embedding_batch_max_tokens: Token budget of a single embedding request. Defaults to 50,000.
+        embedding_batch_max_size: Maximum number of chunks in a single embedding request. Defaults to 512.
         contextual_summarization_type: Type of summarization to apply. Defaults to "none".
         contextual_agent_model_id: ID of the model used for contextual summarization. Defaults to None.
         contextual_agent_max_characters: Maximum characters for contextual summarization. Defaults to None.
+        contextual_agent_chunks_per_request: Number of chunks of a document situated by a single
+            contextual summarization request. Defaults to 16.
         mock: Whether to use mock processing. Defaults to False.
         device: Device to run embeddings on ('cpu' or 'cuda'). Defaults to 'cpu'.
+        incremental: Whether to update the collection instead of rebuilding it. Defaults to False.
+        extract_collection_name: Collection to stream documents from when `documents` is None.
+        fetch_limit: Maximum number of documents to stream. Defaults to 0 (no limit).
+        fetch_batch_size: Number of documents read per MongoDB query. Defaults to 1000.
+        content_quality_score_threshold: Minimum quality score of streamed documents. Defaults to 0.0.
+        processing_queue_size: Number of items buffered between the pipeline stages. Defaults to 8.
     """
 
+    assert not (incremental and retriever_type in LOCAL_RETRIEVER_TYPES), (
+        "Incremental indexing is not supported by the local retrievers"
+    )
+
     retriever = get_retriever(
         embedding_model_id=embedding_model_id,
         embedding_model_type=embedding_model_type,
@@ -60,6 +101,10 @@ def chunk_embed_load(
         device=device,
     )
 
+    summarization_kwargs = {}
+    if contextual_summarization_type == "contextual":
+        summarization_kwargs["chunks_per_request"] = contextual_agent_chunks_per_request
+
     splitter = get_splitter(
         chunk_size=chunk_size,
         summarization_type=contextual_summarization_type,
@@ -67,28 +112,93 @@ def chunk_embed_load(
         max_characters=contextual_agent_max_characters,
         mock=False,
         max_concurrent_requests=processing_max_workers,
+        **summarization_kwargs,
     )
 
-    with MongoDBService(
-        model=Document, collection_name=collection_name
-    ) as mongodb_client:
-        mongodb_client.clear_collection()
+    with ExitStack() as stack:
+        mongodb_client = stack.enter_context(
+            MongoDBService(model=Document, collection_name=collection_name)
+        )
 
-        docs = [
-            LangChainDocument(
-                page_content=doc.content, metadata=doc.metadata.model_dump()
+        if documents is None:
+            assert extract_collection_name, (
+                "extract_collection_name is required to stream documents from MongoDB"
             )
-            for doc in documents
-            if doc
-        ]
-        process_docs(
-            retriever,
-            docs,
+
+            source_client = stack.enter_context(
+                MongoDBService(model=Document, collection_name=extract_collection_name)
+            )
+            query = get_quality_query(content_quality_score_threshold)
+            total = source_client.get_collection_count(query)
+            if fetch_limit:
+                total = min(total, fetch_limit)
+            source_documents = source_client.iter_documents(
+                query=query,
+                limit=fetch_limit,
+                projection={"child_urls": 0, "summary": 0},
+                batch_size=fetch_batch_size,
+            )
+        else:
+            total = len(documents)
+            source_documents = iter(documents)
+
+        incremental_index = IncrementalIndex(
+            collection=mongodb_client.collection,
+            fingerprint=(
+                f"{retriever_type}:{embedding_model_type}/{embedding_model_id}:{chunk_size}:"
+                f"{contextual_summarization_type}:{contextual_agent_model_id}:{contextual_agent_max_characters}"
+                # Only set for summarization types using them, so other fingerprints
+                # are unchanged.
+                + "".join(
+                    f":{key}={value}" for key, value in sorted(summarization_kwargs.items())
+                )
+            ),
+            parent_id_key=getattr(retriever, "id_key", None),
+        )
+
+        source_documents = (doc for doc in source_documents if doc)
+        diff = IndexDiff()
+        if incremental:
+            source_documents = incremental_index.select(
+                source_documents,
+                diff,
+                complete=not fetch_limit and not content_quality_score_threshold,
+            )
+            total = None
+        elif retriever_type in LOCAL_RETRIEVER_TYPES:
+            retriever.vectorstore.clear()
+        else:
+            mongodb_client.clear_collection()
+
+        batcher = EmbeddingBatcher(
+            max_batch_tokens=embedding_batch_max_tokens,
+            max_batch_size=embedding_batch_max_size,
+        )
+        pipeline = IndexingPipeline(
+            retriever=retriever,
             splitter=splitter,
+            batcher=batcher,
             batch_size=processing_batch_size,
             max_workers=processing_max_workers,
+            queue_size=processing_queue_size,
+            id_key=incremental_index.id_field,
+        )
+        stats = pipeline.run(
+            to_langchain_documents(source_documents, incremental_index), total=total
         )
 
+        if retriever_type in LOCAL_RETRIEVER_TYPES:
+            return
+
+        if incremental:
+            incremental_index.delete(diff.removed_ids)
+
+        if stats.failed_ids:
+            logger.warning(
+                f"Deleting the records of {len(stats.failed_ids)} partly indexed documents."
+            )
+            incremental_index.delete(stats.failed_ids)
+
         index = MongoDBIndex(
             retriever=retriever,
             mongodb_client=mongodb_client,
@@ -99,85 +209,27 @@ def chunk_embed_load(
             is_hybrid=retriever_type == "contextual",
         )
 
-def process_docs(
-    retriever: Any,
-    docs: list[LangChainDocument],
-    splitter: RecursiveCharacterTextSplitter,
-    batch_size: int = 4,
-    max_workers: int = 2,
-) -> list[None]:
-    """Process LangChain documents into MongoDB using thread pool.
-
-    Args:
-        retriever: MongoDB Atlas document retriever instance.
-        docs: List of LangChain documents to process.
-        splitter: Text splitter instance for chunking documents.
-        batch_size: Number of documents to process in each batch.
-        max_workers: Maximum number of concurrent threads.
-
-    Returns:
-        List of None values representing completed batch processing results.
-    """
-
-    batches = list(get_batches(docs, batch_size))
-    results = []
-    total_docs = len(docs)
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [
-            executor.submit(process_batch, retriever, batch, splitter)
-            for batch in batches
-        ]
-
-        with tqdm(total=total_docs, desc="Processing documents") as pbar:
-            for future in as_completed(futures):
-                result = future.result()
-                results.append(result)
-                pbar.update(batch_size)
-
-    return results
-
+        # Invalidate the retrieval results cached by the online app.
+        IndexVersionStamp(mongodb_client.collection).bump()
 
-def get_batches(
-    docs: list[LangChainDocument], batch_size: int
-) -> Generator[list[LangChainDocument], None, None]:
-    """Return batches of documents to ingest into MongoDB.
+def to_langchain_documents(
+    documents: Iterator[Document], incremental_index: IncrementalIndex
+) -> Iterator[LangChainDocument]:
+    """Lazily convert documents to LangChain documents tagged with their content hash.
 
     Args:
-        docs: List of LangChain documents to batch.
-        batch_size: Number of documents in each batch.
+        documents: Documents to convert.
+        incremental_index: Index used to compute the content hash of each document.
 
     Yields:
-        Generator[list[LangChainDocument]]: Batches of documents of size batch_size.
+        LangChainDocument: The document content with its metadata and content hash.
     """
 
-    for i in range(0, len(docs), batch_size):
-        yield docs[i : i + batch_size]
-
-
-def process_batch(
-    retriever: Any,
-    batch: list[LangChainDocument],
-    splitter: RecursiveCharacterTextSplitter,
-) -> None:
-    """Ingest batches of documents into MongoDB by splitting and embedding.
-
-    Args:
-        retriever: MongoDB Atlas document retriever instance.
-        batch: List of documents to ingest in this batch.
-        splitter: Text splitter instance for chunking documents.
-
-    Raises:
-        Exception: If there is an error processing the batch of documents.
-    """
-
-    try:
-        if isinstance(retriever, MongoDBAtlasParentDocumentRetriever):
-            retriever.add_documents(batch)
-        else:
-            split_docs = splitter.split_documents(batch)
-            retriever.vectorstore.add_documents(split_docs)
-
-        logger.info(f"Successfully processed {len(batch)} documents.")
-    except Exception as e:
-        logger.warning(f"Error processing batch of {len(batch)} documents: {str(e)}")
+    for doc in documents:
+        yield LangChainDocument(
+            page_content=doc.content,
+            metadata={
+                **doc.metadata.model_dump(),
+                incremental_index.hash_field: incremental_index.content_hash(doc),
+            },
+        )
@@ -42,4 +42,27 @@ def filter_by_quality(
         },
     )
 
-    return valid_docs
\ No newline at end of file
+    return valid_docs
+
+def get_quality_query(content_quality_score_threshold: float) -> dict:
+    """Build the MongoDB query equivalent to the `filter_by_quality` step.
+
+    Documents without a quality score (or with a score of 0) are kept, as in the step.
+
+    Args:
+        content_quality_score_threshold: Minimum quality score for documents to be included.
+
+    Returns:
+        dict: MongoDB query filter.
+    """
+
+    assert 0 <= content_quality_score_threshold <= 1, (
+        "Content quality score threshold must be between 0 and 1"
+    )
+
+    return {
+        "$or": [
+            {"content_quality_score": {"$in": [None, 0]}},
+            {"content_quality_score": {"$gt": content_quality_score_threshold}},
+        ]
+    }
@@ -1,4 +1,6 @@
 from .save_documents_to_disk import save_documents_to_disk
+from .merge_documents_to_disk import merge_documents_to_disk
+from .delete_directories import delete_directories
 from .read_documents_from_disk import read_documents_from_disk
 from .ingest_to_mongodb import ingest_to_mongodb
 from .fetch_from_mongodb import fetch_from_mongodb
@@ -7,6 +9,8 @@ from .push_to_huggingface import push_to_huggingface
 
 __all__ = [
     "save_documents_to_disk",
+    "merge_documents_to_disk",
+    "delete_directories",
     "read_documents_from_disk",
     "ingest_to_mongodb",
     "fetch_from_mongodb",
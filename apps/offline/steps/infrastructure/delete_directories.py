@@ -0,0 +1,44 @@
+import shutil
+from pathlib import Path
+
+from loguru import logger
+from typing_extensions import Annotated
+from zenml import step, get_step_context
+
+@step
+def delete_directories(
+    directories: list[str], delete_empty_parents: bool = False
+) -> Annotated[int, "deleted"]:
+    """Delete directories, e.g. the incremental syncs consumed by an ETL run.
+
+    Args:
+        directories: The directories to delete. Missing ones are ignored.
+        delete_empty_parents: If True, also delete the parents of the directories that
+            are left empty, e.g. the run directory of an incremental sync.
+
+    Returns:
+        int: Number of deleted directories.
+    """
+
+    deleted = 0
+    for directory in map(Path, directories):
+        if directory.exists():
+            shutil.rmtree(directory)
+            deleted += 1
+            logger.info(f"Deleted '{directory}'")
+
+    if delete_empty_parents:
+        for parent in {Path(directory).parent for directory in directories}:
+            if parent.exists() and not any(parent.iterdir()):
+                parent.rmdir()
+                logger.info(f"Deleted '{parent}'")
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(
+        output_name="deleted",
+        metadata={
+            "count": deleted,
+        },
+    )
+
+    return deleted
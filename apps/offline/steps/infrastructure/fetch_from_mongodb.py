@@ -7,10 +7,28 @@ from offline.infrastructure.mongo import MongoDBService
 @step
 def fetch_from_mongodb(
         collection_name: str, 
-        limit: int
+        limit: int,
+        exclude_fields: list[str] | None = None,
+        batch_size: int = 1000,
     ) -> Annotated[list[dict], "documents"]:
+    """Fetch documents from a MongoDB collection.
+
+    Args:
+        collection_name: Name of the MongoDB collection to fetch from.
+        limit: Maximum number of documents to fetch.
+        exclude_fields: Optional fields left out of the fetched documents, such as
+            `child_urls` or `summary` when only the content is needed.
+        batch_size: Number of documents read per MongoDB query.
+
+    Returns:
+        list[Document]: The fetched documents.
+    """
+
+    projection = {field: 0 for field in exclude_fields} if exclude_fields else None
     with MongoDBService(model=Document, collection_name=collection_name) as service:
-        documents = service.fetch_documents(limit, query={})
+        documents = service.fetch_documents(
+            limit, query={}, projection=projection, batch_size=batch_size
+        )
 
     step_context = get_step_context()
     step_context.add_output_metadata(
@@ -7,7 +7,11 @@ from offline.infrastructure.mongo.service import MongoDBService
 
 @step
 def ingest_to_mongodb(
-    models: list[BaseModel], collection_name: str, clear_collection: bool = True
+    models: list[BaseModel],
+    collection_name: str,
+    clear_collection: bool = True,
+    upsert: bool = False,
+    batch_size: int = 1000,
 ) -> Annotated[int, "output"]:
     """ZenML step to ingest documents into MongoDB.
 
@@ -15,6 +19,9 @@ def ingest_to_mongodb(
         models: List of Pydantic BaseModel instances to ingest into MongoDB.
         collection_name: Name of the MongoDB collection to ingest into.
         clear_collection: If True, clears the collection before ingestion. Defaults to True.
+        upsert: If True, replaces documents with the same id instead of inserting
+            duplicates. Defaults to False.
+        batch_size: Number of documents written per unordered bulk write. Defaults to 1000.
 
     Returns:
         int: Number of documents in the collection after ingestion.
@@ -36,7 +43,9 @@ def ingest_to_mongodb(
             )
             service.clear_collection()
             
-        service.ingest_documents(models)
+        stats = service.bulk_write_documents(
+            models, batch_size=batch_size, upsert=upsert
+        )
 
         count = service.get_collection_count()
         logger.info(
@@ -49,6 +58,9 @@ def ingest_to_mongodb(
         output_name="output",
         metadata={
             "count": count,
+            "written": stats.written,
+            "failed": stats.failed,
+            "docs_per_second": stats.written / max(stats.seconds, 1e-9),
         },
     )
 
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from loguru import logger
+from typing_extensions import Annotated
+from zenml import step, get_step_context
+
+from offline.domain import Document
+from offline.infrastructure.corpus import is_packed_corpus
+
+from .read_documents_from_disk import get_json_files, get_packed_shards, load_documents
+from .save_documents_to_disk import CorpusFormat, write_documents
+
+@step
+def merge_documents_to_disk(
+    documents: Annotated[list[Document], "documents"],
+    output_dir: Path,
+    corpus_format: CorpusFormat = "json",
+    documents_per_shard: int = 10_000,
+) -> Annotated[str, "output"]:
+    """Merge documents into a directory, replacing the documents with the same id.
+
+    Unlike `save_documents_to_disk`, the documents already in the directory are kept,
+    so an incremental sync can be merged into the snapshot of a full one.
+
+    Args:
+        documents: The documents to merge.
+        output_dir: The directory to merge the documents into.
+        corpus_format: "json" writes one JSON file per document, overwriting the file of
+            the previous version of the document. "packed" rewrites the whole corpus
+            with the merged documents.
+        documents_per_shard: Maximum number of documents per shard of a packed corpus.
+
+    Returns:
+        str: The output directory.
+    """
+
+    if corpus_format == "json" and not is_packed_corpus(output_dir):
+        for document in documents:
+            document.write(output_dir=output_dir, obfuscate=True, also_save_as_txt=False)
+        count = len(get_json_files(output_dir))
+    else:
+        merged: dict[str, Document] = {}
+        if output_dir.exists():
+            existing = load_documents(
+                get_json_files(output_dir), shards=get_packed_shards(output_dir)
+            )
+            merged.update((document.id, document) for document in existing)
+        merged.update((document.id, document) for document in documents)
+        count = len(merged)
+
+        write_documents(
+            list(merged.values()),
+            output_dir=output_dir,
+            corpus_format=corpus_format,
+            documents_per_shard=documents_per_shard,
+        )
+
+    logger.info(f"Merged {len(documents)} documents into '{output_dir}' ({count} documents)")
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(
+        output_name="output",
+        metadata={
+            "merged": len(documents),
+            "count": count,
+            "output_dir": str(output_dir),
+            "corpus_format": corpus_format,
+        },
+    )
+
+    return str(output_dir)
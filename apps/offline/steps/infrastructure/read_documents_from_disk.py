@@ -1,29 +1,88 @@
-
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 from loguru import logger
+from tqdm import tqdm
 from typing_extensions import Annotated
 from zenml.steps import step, get_step_context
 
 from offline.domain.document import Document
+from offline.infrastructure.corpus import is_packed_corpus, read_shard
 
 @step
 def read_documents_from_disk(
-    data_directory: Path, nesting_level: int = 0
+    data_directory: Path,
+    nesting_level: int = 0,
+    max_workers: int | None = None,
+    files_per_task: int = 64,
+    ordered: bool = True,
+    subdirectories: list[str] | None = None,
 ) -> Annotated[list[Document], "documents"]:
-    pages: list[Document] = []
+    """Read documents from the JSON files or packed corpora of a directory.
+
+    Files are read and validated in parallel by a process pool, in tasks of
+    `files_per_task` files, so loading large crawls is not bound to a single core.
+    Directories holding a packed corpus (see `save_documents_to_disk`) are read
+    one shard per task instead.
+
+    Args:
+        data_directory: Directory containing the JSON files or packed corpora.
+        nesting_level: Depth of the subdirectories holding the documents.
+        max_workers: Number of worker processes. Defaults to the number of CPUs.
+            1 reads the files in the current process.
+        files_per_task: Number of JSON files read by a worker per task.
+        ordered: Whether to keep the order of the files. If False, documents are
+            returned as soon as their task completes.
+        subdirectories: Optional names of the subdirectories of `data_directory` to
+            read, e.g. the runs of an incremental sync. A document found in several of
+            them is only read from the last one.
+
+    Returns:
+        list[Document]: The documents read from disk.
+    """
 
     logger.info(f"Reading documents from '{data_directory}")
 
     if not data_directory.exists():
         raise FileNotFoundError(f"Directory not found: '{data_directory}")
 
-    json_files = get_json_files(
-        data_directory=data_directory, nesting_level=nesting_level
-    )
-    for json_file in json_files:
-        page = Document.from_file(json_file)
-        pages.append(page)
+    if subdirectories is None:
+        json_files = get_json_files(
+            data_directory=data_directory, nesting_level=nesting_level
+        )
+        shards = get_packed_shards(
+            data_directory=data_directory, nesting_level=nesting_level
+        )
+        pages = load_documents(
+            json_files,
+            shards=shards,
+            max_workers=max_workers,
+            files_per_task=files_per_task,
+            ordered=ordered,
+        )
+    else:
+        assert nesting_level > 0, "Reading subdirectories requires a nesting_level > 0"
+
+        latest_pages: dict[str, Document] = {}
+        for subdirectory in subdirectories:
+            json_files = get_json_files(
+                data_directory=data_directory / subdirectory,
+                nesting_level=nesting_level - 1,
+            )
+            shards = get_packed_shards(
+                data_directory=data_directory / subdirectory,
+                nesting_level=nesting_level - 1,
+            )
+            subdirectory_pages = load_documents(
+                json_files,
+                shards=shards,
+                max_workers=max_workers,
+                files_per_task=files_per_task,
+                ordered=ordered,
+            )
+            latest_pages.update((page.id, page) for page in subdirectory_pages)
+        pages = list(latest_pages.values())
 
     logger.info(f"Successfully read {len(pages)} documents from disk.")
 
@@ -37,6 +96,63 @@ def read_documents_from_disk(
 
     return pages
 
+def load_documents(
+    json_files: list[Path],
+    shards: list[Path] | None = None,
+    max_workers: int | None = None,
+    files_per_task: int = 64,
+    ordered: bool = True,
+) -> list[Document]:
+    files_per_task = max(files_per_task, 1)
+    tasks = [
+        (Document.from_files, json_files[i : i + files_per_task])
+        for i in range(0, len(json_files), files_per_task)
+    ]
+    tasks.extend((read_shard, shard, Document) for shard in shards or [])
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if max_workers <= 1:
+        return [page for fn, *args in tasks for page in fn(*args)]
+
+    logger.debug(
+        f"Loading {len(json_files)} files and {len(shards or [])} shards in {len(tasks)} tasks "
+        f"with {max_workers} processes."
+    )
+
+    pages: list[Document] = []
+    with (
+        ProcessPoolExecutor(max_workers=max_workers) as executor,
+        tqdm(desc="Reading documents", unit="doc") as pbar,
+    ):
+        futures = [executor.submit(fn, *args) for fn, *args in tasks]
+        if ordered:
+            results = (future.result() for future in futures)
+        else:
+            results = (future.result() for future in as_completed(futures))
+
+        for documents in results:
+            pages.extend(documents)
+            pbar.update(len(documents))
+
+    return pages
+
+def get_packed_shards(data_directory: Path, nesting_level: int = 0) -> list[Path]:
+    if nesting_level == 0:
+        if not is_packed_corpus(data_directory):
+            return []
+
+        return sorted(data_directory.glob("shard-*.jsonl.gz"))
+
+    shards = []
+    for database_dir in data_directory.iterdir():
+        if database_dir.is_dir():
+            shards.extend(
+                get_packed_shards(
+                    data_directory=database_dir, nesting_level=nesting_level - 1
+                )
+            )
+
+    return shards
+
 def get_json_files(data_directory: Path, nesting_level: int = 0) -> list[Path]:
     if nesting_level == 0:
         return list(data_directory.glob("*.json"))
@@ -49,4 +165,4 @@ def get_json_files(data_directory: Path, nesting_level: int = 0) -> list[Path]:
                 )
                 json_files.extend(nested_json_files)
 
-        return json_files
\ No newline at end of file
+        return json_files
@@ -1,22 +1,42 @@
 import shutil
 from pathlib import Path
+from typing import Literal
 
 from typing_extensions import Annotated
 from zenml import step, get_step_context
 
 from offline.domain import Document
+from offline.infrastructure.corpus import PackedCorpusWriter
+
+CorpusFormat = Literal["json", "packed"]
 
 @step
 def save_documents_to_disk(
     documents: Annotated[list[Document], "documents"],
     output_dir: Path,
+    corpus_format: CorpusFormat = "json",
+    documents_per_shard: int = 10_000,
 ) -> Annotated[str, "output"]:
-    if output_dir.exists():
-        shutil.rmtree(output_dir)
-    output_dir.mkdir(parents=True)
+    """Save documents to a directory, replacing its previous content.
 
-    for document in documents:
-        document.write(output_dir=output_dir, obfuscate=True, also_save_as_txt=False)
+    Args:
+        documents: The documents to save.
+        output_dir: The directory to write the documents to.
+        corpus_format: "json" writes one JSON file per document. "packed" writes
+            gzip-compressed JSONL shards with an id index, for sequential reads and
+            random access by document id.
+        documents_per_shard: Maximum number of documents per shard of a packed corpus.
+
+    Returns:
+        str: The output directory.
+    """
+
+    write_documents(
+        documents,
+        output_dir=output_dir,
+        corpus_format=corpus_format,
+        documents_per_shard=documents_per_shard,
+    )
 
     step_context = get_step_context()
     step_context.add_output_metadata(
@@ -24,7 +44,36 @@ def save_documents_to_disk(
         metadata={
             "count": len(documents),
             "output_dir": str(output_dir),
+            "corpus_format": corpus_format,
         },
     )
 
-    return str(output_dir)
\ No newline at end of file
+    return str(output_dir)
+
+def write_documents(
+    documents: list[Document],
+    output_dir: Path,
+    corpus_format: CorpusFormat = "json",
+    documents_per_shard: int = 10_000,
+) -> None:
+    # Write next to the output directory first and swap it in, so readers never see a
+    # partially written directory.
+    tmp_dir = output_dir.with_name(output_dir.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    if corpus_format == "packed":
+        with PackedCorpusWriter(
+            tmp_dir, records_per_shard=documents_per_shard
+        ) as writer:
+            for document in documents:
+                document.obfuscate()
+                writer.write(document)
+    else:
+        for document in documents:
+            document.write(output_dir=tmp_dir, obfuscate=True, also_save_as_txt=False)
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    tmp_dir.rename(output_dir)
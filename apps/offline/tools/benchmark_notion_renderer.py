@@ -0,0 +1,109 @@
+import time
+
+import click
+
+from offline.infrastructure.notion import NotionBlockRenderer
+
+
+def build_paragraph(text: str) -> dict:
+    """Build a synthetic paragraph block with a link."""
+
+    return {
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [
+                {"plain_text": text},
+                {"plain_text": "link", "href": f"https://example.com/{text}"},
+            ]
+        },
+    }
+
+
+def build_deep_tree(depth: int) -> list[dict]:
+    """Build a chain of `depth` nested toggles, each holding a paragraph."""
+
+    blocks: list[dict] = [build_paragraph("leaf")]
+    for level in range(depth):
+        blocks = [
+            build_paragraph(f"paragraph {level}"),
+            {"type": "toggle", "has_children": True, "children": blocks},
+        ]
+
+    return blocks
+
+
+def build_wide_tree(num_blocks: int, fanout: int = 10) -> list[dict]:
+    """Build a balanced tree of about `num_blocks` blocks, `fanout` children per block."""
+
+    blocks = [build_paragraph(f"paragraph {index}") for index in range(num_blocks)]
+    for index in range(len(blocks) - 1, 0, -1):
+        parent = blocks[(index - 1) // fanout]
+        parent["has_children"] = True
+        parent.setdefault("children", []).insert(0, blocks[index])
+
+    return blocks[:1]
+
+
+def count_blocks(blocks: list[dict]) -> int:
+    """Count the blocks of a tree, iteratively as deep trees exceed the recursion limit."""
+
+    num_blocks = 0
+    stack = list(blocks)
+    while stack:
+        block = stack.pop()
+        num_blocks += 1
+        stack.extend(block.get("children", []))
+
+    return num_blocks
+
+
+def time_render(renderer: NotionBlockRenderer, blocks: list[dict], repeats: int) -> float:
+    """Best time out of `repeats` renders, in seconds."""
+
+    timings = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        renderer.render(blocks)
+        timings.append(time.perf_counter() - started_at)
+
+    return min(timings)
+
+
+@click.command(
+    help="""
+Micro-benchmark of the Notion block renderer over synthetic block trees.
+
+Rendering is linear if the time per output character stays flat as the trees get
+deeper or larger. Deep trees have quadratic output, as every line is indented by its
+depth.
+"""
+)
+@click.option("--max-depth", default=800, help="Depth of the deepest nested tree.")
+@click.option("--max-blocks", default=100_000, help="Number of blocks of the largest wide tree.")
+@click.option("--repeats", default=5, help="Number of renders per tree, keeping the best time.")
+def main(max_depth: int, max_blocks: int, repeats: int) -> None:
+    renderer = NotionBlockRenderer()
+
+    trees = []
+    depth = 50
+    while depth <= max_depth:
+        trees.append((f"deep (depth={depth})", build_deep_tree(depth)))
+        depth *= 2
+    num_blocks = 1_000
+    while num_blocks <= max_blocks:
+        trees.append((f"wide (blocks={num_blocks})", build_wide_tree(num_blocks)))
+        num_blocks *= 10
+
+    click.echo(f"{'tree':<24}{'blocks':>10}{'chars':>12}{'time (ms)':>12}{'ns/char':>10}")
+    for name, blocks in trees:
+        content, _ = renderer.render(blocks)
+        seconds = time_render(renderer, blocks, repeats)
+        num_tree_blocks = count_blocks(blocks)
+        click.echo(
+            f"{name:<24}{num_tree_blocks:>10}{len(content):>12}"
+            f"{seconds * 1000:>12.2f}{seconds * 1e9 / len(content):>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
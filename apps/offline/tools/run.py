@@ -60,6 +60,18 @@ Main entry point for the pipeline execution.
     default=False,
     help="Whether to run the generate dataset pipeline.",
 )
+@click.option(
+    "--run-compute-rag-vector-index-openai-local-pipeline",
+    is_flag=True,
+    default=False,
+    help="Whether to run the compute RAG vector index pipeline with the local retriever.",
+)
+@click.option(
+    "--run-compute-rag-vector-index-openai-local-hybrid-pipeline",
+    is_flag=True,
+    default=False,
+    help="Whether to run the compute RAG vector index pipeline with the local hybrid search retriever.",
+)
 def main(
     no_cache: bool = False,
     run_collect_notion_data_pipeline: bool = False,
@@ -68,6 +80,8 @@ def main(
     run_etl_apple_notes_pipeline: bool = False,
     run_generate_dataset_pipeline: bool = False,
     run_compute_rag_vector_index_openai_parent_pipeline: bool = False,
+    run_compute_rag_vector_index_openai_local_pipeline: bool = False,
+    run_compute_rag_vector_index_openai_local_hybrid_pipeline: bool = False,
 ) -> None:
     pipeline_args: dict[str, Any] = {
         "enable_cache": not no_cache,
@@ -124,6 +138,24 @@ def main(
         pipeline_args["run_name"] = f"compute_rag_vector_index_openai_parent_run_{dt.now().strftime('%Y_%m_%d_%H_%M_%S')}"
         compute_rag_vector_index.with_options(**pipeline_args)(**run_args)
 
+    if run_compute_rag_vector_index_openai_local_pipeline:
+        run_args = {}
+        pipeline_args["config_path"] = root_dir / "configs" / "compute_rag_vector_index_openai_local.yaml"
+        assert pipeline_args["config_path"].exists(), (
+            f"Config file not found: {pipeline_args['config_path']}"
+        )
+        pipeline_args["run_name"] = f"compute_rag_vector_index_openai_local_run_{dt.now().strftime('%Y_%m_%d_%H_%M_%S')}"
+        compute_rag_vector_index.with_options(**pipeline_args)(**run_args)
+
+    if run_compute_rag_vector_index_openai_local_hybrid_pipeline:
+        run_args = {}
+        pipeline_args["config_path"] = root_dir / "configs" / "compute_rag_vector_index_openai_local_hybrid.yaml"
+        assert pipeline_args["config_path"].exists(), (
+            f"Config file not found: {pipeline_args['config_path']}"
+        )
+        pipeline_args["run_name"] = f"compute_rag_vector_index_openai_local_hybrid_run_{dt.now().strftime('%Y_%m_%d_%H_%M_%S')}"
+        compute_rag_vector_index.with_options(**pipeline_args)(**run_args)
+
 if __name__ == "__main__":
     main()
 
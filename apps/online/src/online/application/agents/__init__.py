@@ -1,6 +1,10 @@
 from .agents import get_agent, extract_tool_responses
+from .async_agents import get_async_agent
+from .pool import AgentPool
 
 __all__ = [
+    "AgentPool",
     "get_agent",
+    "get_async_agent",
     "extract_tool_responses",
-]
\ No newline at end of file
+]
@@ -2,7 +2,7 @@ from pathlib import Path
 from typing import Any
 
 from opik import track, opik_context
-from smolagents import MessageRole, MultiStepAgent, ToolCallingAgent, LiteLLMModel
+from smolagents import MessageRole, MultiStepAgent, Tool, ToolCallingAgent, LiteLLMModel
 from loguru import logger
 
 from online.config import settings
@@ -13,16 +13,28 @@ from online.application.tools import (
     WhatCanIDoTool
 )
 
-def get_agent(retriever_config_path: Path) -> "AgentWrapper":
+from .answer_cache import SemanticAnswerCache
+
+def get_agent(
+    retriever_config_path: Path, use_answer_cache: bool = False
+) -> "AgentWrapper":
     agent = AgentWrapper.build_from_smolagents(
-        retriever_config_path=retriever_config_path
+        retriever_config_path=retriever_config_path,
+        use_answer_cache=use_answer_cache,
     )
 
     return agent
 
 class AgentWrapper():
-    def __init__(self, agent: MultiStepAgent) -> None:
+    def __init__(
+        self,
+        agent: MultiStepAgent,
+        answer_cache: SemanticAnswerCache | None = None,
+        retriever_tool: MongoDBRetrieverTool | None = None,
+    ) -> None:
         self.__agent = agent
+        self.__answer_cache = answer_cache
+        self.__retriever_tool = retriever_tool
 
     @property
     def input_messages(self) -> list[dict]:
@@ -41,38 +53,65 @@ class AgentWrapper():
         return self.__agent.model
 
     @classmethod
-    def build_from_smolagents(cls, retriever_config_path: Path) -> "AgentWrapper":
-        what_can_i_do_tool = WhatCanIDoTool()
-        retriever_tool = MongoDBRetrieverTool(config_path=retriever_config_path)
+    def build_from_smolagents(
+        cls,
+        retriever_config_path: Path,
+        use_answer_cache: bool = False,
+        tools: list[Tool] | None = None,
+    ) -> "AgentWrapper":
+        if tools is None:
+            tools = build_tools(retriever_config_path)
+        retriever_tool = get_retriever_tool(tools)
 
-        if settings.USE_HUGGINGFACE_DEDICATED_ENDPOINT:
-            logger.warning(
-                f"Using Hugging Face dedicated endpoint as the summarizer with URL: {settings.HUGGINGFACE_DEDICATED_ENDPOINT}"
-            )
-            summarizer_tool = HuggingFaceEndpointSummarizerTool()
-        else:
-            logger.warning(
-                f"Using OpenAI as the summarizer with model: {settings.OPENAI_MODEL_ID}"
-            )
-            summarizer_tool = OpenAISummarizerTool(stream=False)
+        agent = build_tool_calling_agent(tools)
+        answer_cache = build_answer_cache(retriever_tool) if use_answer_cache else None
 
-        model = LiteLLMModel(
-            model_id=settings.OPENAI_MODEL_ID,
-            api_base="https://api.openai.com/v1",
-            api_key=settings.OPENAI_API_KEY,
-        )
+        return cls(agent, answer_cache=answer_cache, retriever_tool=retriever_tool)
 
-        agent = ToolCallingAgent(
-            tools=[what_can_i_do_tool, retriever_tool, summarizer_tool],
-            model=model,
-            max_steps=3,
-            verbosity_level=2,
-        )
+    def reset(self) -> None:
+        """Clear the memory and state left by previous runs, e.g. before reusing the agent."""
 
-        return cls(agent)
+        self.__agent.logs = []
+        self.__agent.state = {}
+        self.__agent.input_messages = None
+        self.__agent.monitor.reset()
 
     @track(name="Agent.run")
     def run(self, task: str, **kwargs) -> Any:
+        # Only plain runs are cached: streaming runs return a generator, and runs
+        # that keep the agent memory (reset=False) depend on the conversation.
+        use_answer_cache = self.__answer_cache is not None and not kwargs
+        if use_answer_cache:
+            try:
+                index_version = self.__get_index_version()
+            except Exception:
+                logger.opt(exception=True).warning(
+                    "Could not read the index version. Bypassing the answer cache."
+                )
+                use_answer_cache = False
+
+        if use_answer_cache:
+            cached = self.__answer_cache.get(task, index_version)
+            if cached is not None:
+                # Restore the messages of the cached run, so its tool responses are
+                # not mistaken for the ones of the previous run.
+                self.reset()
+                self.__agent.input_messages = cached.input_messages
+
+                opik_context.update_current_trace(
+                    tags=["agent", "answer_cache_hit"],
+                    metadata={
+                        **cached.metadata,
+                        "answer_cache": {
+                            "cached_task": cached.task,
+                            "similarity": cached.similarity,
+                            "index_version": cached.index_version,
+                        },
+                    },
+                )
+
+                return cached.answer
+
         result = self.__agent.run(task, **kwargs)
 
         model = self.__agent.model
@@ -80,7 +119,7 @@ class AgentWrapper():
             "system_prompt": self.__agent.system_prompt,
             # "system_prompt_template": self.__agent.system_prompt,
             # "tool_description_template": self.__agent.tool_description_template,
-            "tools": self.__agent.tools,
+            "tools": list(self.__agent.tools),
             "model_id": self.__agent.model.model_id,
             "api_base": self.__agent.model.api_base,
             "input_token_count": model.last_input_token_count,
@@ -93,8 +132,79 @@ class AgentWrapper():
             metadata=metadata,
         )
 
+        if use_answer_cache:
+            self.__answer_cache.set(
+                task, result, metadata, index_version, self.__agent.input_messages
+            )
+
         return result
 
+    def __get_index_version(self) -> str | None:
+        if self.__retriever_tool is None:
+            return None
+
+        return self.__retriever_tool.get_index_version()
+
+def build_tools(retriever_config_path: Path) -> list[Tool]:
+    """Build the tools of the Second Brain agent.
+
+    The tools hold no per-run state, so they can be shared by several agents, including
+    across threads, to load the retriever and its embedding model only once.
+
+    Args:
+        retriever_config_path: Path to the config of the indexing pipeline of the retriever.
+
+    Returns:
+        list[Tool]: The tools of the agent.
+    """
+
+    what_can_i_do_tool = WhatCanIDoTool()
+    retriever_tool = MongoDBRetrieverTool(config_path=retriever_config_path)
+
+    if settings.USE_HUGGINGFACE_DEDICATED_ENDPOINT:
+        logger.warning(
+            f"Using Hugging Face dedicated endpoint as the summarizer with URL: {settings.HUGGINGFACE_DEDICATED_ENDPOINT}"
+        )
+        summarizer_tool = HuggingFaceEndpointSummarizerTool()
+    else:
+        logger.warning(
+            f"Using OpenAI as the summarizer with model: {settings.OPENAI_MODEL_ID}"
+        )
+        summarizer_tool = OpenAISummarizerTool(stream=False)
+
+    return [what_can_i_do_tool, retriever_tool, summarizer_tool]
+
+def build_tool_calling_agent(tools: list[Tool]) -> ToolCallingAgent:
+    """Build the tool calling agent of the Second Brain on top of its tools."""
+
+    model = LiteLLMModel(
+        model_id=settings.OPENAI_MODEL_ID,
+        api_base="https://api.openai.com/v1",
+        api_key=settings.OPENAI_API_KEY,
+    )
+
+    return ToolCallingAgent(
+        tools=tools,
+        model=model,
+        max_steps=3,
+        verbosity_level=2,
+    )
+
+def get_retriever_tool(tools: list[Tool]) -> MongoDBRetrieverTool | None:
+    return next(
+        (tool for tool in tools if isinstance(tool, MongoDBRetrieverTool)), None
+    )
+
+def build_answer_cache(retriever_tool: MongoDBRetrieverTool) -> SemanticAnswerCache:
+    """Build a semantic answer cache embedding tasks with the model of the retriever."""
+
+    return SemanticAnswerCache(
+        embedding_model=retriever_tool.retriever.vectorstore.embeddings,
+        similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        max_size=settings.ANSWER_CACHE_MAX_SIZE,
+        ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+    )
+
 def extract_tool_responses(agent: ToolCallingAgent) -> str:
     """
     Extracts and concatenates all tool response contents with numbered observation delimiters.
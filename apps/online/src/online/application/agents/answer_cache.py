@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+
+from online.infrastructure.cache import LRUCache
+
+
+@dataclass
+class CachedAnswer:
+    """An agent answer stored in the semantic answer cache.
+
+    Attributes:
+        task: The task the answer was produced for.
+        answer: The final answer of the agent.
+        metadata: The trace metadata of the run that produced the answer.
+        index_version: Version of the retrieval index the answer was grounded on.
+        input_messages: Messages of the run that produced the answer, holding the tool
+            responses the answer was grounded on.
+        created_at: Monotonic time at which the answer was cached.
+        similarity: Cosine similarity between the cached task and the looked up one,
+            set on lookup.
+    """
+
+    task: str
+    answer: Any
+    metadata: dict[str, Any]
+    index_version: str | None
+    input_messages: list[dict] = field(default_factory=list)
+    created_at: float = field(default_factory=time.monotonic)
+    similarity: float = 1.0
+
+
+class SemanticAnswerCache:
+    """In-memory cache of agent answers, looked up by semantic similarity of the task.
+
+    Tasks are embedded with the same model as the retriever, and a cached answer is
+    returned when a previous task is at least `similarity_threshold` similar to the
+    new one and was answered against the same index version. Answers grounded on an
+    older index version are dropped on lookup.
+
+    Attributes:
+        embedding_model: The model used to embed the tasks.
+        similarity_threshold: Minimum cosine similarity for a cache hit.
+        max_size: Maximum number of cached answers.
+        ttl_seconds: Optional time-to-live of an answer.
+        hits: Number of lookups that returned an answer.
+        misses: Number of lookups that did not.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Embeddings,
+        similarity_threshold: float = 0.95,
+        max_size: int = 512,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        assert 0 < similarity_threshold <= 1, (
+            "similarity_threshold must be in (0, 1]"
+        )
+
+        self.embedding_model = embedding_model
+        self.similarity_threshold = similarity_threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self.__lock = threading.Lock()
+        self.__answers: OrderedDict[str, tuple[np.ndarray, CachedAnswer]] = OrderedDict()
+        # The task is embedded on lookup and again when its answer is stored.
+        self.__embeddings: LRUCache[np.ndarray] = LRUCache(max_size=64)
+
+    def __len__(self) -> int:
+        return len(self.__answers)
+
+    def get(self, task: str, index_version: str | None) -> CachedAnswer | None:
+        """Find the answer of the most similar cached task.
+
+        Args:
+            task: The incoming task.
+            index_version: Current version of the retrieval index.
+
+        Returns:
+            CachedAnswer | None: The cached answer, with its similarity to the task,
+                or None if no cached task is similar enough.
+        """
+
+        return self.__lookup(task, self.__embed(task), index_version)
+
+    async def aget(self, task: str, index_version: str | None) -> CachedAnswer | None:
+        """Async version of `get`, which embeds the task with the async embedding API."""
+
+        return self.__lookup(task, await self.__aembed(task), index_version)
+
+    def set(
+        self,
+        task: str,
+        answer: Any,
+        metadata: dict[str, Any],
+        index_version: str | None,
+        input_messages: list[dict] | None = None,
+    ) -> None:
+        """Store the answer of a task.
+
+        Args:
+            task: The task.
+            answer: The final answer of the agent.
+            metadata: The trace metadata of the run.
+            index_version: Version of the retrieval index the answer was grounded on.
+            input_messages: Messages of the run, restored on a cache hit so the tool
+                responses of the answer can still be extracted.
+        """
+
+        self.__store(
+            task, self.__embed(task), answer, metadata, index_version, input_messages
+        )
+
+    async def aset(
+        self,
+        task: str,
+        answer: Any,
+        metadata: dict[str, Any],
+        index_version: str | None,
+        input_messages: list[dict] | None = None,
+    ) -> None:
+        """Async version of `set`, which embeds the task with the async embedding API."""
+
+        self.__store(
+            task, await self.__aembed(task), answer, metadata, index_version, input_messages
+        )
+
+    def clear(self) -> None:
+        """Remove every cached answer."""
+
+        with self.__lock:
+            self.__answers.clear()
+
+    def __lookup(
+        self, task: str, embedding: np.ndarray, index_version: str | None
+    ) -> CachedAnswer | None:
+        with self.__lock:
+            self.__drop_stale(index_version)
+
+            best_task, best_similarity = None, -1.0
+            if self.__answers:
+                tasks = list(self.__answers)
+                matrix = np.stack([self.__answers[key][0] for key in tasks])
+                similarities = matrix @ embedding
+                best = int(np.argmax(similarities))
+                best_task, best_similarity = tasks[best], float(similarities[best])
+
+            if best_task is None or best_similarity < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self.__answers.move_to_end(best_task)
+            self.hits += 1
+            cached = self.__answers[best_task][1]
+
+        logger.info(
+            f"Semantic answer cache hit (similarity {best_similarity:.3f}) for task: '{task[:80]}'"
+        )
+
+        return CachedAnswer(
+            task=cached.task,
+            answer=cached.answer,
+            metadata=cached.metadata,
+            index_version=cached.index_version,
+            input_messages=list(cached.input_messages),
+            created_at=cached.created_at,
+            similarity=best_similarity,
+        )
+
+    def __store(
+        self,
+        task: str,
+        embedding: np.ndarray,
+        answer: Any,
+        metadata: dict[str, Any],
+        index_version: str | None,
+        input_messages: list[dict] | None,
+    ) -> None:
+        with self.__lock:
+            self.__answers[task] = (
+                embedding,
+                CachedAnswer(
+                    task=task,
+                    answer=answer,
+                    metadata=metadata,
+                    index_version=index_version,
+                    input_messages=list(input_messages or []),
+                ),
+            )
+            self.__answers.move_to_end(task)
+            while len(self.__answers) > self.max_size:
+                self.__answers.popitem(last=False)
+
+    def __embed(self, task: str) -> np.ndarray:
+        embedding = self.__embeddings.get(task)
+        if embedding is None:
+            embedding = self.__cache_embedding(task, self.embedding_model.embed_query(task))
+
+        return embedding
+
+    async def __aembed(self, task: str) -> np.ndarray:
+        embedding = self.__embeddings.get(task)
+        if embedding is None:
+            embedding = self.__cache_embedding(
+                task, await self.embedding_model.aembed_query(task)
+            )
+
+        return embedding
+
+    def __cache_embedding(self, task: str, embedding: list[float]) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding /= max(float(np.linalg.norm(embedding)), 1e-12)
+        self.__embeddings.set(task, embedding)
+
+        return embedding
+
+    def __drop_stale(self, index_version: str | None) -> None:
+        now = time.monotonic()
+        stale_tasks = [
+            task
+            for task, (_, cached) in self.__answers.items()
+            if cached.index_version != index_version
+            or (self.ttl_seconds is not None and now - cached.created_at > self.ttl_seconds)
+        ]
+        for task in stale_tasks:
+            del self.__answers[task]
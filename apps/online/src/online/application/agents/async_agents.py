@@ -0,0 +1,321 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import litellm
+from loguru import logger
+from opik import track, opik_context
+from smolagents import MessageRole, ToolCallingAgent
+from smolagents.models import get_clean_message_list, get_json_schema, tool_role_conversions
+
+from online.application.tools import MongoDBRetrieverTool
+
+from .agents import (
+    build_answer_cache,
+    build_tool_calling_agent,
+    build_tools,
+    get_retriever_tool,
+)
+from .answer_cache import SemanticAnswerCache
+from .prompts import (
+    FINAL_ANSWER_SYSTEM_PROMPT,
+    FINAL_ANSWER_USER_PROMPT,
+    RETRY_MESSAGE,
+)
+
+
+def get_async_agent(
+    retriever_config_path: Path, use_answer_cache: bool = False
+) -> "AsyncAgentWrapper":
+    agent = AsyncAgentWrapper.build_from_smolagents(
+        retriever_config_path=retriever_config_path,
+        use_answer_cache=use_answer_cache,
+    )
+
+    return agent
+
+
+@dataclass
+class AgentRun:
+    """State and result of a single run of the async agent.
+
+    Attributes:
+        result: The final answer of the run.
+        input_messages: The messages of the run, in the smolagents memory format, so
+            `extract_tool_responses` can read them like it reads a sync agent.
+        step_number: Number of steps taken.
+        input_token_count: Number of prompt tokens over every model call.
+        output_token_count: Number of completion tokens over every model call.
+    """
+
+    result: Any = None
+    input_messages: list[dict] = field(default_factory=list)
+    step_number: int = 0
+    input_token_count: int = 0
+    output_token_count: int = 0
+
+
+class AsyncAgentWrapper:
+    """Async counterpart of `AgentWrapper`, serving many conversations on one event loop.
+
+    smolagents agents only run synchronously, so this wrapper runs the tool calling loop
+    of `ToolCallingAgent` itself, with the same system prompt, tools, model and message
+    format: the model is awaited through `litellm.acompletion` and the tools through
+    their `aforward` methods, and the tool calls of a step run concurrently. Each run
+    returns its own `AgentRun` instead of storing it on the wrapper, so one wrapper can
+    serve concurrent runs.
+    """
+
+    def __init__(
+        self,
+        agent: ToolCallingAgent,
+        answer_cache: SemanticAnswerCache | None = None,
+        retriever_tool: MongoDBRetrieverTool | None = None,
+    ) -> None:
+        self.__agent = agent
+        self.__answer_cache = answer_cache
+        self.__retriever_tool = retriever_tool
+
+    @property
+    def name(self) -> str:
+        return self.__agent.agent_name
+
+    @property
+    def max_steps(self) -> int:
+        return self.__agent.max_steps
+
+    @property
+    def model(self):
+        return self.__agent.model
+
+    @classmethod
+    def build_from_smolagents(
+        cls, retriever_config_path: Path, use_answer_cache: bool = False
+    ) -> "AsyncAgentWrapper":
+        tools = build_tools(retriever_config_path)
+        retriever_tool = get_retriever_tool(tools)
+
+        agent = build_tool_calling_agent(tools)
+        answer_cache = build_answer_cache(retriever_tool) if use_answer_cache else None
+
+        return cls(agent, answer_cache=answer_cache, retriever_tool=retriever_tool)
+
+    @track(name="AsyncAgent.run")
+    async def run(self, task: str) -> AgentRun:
+        use_answer_cache = self.__answer_cache is not None
+        if use_answer_cache:
+            try:
+                index_version = await self.__get_index_version()
+            except Exception:
+                logger.opt(exception=True).warning(
+                    "Could not read the index version. Bypassing the answer cache."
+                )
+                use_answer_cache = False
+
+        if use_answer_cache:
+            cached = await self.__answer_cache.aget(task, index_version)
+            if cached is not None:
+                opik_context.update_current_trace(
+                    tags=["agent", "answer_cache_hit"],
+                    metadata={
+                        **cached.metadata,
+                        "answer_cache": {
+                            "cached_task": cached.task,
+                            "similarity": cached.similarity,
+                            "index_version": cached.index_version,
+                        },
+                    },
+                )
+
+                return AgentRun(
+                    result=cached.answer, input_messages=cached.input_messages
+                )
+
+        run = AgentRun()
+        run.result = await self.__run_steps(task, run)
+
+        model = self.__agent.model
+        metadata = {
+            "system_prompt": self.__agent.system_prompt,
+            "tools": list(self.__agent.tools),
+            "model_id": model.model_id,
+            "api_base": model.api_base,
+            "input_token_count": run.input_token_count,
+            "output_token_count": run.output_token_count,
+            "step_number": run.step_number,
+        }
+        opik_context.update_current_trace(
+            tags=["agent"],
+            metadata=metadata,
+        )
+
+        if use_answer_cache:
+            await self.__answer_cache.aset(
+                task, run.result, metadata, index_version, run.input_messages
+            )
+
+        return run
+
+    async def __run_steps(self, task: str, run: AgentRun) -> Any:
+        run.input_messages = [
+            {"role": MessageRole.SYSTEM, "content": self.__agent.system_prompt.strip()},
+            {"role": MessageRole.USER, "content": "New task:\n" + task},
+        ]
+        tools = [get_json_schema(tool) for tool in self.__agent.tools.values()]
+
+        for step_number in range(1, self.max_steps + 1):
+            run.step_number = step_number
+
+            try:
+                message = await self.__complete(
+                    run,
+                    run.input_messages,
+                    tools=tools,
+                    tool_choice="required",
+                    stop=["Observation:"],
+                )
+                if not message.tool_calls:
+                    raise ValueError("The model did not call any tool.")
+            except Exception as e:
+                logger.opt(exception=True).warning(
+                    f"Error in generating tool call with model at step {step_number}."
+                )
+                run.input_messages.append(
+                    {
+                        "role": MessageRole.ASSISTANT,
+                        "content": f"Error:\n{e}{RETRY_MESSAGE}",
+                    }
+                )
+
+                continue
+
+            tool_calls = [
+                (
+                    tool_call.id or f"call_{i}",
+                    tool_call.function.name,
+                    parse_arguments(tool_call.function.arguments),
+                )
+                for i, tool_call in enumerate(message.tool_calls)
+            ]
+            run.input_messages.append(
+                {
+                    "role": MessageRole.ASSISTANT,
+                    "content": str(
+                        [
+                            {
+                                "id": tool_call_id,
+                                "type": "function",
+                                "function": {"name": name, "arguments": arguments},
+                            }
+                            for tool_call_id, name, arguments in tool_calls
+                        ]
+                    ),
+                }
+            )
+
+            for _, name, arguments in tool_calls:
+                if name == "final_answer":
+                    if isinstance(arguments, dict) and "answer" in arguments:
+                        return arguments["answer"]
+
+                    return arguments
+
+            observations = await asyncio.gather(
+                *(
+                    self.__execute_tool_call(name, arguments)
+                    for _, name, arguments in tool_calls
+                )
+            )
+            for (tool_call_id, _, _), observation in zip(tool_calls, observations):
+                run.input_messages.append(
+                    {
+                        "role": MessageRole.TOOL_RESPONSE,
+                        "content": f"Call id: {tool_call_id}\n{observation}",
+                    }
+                )
+
+        return await self.__provide_final_answer(task, run)
+
+    async def __provide_final_answer(self, task: str, run: AgentRun) -> str:
+        """Answer from the memory of a run that reached `max_steps`, like smolagents does."""
+
+        messages = [
+            {
+                "role": MessageRole.SYSTEM,
+                "content": FINAL_ANSWER_SYSTEM_PROMPT,
+            },
+            *run.input_messages[1:],
+            {
+                "role": MessageRole.USER,
+                "content": FINAL_ANSWER_USER_PROMPT.format(task=task),
+            },
+        ]
+
+        try:
+            message = await self.__complete(run, messages)
+
+            return message.content
+        except Exception as e:
+            return f"Error in generating final LLM output:\n{e}"
+
+    async def __complete(self, run: AgentRun, messages: list[dict], **kwargs) -> Any:
+        model = self.__agent.model
+        response = await litellm.acompletion(
+            model=model.model_id,
+            messages=get_clean_message_list(
+                messages, role_conversions=tool_role_conversions
+            ),
+            api_base=model.api_base,
+            api_key=model.api_key,
+            **kwargs,
+            **model.kwargs,
+        )
+        run.input_token_count += response.usage.prompt_tokens
+        run.output_token_count += response.usage.completion_tokens
+
+        return response.choices[0].message
+
+    async def __execute_tool_call(self, name: str, arguments: dict | str) -> str:
+        tool = self.__agent.tools.get(name)
+        if tool is None:
+            return (
+                f"Error:\nUnknown tool {name}, should be instead one of "
+                f"{list(self.__agent.tools)}.{RETRY_MESSAGE}"
+            )
+
+        if not isinstance(arguments, dict):
+            arguments = {next(iter(tool.inputs)): arguments}
+
+        try:
+            if hasattr(tool, "aforward"):
+                observation = await tool.aforward(**arguments)
+            else:
+                observation = await asyncio.to_thread(tool, **arguments)
+        except Exception as e:
+            logger.opt(exception=True).warning(f"Error in calling tool '{name}'.")
+
+            return f"Error:\n{e}{RETRY_MESSAGE}"
+
+        return f"Observation:\n{str(observation).strip()}"
+
+    async def __get_index_version(self) -> str | None:
+        if self.__retriever_tool is None:
+            return None
+
+        return await asyncio.to_thread(self.__retriever_tool.get_index_version)
+
+
+def parse_arguments(arguments: str | dict | None) -> dict | str:
+    """Parse the JSON arguments of a tool call, keeping them as is if they are not JSON."""
+
+    if arguments is None:
+        return {}
+    if isinstance(arguments, dict):
+        return arguments
+
+    try:
+        return json.loads(arguments)
+    except json.JSONDecodeError:
+        return arguments
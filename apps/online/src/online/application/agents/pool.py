@@ -0,0 +1,76 @@
+import queue
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from loguru import logger
+
+from .agents import AgentWrapper, build_tools
+
+
+class AgentPool:
+    """Fixed-size, thread-safe pool of long-lived agents.
+
+    The tools, and so the retriever, its embedding model and its MongoDB client, are
+    built once and shared by every agent, while each agent keeps its own memory and
+    model. An agent is lent to one thread at a time and reset before every use, so
+    concurrent runs never see each other's messages.
+
+    Attributes:
+        retriever_config_path: Path to the config of the indexing pipeline of the retriever.
+        size: Number of agents in the pool.
+    """
+
+    def __init__(
+        self,
+        retriever_config_path: Path,
+        size: int = 2,
+        use_answer_cache: bool = False,
+    ) -> None:
+        assert size > 0, "The pool must hold at least one agent"
+
+        self.retriever_config_path = retriever_config_path
+        self.size = size
+
+        tools = build_tools(retriever_config_path)
+        self.__agents: list[AgentWrapper] = [
+            AgentWrapper.build_from_smolagents(
+                retriever_config_path=retriever_config_path,
+                use_answer_cache=use_answer_cache,
+                tools=tools,
+            )
+            for _ in range(size)
+        ]
+        self.__idle: queue.Queue[AgentWrapper] = queue.Queue()
+        for agent in self.__agents:
+            self.__idle.put(agent)
+
+        logger.info(f"Built a pool of {size} agents sharing the same tools.")
+
+    @property
+    def agent(self) -> AgentWrapper:
+        """Any agent of the pool, to read its configuration."""
+
+        return self.__agents[0]
+
+    @contextmanager
+    def acquire(self, timeout: float | None = None) -> Iterator[AgentWrapper]:
+        """Borrow an idle agent, blocking until one is available.
+
+        Args:
+            timeout: Maximum number of seconds to wait for an agent. Defaults to None (no limit).
+
+        Yields:
+            AgentWrapper: An agent with a fresh memory, returned to the pool on exit.
+
+        Raises:
+            queue.Empty: If no agent became available within `timeout`.
+        """
+
+        agent = self.__idle.get(timeout=timeout)
+        try:
+            agent.reset()
+
+            yield agent
+        finally:
+            self.__idle.put(agent)
@@ -0,0 +1,26 @@
+import smolagents
+from loguru import logger
+
+# Prompts that `ToolCallingAgent` writes inline, copied for `AsyncAgentWrapper` so
+# both agents show the model the same messages. Re-check them when upgrading smolagents.
+SMOLAGENTS_VERSION = "1.4.1"
+
+RETRY_MESSAGE = (
+    "\nNow let's retry: take care not to repeat previous errors! "
+    "If you have retried several times, try a completely different approach.\n"
+)
+
+FINAL_ANSWER_SYSTEM_PROMPT = (
+    "An agent tried to answer a user query but it got stuck and failed to do so. "
+    "You are tasked with providing an answer instead. Here is the agent's memory:"
+)
+
+FINAL_ANSWER_USER_PROMPT = (
+    "Based on the above, please provide an answer to the following user request:\n{task}"
+)
+
+if smolagents.__version__ != SMOLAGENTS_VERSION:
+    logger.warning(
+        f"The async agent prompts mirror smolagents {SMOLAGENTS_VERSION}, "
+        f"but smolagents {smolagents.__version__} is installed."
+    )
@@ -1,9 +1,13 @@
 from .evaluate import evaluate_agent
+from .runner import EvaluationResult, EvaluationRunner, MetricScore
 from .summary_density_heuristic import SummaryDensityHeuristic
 from .summary_density_judge import SummaryDensityJudge
 
 __all__ = [
     "evaluate_agent",
+    "EvaluationResult",
+    "EvaluationRunner",
+    "MetricScore",
     "SummaryDensityHeuristic",
     "SummaryDensityJudge",
-]
\ No newline at end of file
+]
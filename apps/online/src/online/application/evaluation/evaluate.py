@@ -1,19 +1,34 @@
+import hashlib
+import subprocess
+import uuid
 from pathlib import Path
 
+import opik
 from loguru import logger
-from opik.evaluation import evaluate
+from opik.api_objects.experiment.experiment_item import ExperimentItemReferences
 from opik.evaluation.metrics import AnswerRelevance, Hallucination, Moderation
 
 from online import opik_utils
-from online.application.agents import agents, extract_tool_responses
+from online.application.agents import AgentPool, extract_tool_responses
 from online.config import settings
 from online.application.evaluation.summary_density_heuristic import SummaryDensityHeuristic
 from online.application.evaluation.summary_density_judge import SummaryDensityJudge
+from online.application.evaluation.runner import (
+    EvaluationResult,
+    EvaluationRunner,
+    get_mean_scores,
+)
+from online.infrastructure.cache import SQLiteCache
 
 opik_utils.configure()
 
 
-def evaluate_agent(prompts: list[str], retriever_config_path: Path) -> None:
+def evaluate_agent(
+    prompts: list[str],
+    retriever_config_path: Path,
+    task_threads: int = 2,
+    scoring_threads: int = 8,
+) -> None:
     assert settings.COMET_API_KEY, (
         "COMMET_API_KEY is not set. We need it to track the experiment with Opik."
     )
@@ -21,23 +36,32 @@ def evaluate_agent(prompts: list[str], retriever_config_path: Path) -> None:
     logger.info("Starting evaluation...")
     logger.info(f"Evaluating agent with {len(prompts)} prompts.")
 
+    # Agents are built once and reused across items, one per evaluation thread. The
+    # answer cache is off to evaluate fresh runs, as the context is extracted from the
+    # agent messages.
+    agent_pool = AgentPool(
+        retriever_config_path=retriever_config_path,
+        size=task_threads,
+        use_answer_cache=False,
+    )
+
     def evaluation_task(x: dict) -> dict:
         """Calling agentic app to evaluate"""
 
-        agent = agents.get_agent(retriever_config_path=retriever_config_path)
-        response = agent.run(x["input"])
-        context = extract_tool_responses(agent)
+        with agent_pool.acquire() as agent:
+            response = agent.run(x["input"])
+            context = extract_tool_responses(agent)
 
         return {
             "input": x["input"],
             "context": context,
-            "output": response,
+            "output": str(response),
         }
     
     dataset_name = "rag_agentic_app_evaluation_dataset"
     dataset = opik_utils.get_or_create_dataset(name=dataset_name, prompts=prompts)
 
-    agent = agents.get_agent(retriever_config_path=retriever_config_path)
+    agent = agent_pool.agent
     experiment_config = {
         "model_id": settings.OPENAI_MODEL_ID,
         "retriever_config_path": retriever_config_path,
@@ -60,13 +84,143 @@ def evaluate_agent(prompts: list[str], retriever_config_path: Path) -> None:
         logger.info(f"Dataset: {dataset_name}")
         logger.info(f"Metrics: {[m.__class__.__name__ for m in scoring_metrics]}")
 
-        evaluate(
-            dataset=dataset,
-            task=evaluation_task,
-            scoring_metrics=scoring_metrics,
-            experiment_config=experiment_config,
-            task_threads=2,
-        )
-    
+        # Runs of the same code, dataset, model and retriever config resume each other.
+        code_revision = get_code_revision()
+        if code_revision is None:
+            logger.warning(
+                "Could not read the git revision of the code. The evaluation will not "
+                "resume from previous runs."
+            )
+            code_revision = uuid.uuid4().hex
+        run_id = hashlib.sha256(
+            "\n".join(
+                [
+                    code_revision,
+                    dataset_name,
+                    settings.OPENAI_MODEL_ID,
+                    Path(retriever_config_path).read_text(),
+                    *sorted(m.name for m in scoring_metrics),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()[:16]
+        checkpoint_path = settings.EVALUATION_CHECKPOINT_DIR / f"{run_id}.jsonl"
+
+        items = dataset.get_items()
+        judge_cache = None
+        if settings.EVALUATION_JUDGE_CACHE_PATH is not None:
+            judge_cache = SQLiteCache(settings.EVALUATION_JUDGE_CACHE_PATH)
+
+        try:
+            runner = EvaluationRunner(
+                task=evaluation_task,
+                scoring_metrics=scoring_metrics,
+                checkpoint_path=checkpoint_path,
+                judge_cache=judge_cache,
+                task_threads=task_threads,
+                scoring_threads=scoring_threads,
+            )
+            results = runner.run(items)
+        finally:
+            if judge_cache is not None:
+                judge_cache.close()
+
+        for name, value in get_mean_scores(results).items():
+            logger.info(f"{name}: {value:.3f}")
+
+        log_experiment(dataset, results, experiment_config)
+
+        if len(results) == len(items):
+            checkpoint_path.unlink(missing_ok=True)
+        else:
+            logger.warning(
+                f"{len(items) - len(results)} items failed. Run the evaluation "
+                f"again to retry them, resuming from '{checkpoint_path}'."
+            )
+
     else:
-        logger.error("Can't run the evaluation as the dataset items are empty.")
\ No newline at end of file
+        logger.error("Can't run the evaluation as the dataset items are empty.")
+
+
+def get_code_revision() -> str | None:
+    """Git HEAD of the code, with a hash of its uncommitted changes if any.
+
+    Returns:
+        str | None: The revision, or None if the code is not in a git repository.
+    """
+
+    cwd = Path(__file__).parent
+    try:
+        head = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        diff = subprocess.run(
+            ["git", "diff", "HEAD"], cwd=cwd, capture_output=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    if not diff:
+        return head
+
+    return f"{head}+{hashlib.sha256(diff).hexdigest()[:12]}"
+
+
+def log_experiment(
+    dataset: opik.Dataset,
+    results: list[EvaluationResult],
+    experiment_config: dict,
+) -> None:
+    """Log evaluation results to Opik as an experiment on the dataset.
+
+    Every item is linked to the trace of its task run, holding the spans of the agent
+    and its tools, and its scores are logged as feedback scores of that trace. Items
+    restored from a checkpoint without a trace get a new trace holding their output.
+
+    Args:
+        dataset: The evaluated dataset.
+        results: The results of the evaluation runner.
+        experiment_config: Configuration logged with the experiment.
+    """
+
+    # The task traces are sent in the background, so they must be logged before
+    # scores and experiment items reference them.
+    opik.flush_tracker()
+
+    client = opik.Opik()
+    experiment = client.create_experiment(
+        dataset_name=dataset.name,
+        experiment_config=experiment_config,
+    )
+
+    references = []
+    feedback_scores = []
+    for result in results:
+        trace_id = result.trace_id
+        if trace_id is None:
+            trace = client.trace(
+                name="evaluation_task",
+                input=result.item,
+                output=result.output,
+            )
+            trace.end()
+            trace_id = trace.id
+
+        feedback_scores.extend(
+            {
+                "id": trace_id,
+                "name": score.name,
+                "value": score.value,
+                "reason": score.reason,
+            }
+            for score in result.scores
+            if not score.scoring_failed
+        )
+        references.append(
+            ExperimentItemReferences(dataset_item_id=result.item["id"], trace_id=trace_id)
+        )
+
+    client.log_traces_feedback_scores(feedback_scores)
+    experiment.insert(experiment_items_references=references)
+    client.flush()
+
+    logger.info(f"Logged {len(references)} items to the Opik experiment '{experiment.name}'.")
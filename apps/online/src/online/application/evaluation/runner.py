@@ -0,0 +1,354 @@
+import hashlib
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+import opik
+from loguru import logger
+from opik import opik_context, track
+from opik.evaluation.metrics import base_metric, score_result
+from opik.evaluation.models import OpikBaseModel
+
+from online.infrastructure.cache import SQLiteCache
+
+EvaluationTask = Callable[[dict], dict]
+
+
+@dataclass
+class MetricScore:
+    """A score computed by a metric for an evaluation item.
+
+    Attributes:
+        name: Name of the score.
+        value: Value of the score.
+        reason: Explanation of the score, if any.
+        scoring_failed: Whether the metric raised while scoring the item.
+    """
+
+    name: str
+    value: float
+    reason: str | None = None
+    scoring_failed: bool = False
+
+
+@dataclass
+class EvaluationResult:
+    """Output and scores of a single evaluation item.
+
+    Attributes:
+        item_id: Stable id of the item, derived from its input.
+        item: The dataset item.
+        output: The output of the evaluation task, which the metrics are scored on.
+        scores: The scores of every metric.
+        trace_id: Id of the Opik trace of the task run, if it was traced.
+    """
+
+    item_id: str
+    item: dict
+    output: dict
+    scores: list[MetricScore] = field(default_factory=list)
+    trace_id: str | None = None
+
+
+class EvaluationRunner:
+    """Resumable evaluation that pipelines task runs and metric scoring.
+
+    Items run through the task on a pool of `task_threads` threads. As soon as an
+    item finishes, each of its metrics is scored as a separate job on a pool of
+    `scoring_threads` threads, so the LLM judges of an item run concurrently with
+    each other and with the tasks of the next items. At most `max_pending_items`
+    items are in flight, which bounds both pools. Every task runs inside its own
+    "evaluation_task" Opik trace, so the spans of the agent and its tools are linked
+    to the item.
+
+    Each fully scored item is appended to a JSONL checkpoint. Items found in the
+    checkpoint are not run again, so a crashed run resumes where it stopped. Metric
+    results are also cached by a hash of the metric, its settings and its inputs, so
+    an unchanged answer is never judged twice by the same judge, even across runs.
+
+    Attributes:
+        task: Function mapping a dataset item to the inputs of the metrics.
+        scoring_metrics: Metrics scored on every item.
+        checkpoint_path: Path of the JSONL checkpoint of the completed items.
+        judge_cache: Optional persistent cache of the metric results.
+        task_threads: Number of items run through the task concurrently.
+        scoring_threads: Number of metrics scored concurrently.
+        max_pending_items: Maximum number of items run or scored at the same time.
+    """
+
+    def __init__(
+        self,
+        task: EvaluationTask,
+        scoring_metrics: list[base_metric.BaseMetric],
+        checkpoint_path: Path,
+        judge_cache: SQLiteCache | None = None,
+        task_threads: int = 2,
+        scoring_threads: int = 8,
+        max_pending_items: int | None = None,
+    ) -> None:
+        assert task_threads > 0 and scoring_threads > 0, (
+            "task_threads and scoring_threads must be positive"
+        )
+
+        self.task = task
+        self.scoring_metrics = scoring_metrics
+        self.checkpoint_path = Path(checkpoint_path)
+        self.judge_cache = judge_cache
+        self.task_threads = task_threads
+        self.scoring_threads = scoring_threads
+        self.max_pending_items = max_pending_items or task_threads + scoring_threads
+
+        self.__lock = threading.Lock()
+        self.__traced_task = track(
+            name="evaluation_task", capture_input=False, capture_output=False
+        )(self.__run_task)
+
+    def run(self, items: list[dict]) -> list[EvaluationResult]:
+        """Evaluate the items that are not in the checkpoint yet.
+
+        Args:
+            items: The dataset items, each with at least an "input" key.
+
+        Returns:
+            list[EvaluationResult]: The results of every item, in the order of `items`,
+                including the ones restored from the checkpoint. Items whose task failed
+                are left out and are retried by the next run.
+        """
+
+        completed = self.load_checkpoint()
+        item_ids = [get_item_id(item) for item in items]
+        pending = [
+            (item_id, item)
+            for item_id, item in zip(item_ids, items)
+            if item_id not in completed
+        ]
+        logger.info(
+            f"Evaluating {len(pending)} items ({len(items) - len(pending)} restored from "
+            f"'{self.checkpoint_path}')."
+        )
+
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        slots = threading.BoundedSemaphore(self.max_pending_items)
+        num_done = [0]
+        item_futures: list[Future] = []
+
+        def on_item_done(_: Future) -> None:
+            slots.release()
+            with self.__lock:
+                num_done[0] += 1
+                logger.info(f"Evaluated {num_done[0]}/{len(pending)} items.")
+
+        with (
+            ThreadPoolExecutor(self.task_threads, thread_name_prefix="eval-task") as task_pool,
+            ThreadPoolExecutor(self.scoring_threads, thread_name_prefix="eval-score") as scoring_pool,
+        ):
+            for item_id, item in pending:
+                slots.acquire()
+
+                item_future: Future = Future()
+                item_future.add_done_callback(on_item_done)
+                item_futures.append(item_future)
+
+                task_future = task_pool.submit(self.__traced_task, item)
+                task_future.add_done_callback(
+                    partial(
+                        self.__on_task_done,
+                        item_id=item_id,
+                        item=item,
+                        item_future=item_future,
+                        scoring_pool=scoring_pool,
+                    )
+                )
+
+            for item_future in item_futures:
+                result = item_future.result()
+                if result is not None:
+                    completed[result.item_id] = result
+
+        return [completed[item_id] for item_id in item_ids if item_id in completed]
+
+    def load_checkpoint(self) -> dict[str, EvaluationResult]:
+        """Read the results of the items completed by previous runs."""
+
+        completed = {}
+        if not self.checkpoint_path.exists():
+            return completed
+
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be truncated if the previous run crashed.
+                    continue
+
+                record["scores"] = [MetricScore(**score) for score in record["scores"]]
+                completed[record["item_id"]] = EvaluationResult(**record)
+
+        return completed
+
+    def __run_task(self, item: dict) -> tuple[dict, str | None]:
+        output = self.task(item)
+
+        opik_context.update_current_trace(input=item, output=output)
+        trace_data = opik_context.get_current_trace_data()
+
+        return output, trace_data.id if trace_data is not None else None
+
+    def __on_task_done(
+        self,
+        task_future: Future,
+        item_id: str,
+        item: dict,
+        item_future: Future,
+        scoring_pool: ThreadPoolExecutor,
+    ) -> None:
+        try:
+            output, trace_id = task_future.result()
+        except Exception:
+            logger.opt(exception=True).error(
+                f"Evaluation task failed for item '{item_id}'. It will be retried on the next run."
+            )
+            item_future.set_result(None)
+
+            return
+
+        score_futures = [
+            scoring_pool.submit(self.__score, metric, output)
+            for metric in self.scoring_metrics
+        ]
+        remaining = [len(score_futures)]
+        remaining_lock = threading.Lock()
+
+        def on_score_done(_: Future) -> None:
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+
+            result = EvaluationResult(
+                item_id=item_id,
+                item=item,
+                output=output,
+                scores=[
+                    score for future in score_futures for score in future.result()
+                ],
+                trace_id=trace_id,
+            )
+            try:
+                self.__write_checkpoint(result)
+            finally:
+                item_future.set_result(result)
+
+        if not score_futures:
+            item_future.set_result(
+                EvaluationResult(
+                    item_id=item_id, item=item, output=output, trace_id=trace_id
+                )
+            )
+            return
+
+        for score_future in score_futures:
+            score_future.add_done_callback(on_score_done)
+
+    def __score(
+        self, metric: base_metric.BaseMetric, output: dict
+    ) -> list[MetricScore]:
+        key = get_judge_cache_key(metric, output)
+        if self.judge_cache is not None:
+            cached = self.judge_cache.get(key)
+            if cached is not None:
+                return [MetricScore(**score) for score in json.loads(cached)]
+
+        try:
+            results = metric.score(**output)
+        except Exception as e:
+            logger.opt(exception=True).warning(f"Metric '{metric.name}' failed.")
+
+            return [
+                MetricScore(name=metric.name, value=0.0, reason=str(e), scoring_failed=True)
+            ]
+
+        if isinstance(results, score_result.ScoreResult):
+            results = [results]
+        scores = [
+            MetricScore(
+                name=result.name,
+                value=result.value,
+                reason=result.reason,
+                scoring_failed=result.scoring_failed,
+            )
+            for result in results
+        ]
+
+        if self.judge_cache is not None and not any(s.scoring_failed for s in scores):
+            self.judge_cache.set(
+                key, json.dumps([asdict(score) for score in scores]).encode("utf-8")
+            )
+
+        return scores
+
+    def __write_checkpoint(self, result: EvaluationResult) -> None:
+        line = json.dumps(asdict(result), ensure_ascii=False, default=str)
+        with self.__lock:
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def get_item_id(item: dict) -> str:
+    """Stable id of a dataset item, from its input."""
+
+    return hashlib.sha256(str(item["input"]).encode("utf-8")).hexdigest()[:16]
+
+
+def get_judge_cache_key(metric: base_metric.BaseMetric, output: dict[str, Any]) -> str:
+    """Hash of a metric, its settings and the inputs it scores.
+
+    The settings include the judge model id and the prompt and thresholds of the
+    metric, and the Opik version for the prompts of its built-in judges, so changing
+    any of them judges the answers again.
+    """
+
+    payload = json.dumps(
+        [
+            type(metric).__qualname__,
+            metric.name,
+            opik.__version__,
+            get_metric_settings(metric),
+            output,
+        ],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+
+    return "judge:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_metric_settings(metric: base_metric.BaseMetric) -> dict[str, Any]:
+    """Attributes of a metric that change its scores, e.g. its model id, prompt and thresholds."""
+
+    metric_settings = {}
+    for name, value in vars(metric).items():
+        if isinstance(value, OpikBaseModel):
+            metric_settings[name] = value.model_name
+        elif isinstance(value, (str, int, float, bool, list, tuple, dict, type(None))):
+            metric_settings[name] = value
+
+    return metric_settings
+
+
+def get_mean_scores(results: list[EvaluationResult]) -> dict[str, float]:
+    """Mean value of every score over the items it did not fail on."""
+
+    values: dict[str, list[float]] = {}
+    for result in results:
+        for score in result.scores:
+            if not score.scoring_failed:
+                values.setdefault(score.name, []).append(score.value)
+
+    return {name: sum(scores) / len(scores) for name, scores in values.items()}
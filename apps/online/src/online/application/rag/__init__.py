@@ -1,4 +1,5 @@
 from .embeddings import EmbeddingModelType, get_embedding_model
+from .local import LocalHybridSearchRetriever, LocalVectorStore
 from .retrievers import get_retriever
 from .splitters import get_splitter
 
@@ -7,4 +8,6 @@ __all__ = [
     "EmbeddingModelType",
     "get_embedding_model",
     "get_splitter",
+    "LocalHybridSearchRetriever",
+    "LocalVectorStore",
 ]
\ No newline at end of file
@@ -0,0 +1,195 @@
+import asyncio
+from typing import Any
+
+from langchain_core.documents import Document as LangChainDocument
+from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_mongodb.pipelines import (
+    combine_pipelines,
+    final_hybrid_stage,
+    reciprocal_rank_stage,
+    text_search_stage,
+    vector_search_stage,
+)
+from langchain_mongodb.retrievers import (
+    MongoDBAtlasHybridSearchRetriever,
+    MongoDBAtlasParentDocumentRetriever,
+)
+from langchain_mongodb.utils import make_serializable
+from pymongo.asynchronous.collection import AsyncCollection
+
+from online.config import settings
+from online.infrastructure.mongo import get_async_mongo_client
+
+from .local import LocalVectorStore
+from .retrievers import RetrieverModel
+
+
+class AsyncRetriever:
+    """Async counterpart of the retrievers returned by `get_retriever`.
+
+    The LangChain MongoDB retrievers only run their searches with the sync driver
+    (their async methods delegate to a thread pool). This wrapper embeds the query
+    with the async embedding API and runs the same aggregation pipelines on an
+    `AsyncMongoClient`, so a retrieval never blocks the event loop or a thread.
+    Local retrievers, whose search is in-process NumPy work, search in a thread.
+
+    The pipelines mirror `_get_relevant_documents` of the langchain_mongodb 0.6.2
+    retrievers and read the field and index names from private vector store
+    attributes, so re-check them when upgrading langchain_mongodb.
+
+    Attributes:
+        retriever: The wrapped retriever, used for its configuration.
+    """
+
+    def __init__(self, retriever: RetrieverModel) -> None:
+        self.retriever = retriever
+
+    async def ainvoke(self, query: str) -> list[LangChainDocument]:
+        """Retrieve the documents relevant to a query.
+
+        Args:
+            query: The query.
+
+        Returns:
+            list[LangChainDocument]: The relevant documents, as `invoke` would return them.
+        """
+
+        retriever = self.retriever
+        vectorstore = retriever.vectorstore
+
+        if isinstance(vectorstore, LocalVectorStore):
+            if not isinstance(retriever, VectorStoreRetriever):
+                return await asyncio.to_thread(retriever.invoke, query)
+
+            embedding = await vectorstore.embeddings.aembed_query(query)
+
+            return await asyncio.to_thread(
+                vectorstore.similarity_search_by_vector,
+                embedding,
+                **retriever.search_kwargs,
+            )
+
+        query_vector = await vectorstore.embeddings.aembed_query(query)
+        if isinstance(retriever, MongoDBAtlasHybridSearchRetriever):
+            pipeline = self.__hybrid_search_pipeline(query, query_vector)
+        elif isinstance(retriever, MongoDBAtlasParentDocumentRetriever):
+            pipeline = self.__parent_document_pipeline(query_vector)
+        else:
+            raise ValueError(f"Unsupported retriever: {type(retriever).__name__}")
+
+        cursor = await self.__get_collection().aggregate(pipeline)
+
+        documents = []
+        async for result in cursor:
+            text = result.pop(vectorstore._text_key)
+            make_serializable(result)
+            documents.append(LangChainDocument(page_content=text, metadata=result))
+
+        return documents
+
+    def __get_collection(self) -> AsyncCollection:
+        client = get_async_mongo_client(settings.MONGODB_URI, appname="online")
+        collection_name = self.retriever.vectorstore.collection.name
+
+        return client[settings.MONGODB_DATABASE_NAME][collection_name]
+
+    def __hybrid_search_pipeline(
+        self, query: str, query_vector: list[float]
+    ) -> list[dict[str, Any]]:
+        """Same pipeline as `MongoDBAtlasHybridSearchRetriever._get_relevant_documents`."""
+
+        retriever: MongoDBAtlasHybridSearchRetriever = self.retriever
+        vectorstore = retriever.vectorstore
+        collection_name = vectorstore.collection.name
+        k = retriever.top_k if retriever.top_k is not None else retriever.k
+
+        pipeline: list[Any] = []
+
+        vector_pipeline = [
+            self.__vector_search_stage(
+                query_vector,
+                top_k=k,
+                filter=retriever.pre_filter,
+                oversampling_factor=retriever.oversampling_factor,
+            )
+        ]
+        vector_pipeline += reciprocal_rank_stage("vector_score", retriever.vector_penalty)
+        combine_pipelines(pipeline, vector_pipeline, collection_name)
+
+        text_pipeline = text_search_stage(
+            query=query,
+            search_field=vectorstore._text_key,
+            index_name=retriever.search_index_name,
+            limit=k,
+            filter=retriever.pre_filter,
+        )
+        text_pipeline.extend(
+            reciprocal_rank_stage("fulltext_score", retriever.fulltext_penalty)
+        )
+        combine_pipelines(pipeline, text_pipeline, collection_name)
+
+        pipeline.extend(
+            final_hybrid_stage(scores_fields=["vector_score", "fulltext_score"], limit=k)
+        )
+        if not retriever.show_embeddings:
+            pipeline.append(self.__exclude_embedding_stage())
+        if retriever.post_filter is not None:
+            pipeline.extend(retriever.post_filter)
+
+        return pipeline
+
+    def __parent_document_pipeline(
+        self, query_vector: list[float]
+    ) -> list[dict[str, Any]]:
+        """Same pipeline as `MongoDBAtlasParentDocumentRetriever._get_relevant_documents`.
+
+        langchain_mongodb projects out a hard-coded `embedding` field here, while this
+        pipeline drops the configured embedding key, like the hybrid search pipeline.
+        """
+
+        retriever: MongoDBAtlasParentDocumentRetriever = self.retriever
+        vectorstore = retriever.vectorstore
+
+        return [
+            self.__vector_search_stage(query_vector, **retriever.search_kwargs),
+            {"$set": {"score": {"$meta": "vectorSearchScore"}}},
+            self.__exclude_embedding_stage(),
+            {
+                "$lookup": {
+                    "from": vectorstore.collection.name,
+                    "localField": retriever.id_key,
+                    "foreignField": "_id",
+                    "as": "parent_context",
+                    "pipeline": [
+                        {"$match": {f"metadata.{retriever.id_key}": {"$exists": False}}},
+                    ],
+                }
+            },
+            {"$unwind": {"path": "$parent_context"}},
+            {
+                "$group": {
+                    "_id": "$parent_context._id",
+                    "uniqueDocument": {"$first": "$parent_context"},
+                }
+            },
+            {"$replaceRoot": {"newRoot": "$uniqueDocument"}},
+        ]
+
+    def __vector_search_stage(
+        self, query_vector: list[float], **kwargs: Any
+    ) -> dict[str, Any]:
+        """`$vectorSearch` stage over the embedding field and index of the vector store."""
+
+        vectorstore = self.retriever.vectorstore
+
+        return vector_search_stage(
+            query_vector=query_vector,
+            search_field=vectorstore._embedding_key,
+            index_name=vectorstore._index_name,
+            **kwargs,
+        )
+
+    def __exclude_embedding_stage(self) -> dict[str, Any]:
+        """Stage removing the embeddings from the search results."""
+
+        return {"$project": {self.retriever.vectorstore._embedding_key: 0}}
@@ -1,26 +1,176 @@
-from typing import Literal, Union
-
+import asyncio
+import hashlib
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Literal, Union
+
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_openai import OpenAIEmbeddings
 
+from online.config import settings
+from online.infrastructure.cache import LRUCache, SQLiteCache
+
 EmbeddingModelType = Literal["openai", "huggingface"]
-EmbeddingsModel = Union[OpenAIEmbeddings, HuggingFaceEmbeddings]
+
+class CachedEmbeddings(Embeddings):
+    """Embedding model wrapper that serves previously embedded texts from a cache.
+
+    Entries are content-addressed by the model id and the text, so re-embedding an
+    unchanged chunk (offline) or a repeated query (online) costs nothing. Vectors are
+    stored as float32 arrays. Attributes not defined here, such as `model`, are
+    forwarded to the wrapped embedding model.
+
+    Query embeddings can additionally be kept in an in-memory tier, so a query that
+    is repeated within the same process does not even hit SQLite.
+
+    Attributes:
+        embedding_model: The wrapped embedding model.
+        model_id: Identifier of the wrapped model, part of every cache key.
+        cache: The persistent cache storing the vectors.
+        memory_cache: Optional in-memory cache of query embeddings.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Embeddings,
+        model_id: str,
+        cache: SQLiteCache,
+        memory_cache: LRUCache[list[float]] | None = None,
+    ) -> None:
+        self.embedding_model = embedding_model
+        self.model_id = model_id
+        self.cache = cache
+        self.memory_cache = memory_cache
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "embedding_model":
+            raise AttributeError(name)
+
+        return getattr(self.embedding_model, name)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed documents, only calling the wrapped model for uncached texts.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            list[list[float]]: One embedding per text, in the same order.
+        """
+
+        keys = [self.__key(text, "document") for text in texts]
+        vectors = {
+            key: self.__unpack(value) for key, value in self.cache.get_many(keys).items()
+        }
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            embeddings = self.embedding_model.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), embeddings))
+            self.cache.set_many(
+                {key: self.__pack(vector) for key, vector in new_vectors.items()}
+            )
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query, only calling the wrapped model if it is not cached.
+
+        Args:
+            text: The query to embed.
+
+        Returns:
+            list[float]: The query embedding.
+        """
+
+        key = self.__key(text, "query")
+        if self.memory_cache is not None:
+            vector = self.memory_cache.get(key)
+            if vector is not None:
+                return vector
+
+        value = self.cache.get(key)
+        if value is not None:
+            vector = self.__unpack(value)
+        else:
+            vector = self.embedding_model.embed_query(text)
+            self.cache.set(key, self.__pack(vector))
+
+        if self.memory_cache is not None:
+            self.memory_cache.set(key, vector)
+
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Embed a query with the async API of the wrapped model if it is not cached.
+
+        Args:
+            text: The query to embed.
+
+        Returns:
+            list[float]: The query embedding.
+        """
+
+        key = self.__key(text, "query")
+        if self.memory_cache is not None:
+            vector = self.memory_cache.get(key)
+            if vector is not None:
+                return vector
+
+        # SQLite calls block on disk I/O and locks, so they run off the event loop.
+        value = await asyncio.to_thread(self.cache.get, key)
+        if value is not None:
+            vector = self.__unpack(value)
+        else:
+            vector = await self.embedding_model.aembed_query(text)
+            await asyncio.to_thread(self.cache.set, key, self.__pack(vector))
+
+        if self.memory_cache is not None:
+            self.memory_cache.set(key, vector)
+
+        return vector
+
+    def __key(self, text: str, kind: str) -> str:
+        # Queries and documents are keyed separately, as some models embed them differently.
+        return hashlib.sha256(f"{self.model_id}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def __pack(vector: list[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def __unpack(value: bytes) -> list[float]:
+        vector = array("f")
+        vector.frombytes(value)
+
+        return vector.tolist()
+
+
+EmbeddingsModel = Union[OpenAIEmbeddings, HuggingFaceEmbeddings, CachedEmbeddings]
+
 
 def get_embedding_model(
     model_id: str,
     model_type: EmbeddingModelType = "huggingface",
     device: str = "cpu",
+    use_cache: bool = True,
 ) -> EmbeddingsModel:
     """Gets an instance of the configured embedding model.
 
     The function returns either an OpenAI or HuggingFace embedding model based on the
-    provided model type.
+    provided model type, wrapped in a persistent embedding cache unless disabled.
+    Query embeddings are also kept in memory in front of the persistent cache.
 
     Args:
         model_id (str): The ID/name of the embedding model to use
         model_type (EmbeddingModelType): The type of embedding model to use.
             Must be either "openai" or "huggingface". Defaults to "huggingface"
         device (str): The device to use for the embedding model. Defaults to "cpu"
+        use_cache (bool): Whether to cache embeddings on disk at
+            settings.EMBEDDING_CACHE_PATH. Defaults to True
 
     Returns:
         EmbeddingsModel: An embedding model instance based on the configuration settings
@@ -30,12 +180,41 @@ def get_embedding_model(
     """
 
     if model_type == "openai":
-        return get_openai_embedding_model(model_id)
+        embedding_model = get_openai_embedding_model(model_id)
     elif model_type == "huggingface":
-        return get_huggingface_embedding_model(model_id, device)
+        embedding_model = get_huggingface_embedding_model(model_id, device)
     else:
         raise ValueError(f"Invalid embedding model type: {model_type}")
 
+    if not use_cache or settings.EMBEDDING_CACHE_PATH is None:
+        return embedding_model
+
+    return CachedEmbeddings(
+        embedding_model,
+        model_id=f"{model_type}/{model_id}",
+        cache=get_embedding_cache(settings.EMBEDDING_CACHE_PATH),
+        memory_cache=LRUCache(
+            max_size=settings.RETRIEVER_CACHE_MAX_SIZE,
+            ttl_seconds=settings.RETRIEVER_CACHE_TTL_SECONDS,
+        ),
+    )
+
+
+@lru_cache
+def get_embedding_cache(path: Path) -> SQLiteCache:
+    """Gets the process-wide embedding cache stored at the given path.
+
+    Args:
+        path (Path): Path of the SQLite file backing the cache
+
+    Returns:
+        SQLiteCache: The embedding cache, shared by every model of the process
+    """
+
+    return SQLiteCache(
+        path, max_size_bytes=settings.EMBEDDING_CACHE_MAX_SIZE_MB * 1024 * 1024
+    )
+
 def get_openai_embedding_model(model_id: str) -> OpenAIEmbeddings:
     """Gets an OpenAI embedding model instance.
 
@@ -70,4 +249,3 @@ def get_huggingface_embedding_model(
         model_kwargs={"device": device, "trust_remote_code": True},
         encode_kwargs={"normalize_embeddings": False},
     )
-
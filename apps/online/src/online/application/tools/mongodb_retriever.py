@@ -1,12 +1,21 @@
+import asyncio
 import json
+import threading
+import time
 from pathlib import Path
 import yaml
 
+from langchain_core.documents import Document as LangChainDocument
 from opik import opik_context, track
 from loguru import logger
 from smolagents import Tool
 
+from online.application.rag import LocalVectorStore
+from online.application.rag.async_retrievers import AsyncRetriever
 from online.application.rag.retrievers import get_retriever
+from online.config import settings
+from online.infrastructure.cache import LRUCache
+from online.infrastructure.mongo import IndexVersionStamp
 
 class MongoDBRetrieverTool(Tool):
     name = "mongodb_vector_search_retriever"
@@ -32,6 +41,18 @@ class MongoDBRetrieverTool(Tool):
 
         self.config_path = config_path
         self.retriever = self.__load_retriever(config_path)
+        self.async_retriever = AsyncRetriever(self.retriever)
+
+        # Query → documents, keyed by the index version so a rebuilt index is never
+        # served stale results. Query embeddings are cached by the embedding model.
+        self.results_cache: LRUCache[list[LangChainDocument]] = LRUCache(
+            max_size=settings.RETRIEVER_CACHE_MAX_SIZE,
+            ttl_seconds=settings.RETRIEVER_CACHE_TTL_SECONDS,
+        )
+        self.__index_version: str | None = None
+        self.__index_version_checked_at = float("-inf")
+        # Serializes the version refreshes of the pooled agents and worker threads.
+        self.__index_version_lock = threading.Lock()
 
     def __load_retriever(self, config_path: Path):
         config = yaml.safe_load(config_path.read_text())
@@ -47,6 +68,34 @@ class MongoDBRetrieverTool(Tool):
     
     @track(name="MongoDBRetrieverTool.forward")
     def forward(self, query: str) -> str:
+        self.__update_trace()
+
+        try:
+            # query = self.__parse_query(query)
+            relevant_docs = self.__retrieve(query)
+
+            return self.__format_documents(relevant_docs)
+        except Exception:
+            logger.opt(exception=True).debug("Error retrieving documents.")
+
+            return "Error retrieving documents."
+
+    @track(name="MongoDBRetrieverTool.aforward")
+    async def aforward(self, query: str) -> str:
+        """Async version of `forward`, which does not block the event loop."""
+
+        self.__update_trace()
+
+        try:
+            relevant_docs = await self.__aretrieve(query)
+
+            return self.__format_documents(relevant_docs)
+        except Exception:
+            logger.opt(exception=True).debug("Error retrieving documents.")
+
+            return "Error retrieving documents."
+
+    def __update_trace(self) -> None:
         if hasattr(self.retriever, "search_kwargs"):
             search_kwargs = self.retriever.search_kwargs
         else:
@@ -69,38 +118,105 @@ class MongoDBRetrieverTool(Tool):
             },
         )
 
-        try:
-            # query = self.__parse_query(query)
-            relevant_docs = self.retriever.invoke(query)
-
-            formatted_docs = []
-            for i, doc in enumerate(relevant_docs, 1):
-                formatted_docs.append(
-                    f"""
+    def __format_documents(self, relevant_docs: list[LangChainDocument]) -> str:
+        formatted_docs = []
+        for i, doc in enumerate(relevant_docs, 1):
+            formatted_docs.append(
+                f"""
 <document id="{i}">
 <title>{doc.metadata.get("title")}</title>
 <url>{doc.metadata.get("url")}</url>
 <content>{doc.page_content.strip()}</content>
 </document>
 """
-                )
+            )
 
-            result = "\n".join(formatted_docs)
-            result = f"""
+        result = "\n".join(formatted_docs)
+        result = f"""
 <search_results>
 {result}
 </search_results>
 When using context from any document, also include the document URL as reference, which is found in the <url> tag.
 """
-            return result
-        except Exception:
-            logger.opt(exception=True).debug("Error retrieving documents.")
+        return result
 
-            return "Error retrieving documents."
+    def __retrieve(self, query: str) -> list[LangChainDocument]:
+        key = (self.get_index_version(), normalize_query(query))
+        relevant_docs = self.results_cache.get(key)
+
+        opik_context.update_current_span(
+            metadata={"results_cache_hit": relevant_docs is not None}
+        )
+
+        if relevant_docs is None:
+            relevant_docs = self.retriever.invoke(query)
+            self.results_cache.set(key, relevant_docs)
+
+        return relevant_docs
+
+    async def __aretrieve(self, query: str) -> list[LangChainDocument]:
+        # The version stamp is a single, throttled point read: a worker thread is
+        # cheaper than a second code path on the async driver.
+        index_version = await asyncio.to_thread(self.get_index_version)
+        key = (index_version, normalize_query(query))
+        relevant_docs = self.results_cache.get(key)
+
+        opik_context.update_current_span(
+            metadata={"results_cache_hit": relevant_docs is not None}
+        )
+
+        if relevant_docs is None:
+            relevant_docs = await self.async_retriever.ainvoke(query)
+            self.results_cache.set(key, relevant_docs)
+
+        return relevant_docs
+
+    def get_index_version(self) -> str | None:
+        """Read the version stamp of the index, at most once per check interval.
+
+        Safe to call from several threads: concurrent callers wait for a single
+        refresh instead of each reading the version stamp.
+
+        Returns:
+            str | None: The version of the index, or None if it was never stamped.
+        """
+
+        with self.__index_version_lock:
+            now = time.monotonic()
+            if (
+                now - self.__index_version_checked_at
+                < settings.RETRIEVER_CACHE_VERSION_CHECK_SECONDS
+            ):
+                return self.__index_version
+
+            vectorstore = self.retriever.vectorstore
+            if isinstance(vectorstore, LocalVectorStore):
+                version = vectorstore.index.version
+            else:
+                version = IndexVersionStamp(vectorstore.collection).get()
+
+            if version != self.__index_version:
+                if self.__index_version is not None:
+                    logger.info(
+                        f"Index version changed from '{self.__index_version}' to '{version}'. "
+                        "Clearing the cached retrieval results."
+                    )
+                self.results_cache.clear()
+
+            self.__index_version = version
+            self.__index_version_checked_at = time.monotonic()
+
+            return version
 
     @track(name="MongoDBRetrieverTool.parse_query")
     def __parse_query(self, query: str) -> str:
         print(query, 123123)
         query_dict = json.loads(query)
 
-        return query_dict["query"]
\ No newline at end of file
+        return query_dict["query"]
+
+
+def normalize_query(query: str) -> str:
+    """Normalize whitespace and case, so near-identical queries share cached results."""
+
+    return " ".join(query.split()).casefold()
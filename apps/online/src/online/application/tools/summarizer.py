@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from opik import track
 from smolagents import Tool
 
@@ -41,6 +41,10 @@ You are a helpful assistant specialized in summarizing documents. Generate a con
             base_url=settings.HUGGINGFACE_DEDICATED_ENDPOINT,
             api_key=settings.HUGGINGFACE_ACCESS_TOKEN,
         )
+        self.__async_client = AsyncOpenAI(
+            base_url=settings.HUGGINGFACE_DEDICATED_ENDPOINT,
+            api_key=settings.HUGGINGFACE_ACCESS_TOKEN,
+        )
 
     @track
     def forward(self, text: str) -> str:
@@ -56,6 +60,20 @@ You are a helpful assistant specialized in summarizing documents. Generate a con
 
         return result.choices[0].message.content
 
+    @track
+    async def aforward(self, text: str) -> str:
+        result = await self.__async_client.chat.completions.create(
+            model="tgi",
+            messages=[
+                {
+                    "role": "user",
+                    "content": self.SYSTEM_PROMPT.format(content=text),
+                },
+            ],
+        )
+
+        return result.choices[0].message.content
+
 
 class OpenAISummarizerTool(Tool):
     name = "openai_summarizer"
@@ -93,6 +111,10 @@ Return the document in plain text format regardless of the original format.
             base_url="https://api.openai.com/v1",
             api_key=settings.OPENAI_API_KEY,
         )
+        self.__async_client = AsyncOpenAI(
+            base_url="https://api.openai.com/v1",
+            api_key=settings.OPENAI_API_KEY,
+        )
 
     @track
     def forward(self, text: str) -> str:
@@ -107,3 +129,17 @@ Return the document in plain text format regardless of the original format.
         )
 
         return result.choices[0].message.content
+
+    @track
+    async def aforward(self, text: str) -> str:
+        result = await self.__async_client.chat.completions.create(
+            model=settings.OPENAI_MODEL_ID,
+            messages=[
+                {
+                    "role": "user",
+                    "content": self.SYSTEM_PROMPT.format(content=text),
+                },
+            ],
+        )
+
+        return result.choices[0].message.content
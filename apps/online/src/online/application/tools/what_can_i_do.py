@@ -68,3 +68,8 @@ class WhatCanIDoTool(Tool):
     Learning Resources:
     - Can you recommend courses on LLMs and RAG?
     """
+
+    async def aforward(self, question: str) -> str:
+        """Async version of `forward`, which does no I/O."""
+
+        return self.forward(question)
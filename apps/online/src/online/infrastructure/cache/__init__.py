@@ -0,0 +1,7 @@
+from .memory import LRUCache
+from .sqlite import SQLiteCache
+
+__all__ = [
+    "LRUCache",
+    "SQLiteCache",
+]
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe in-memory cache evicting least recently used entries first.
+
+    Entries are treated as missing once they are older than `ttl_seconds` (if set).
+    Meant as a fast first tier in front of slower caches such as `SQLiteCache`.
+
+    Attributes:
+        max_size: Maximum number of entries.
+        ttl_seconds: Optional time-to-live of an entry, counted from its creation.
+        hits: Number of keys found in the cache since it was created.
+        misses: Number of keys not found in the cache since it was created.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float | None = None) -> None:
+        assert max_size > 0, "max_size must be positive"
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self.__lock = threading.Lock()
+        self.__entries: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> V | None:
+        """Get a value and mark it as recently used.
+
+        Args:
+            key: Key of the entry.
+
+        Returns:
+            V | None: The cached value, or None if it is missing or expired.
+        """
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and self.__is_expired(entry[0]):
+                del self.__entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+    def set(self, key: Hashable, value: V) -> None:
+        """Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: Key of the entry.
+            value: Value to store.
+        """
+
+        with self.__lock:
+            self.__entries[key] = (time.monotonic(), value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+
+        with self.__lock:
+            self.__entries.clear()
+
+    def __is_expired(self, created_at: float) -> bool:
+        return (
+            self.ttl_seconds is not None
+            and time.monotonic() - created_at > self.ttl_seconds
+        )
@@ -0,0 +1,222 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+from loguru import logger
+
+
+class SQLiteCache:
+    """Persistent key-value cache backed by a single SQLite file.
+
+    Values are raw bytes. Entries are evicted least-recently-used first once the
+    total size of the stored values exceeds `max_size_bytes`, and are treated as
+    missing once they are older than `ttl_seconds` (if set). The file is opened in
+    WAL mode so several processes can share the same cache.
+
+    Attributes:
+        path: Path of the SQLite database file.
+        max_size_bytes: Maximum total size of the stored values.
+        ttl_seconds: Optional time-to-live of an entry, counted from its creation.
+        hits: Number of keys found in the cache since it was opened.
+        misses: Number of keys not found in the cache since it was opened.
+    """
+
+    MAX_QUERY_PARAMETERS = 500
+
+    def __init__(
+        self,
+        path: Path,
+        max_size_bytes: int = 1024 * 1024 * 1024,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.max_size_bytes = max_size_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.__conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)"
+        )
+        self.__conn.commit()
+        self.__size_bytes = self.__query_size()
+
+        logger.debug(
+            f"Opened SQLite cache at '{self.path}' ({self.__size_bytes // (1024 * 1024)} MB)"
+        )
+
+    def __enter__(self) -> "SQLiteCache":
+        """Enable context manager support
+
+        Returns:
+            SQLiteCache: The current instance.
+        """
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Close the SQLite connection when exiting context.
+
+        Args:
+            exc_type: Type of exception that occurred, if any.
+            exc_val: Exception instance that occurred, if any.
+            exc_tb: Traceback of exception that occurred, if any.
+        """
+
+        self.close()
+
+    def get(self, key: str) -> bytes | None:
+        """Get a single value from the cache.
+
+        Args:
+            key: Key of the entry.
+
+        Returns:
+            bytes | None: The cached value, or None if it is missing or expired.
+        """
+
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, bytes]:
+        """Get several values from the cache in as few queries as possible.
+
+        Args:
+            keys: Keys of the entries.
+
+        Returns:
+            dict[str, bytes]: The cached values of the keys that were found.
+        """
+
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        min_created_at = now - self.ttl_seconds if self.ttl_seconds else 0
+
+        found: dict[str, bytes] = {}
+        expired: list[str] = []
+        with self.__lock:
+            for i in range(0, len(keys), self.MAX_QUERY_PARAMETERS):
+                batch = keys[i : i + self.MAX_QUERY_PARAMETERS]
+                rows = self.__conn.execute(
+                    f"SELECT key, value, created_at FROM cache WHERE key IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if created_at < min_created_at:
+                        expired.append(key)
+                    else:
+                        found[key] = value
+
+            if found:
+                self.__conn.executemany(
+                    "UPDATE cache SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+            if expired:
+                self.__delete(expired)
+            self.__conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return found
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store a single value in the cache.
+
+        Args:
+            key: Key of the entry.
+            value: Value to store.
+        """
+
+        self.set_many({key: value})
+
+    def set_many(self, items: dict[str, bytes]) -> None:
+        """Store several values in the cache and evict old entries if needed.
+
+        Args:
+            items: Mapping of keys to values to store.
+        """
+
+        if not items:
+            return
+
+        now = time.time()
+        with self.__lock:
+            self.__conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(key, value, len(value), now, now) for key, value in items.items()],
+            )
+            self.__conn.commit()
+            self.__size_bytes += sum(len(value) for value in items.values())
+
+            if self.__size_bytes > self.max_size_bytes:
+                self.__evict()
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+
+        with self.__lock:
+            self.__conn.execute("DELETE FROM cache")
+            self.__conn.commit()
+            self.__size_bytes = 0
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+
+        with self.__lock:
+            self.__conn.close()
+
+        logger.debug(
+            f"Closed SQLite cache at '{self.path}'. Hits: {self.hits}, misses: {self.misses}"
+        )
+
+    def __evict(self) -> None:
+        """Delete least recently used entries until the cache is below 90% of its budget."""
+
+        # Other processes may share the file, so re-read the real size before evicting.
+        self.__size_bytes = self.__query_size()
+        target_size = int(self.max_size_bytes * 0.9)
+        if self.__size_bytes <= target_size:
+            return
+
+        evicted_keys = []
+        evicted_size = 0
+        for key, size in self.__conn.execute(
+            "SELECT key, size FROM cache ORDER BY accessed_at ASC"
+        ):
+            if self.__size_bytes - evicted_size <= target_size:
+                break
+            evicted_keys.append(key)
+            evicted_size += size
+
+        self.__delete(evicted_keys)
+        self.__conn.commit()
+        self.__size_bytes -= evicted_size
+
+        logger.debug(
+            f"Evicted {len(evicted_keys)} entries ({evicted_size // 1024} KB) from '{self.path}'"
+        )
+
+    def __delete(self, keys: list[str]) -> None:
+        self.__conn.executemany(
+            "DELETE FROM cache WHERE key = ?", [(key,) for key in keys]
+        )
+
+    def __query_size(self) -> int:
+        (size,) = self.__conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+
+        return size
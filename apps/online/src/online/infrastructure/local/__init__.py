@@ -0,0 +1,9 @@
+from .bm25 import BM25Index
+from .ivf import IVFIndex
+from .vector_index import LocalVectorIndex
+
+__all__ = [
+    "BM25Index",
+    "IVFIndex",
+    "LocalVectorIndex",
+]
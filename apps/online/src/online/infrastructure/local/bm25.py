@@ -0,0 +1,283 @@
+import json
+import math
+import re
+from array import array
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+from loguru import logger
+
+from .vector_index import top_k
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class BM25Index:
+    """In-process BM25 inverted index over the text of the local vector index rows.
+
+    Rows are the same as the ones of `LocalVectorIndex`, so full-text and vector
+    results can be fused by row. All postings, including the persisted ones when
+    rows are appended, are held in memory while indexing, and written by `save` as
+    fixed-width (not delta or varint encoded), term-sorted arrays:
+        - `bm25.rows.u32`: the rows of every posting list, concatenated.
+        - `bm25.tfs.u16`: the term frequency of every posting.
+        - `bm25.doc_lengths.u32`: the number of tokens of every row.
+        - `bm25.json`: the vocabulary, mapping each term to the (offset, length) of
+          its posting list, and the index statistics.
+
+    The posting and length arrays are memory-mapped for search, and a query only
+    reads and scores the posting lists of its terms.
+
+    Attributes:
+        directory: Directory holding the index files.
+        k1: BM25 term frequency saturation.
+        b: BM25 document length normalization.
+    """
+
+    ROWS_FILE = "bm25.rows.u32"
+    TFS_FILE = "bm25.tfs.u16"
+    DOC_LENGTHS_FILE = "bm25.doc_lengths.u32"
+    MANIFEST_FILE = "bm25.json"
+
+    def __init__(self, directory: Path, k1: float = 1.2, b: float = 0.75) -> None:
+        self.directory = Path(directory)
+        self.k1 = k1
+        self.b = b
+
+        self.__terms: dict[str, tuple[int, int]] | None = None
+        self.__rows: np.ndarray | None = None
+        self.__tfs: np.ndarray | None = None
+        self.__doc_lengths: np.ndarray | None = None
+        self.__norms: np.ndarray | None = None
+
+        self.__pending: dict[str, tuple[array, array]] | None = None
+        self.__pending_doc_lengths: array | None = None
+
+    @property
+    def count(self) -> int:
+        if self.__pending_doc_lengths is not None:
+            return len(self.__pending_doc_lengths)
+
+        self.__load()
+
+        return len(self.__doc_lengths)
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        return (Path(directory) / cls.MANIFEST_FILE).exists()
+
+    def clear(self) -> None:
+        """Remove every row from the index, on disk and in memory."""
+
+        for file_name in (
+            self.ROWS_FILE,
+            self.TFS_FILE,
+            self.DOC_LENGTHS_FILE,
+            self.MANIFEST_FILE,
+        ):
+            (self.directory / file_name).unlink(missing_ok=True)
+
+        self.__invalidate()
+        self.__pending = None
+        self.__pending_doc_lengths = None
+
+    def add(self, first_row: int, texts: Iterable[str]) -> None:
+        """Index the texts of consecutive rows.
+
+        The postings stay in memory until `save` is called.
+
+        Args:
+            first_row: Row of the first text, which must follow the last indexed row.
+            texts: The texts of the rows.
+        """
+
+        if self.__pending is None:
+            self.__start_update()
+
+        assert first_row == len(self.__pending_doc_lengths), (
+            f"Expected rows to be added from {len(self.__pending_doc_lengths)}, got {first_row}"
+        )
+
+        for row, text in enumerate(texts, start=first_row):
+            tokens = tokenize(text)
+            self.__pending_doc_lengths.append(len(tokens))
+
+            frequencies: dict[str, int] = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+
+            for term, frequency in frequencies.items():
+                postings = self.__pending.get(term)
+                if postings is None:
+                    postings = self.__pending[term] = (array("I"), array("H"))
+                postings[0].append(row)
+                postings[1].append(min(frequency, 65_535))
+
+    def save(self) -> None:
+        """Write the postings accumulated by `add` to disk."""
+
+        if self.__pending is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        terms = {}
+        offset = 0
+        with (
+            open(self.directory / self.ROWS_FILE, "wb") as rows_file,
+            open(self.directory / self.TFS_FILE, "wb") as tfs_file,
+        ):
+            for term in sorted(self.__pending):
+                rows, tfs = self.__pending[term]
+                rows.tofile(rows_file)
+                tfs.tofile(tfs_file)
+                terms[term] = (offset, len(rows))
+                offset += len(rows)
+
+        with open(self.directory / self.DOC_LENGTHS_FILE, "wb") as f:
+            self.__pending_doc_lengths.tofile(f)
+
+        count = len(self.__pending_doc_lengths)
+        manifest = {
+            "version": 1,
+            "count": count,
+            "num_postings": offset,
+            "avg_doc_length": sum(self.__pending_doc_lengths) / max(count, 1),
+            "terms": terms,
+        }
+        (self.directory / self.MANIFEST_FILE).write_text(
+            json.dumps(manifest, ensure_ascii=False), encoding="utf-8"
+        )
+
+        logger.debug(
+            f"BM25 index at '{self.directory}' has {count} rows, "
+            f"{len(terms)} terms and {offset} postings"
+        )
+
+        self.__invalidate()
+        self.__pending = None
+        self.__pending_doc_lengths = None
+
+    def search(self, query: str, k: int = 4) -> list[tuple[int, float]]:
+        """Top-k search by BM25 score.
+
+        Args:
+            query: The query text.
+            k: Number of results.
+
+        Returns:
+            list[tuple[int, float]]: (row, score) pairs sorted by decreasing score.
+        """
+
+        if not self.__load():
+            return []
+
+        count = len(self.__doc_lengths)
+
+        matched_rows = []
+        matched_scores = []
+        for term in set(tokenize(query)):
+            if term not in self.__terms:
+                continue
+
+            offset, length = self.__terms[term]
+            rows = self.__rows[offset : offset + length]
+            tfs = self.__tfs[offset : offset + length].astype(np.float32)
+
+            idf = math.log(1 + (count - length + 0.5) / (length + 0.5))
+            matched_rows.append(rows)
+            matched_scores.append(idf * tfs * (self.k1 + 1) / (tfs + self.__norms[rows]))
+
+        if not matched_rows:
+            return []
+
+        # Sum the scores per candidate row, without a pass over every row of the index.
+        candidates, positions = np.unique(np.concatenate(matched_rows), return_inverse=True)
+        scores = np.bincount(positions, weights=np.concatenate(matched_scores))
+
+        return [(int(candidates[i]), score) for i, score in top_k(scores, k)]
+
+    def __load(self) -> bool:
+        if self.__terms is not None:
+            return True
+
+        if not self.exists(self.directory):
+            self.__doc_lengths = np.empty(0, dtype=np.uint32)
+            return False
+
+        manifest = json.loads(
+            (self.directory / self.MANIFEST_FILE).read_text(encoding="utf-8")
+        )
+        self.__terms = {term: tuple(entry) for term, entry in manifest["terms"].items()}
+        self.__rows = load_array(self.directory / self.ROWS_FILE, np.uint32)
+        self.__tfs = load_array(self.directory / self.TFS_FILE, np.uint16)
+        self.__doc_lengths = load_array(self.directory / self.DOC_LENGTHS_FILE, np.uint32)
+
+        # Length normalization of every row, which only depends on the index.
+        avg_doc_length = max(manifest["avg_doc_length"], 1e-6)
+        self.__norms = (
+            self.k1 * (1 - self.b + self.b * self.__doc_lengths / avg_doc_length)
+        ).astype(np.float32)
+
+        return True
+
+    def __start_update(self) -> None:
+        """Move the persisted postings, if any, to the in-memory buffers."""
+
+        self.__pending = {}
+        self.__pending_doc_lengths = array("I")
+        if not self.__load():
+            return
+
+        for term, (offset, length) in self.__terms.items():
+            self.__pending[term] = (
+                array("I", self.__rows[offset : offset + length].tobytes()),
+                array("H", self.__tfs[offset : offset + length].tobytes()),
+            )
+        self.__pending_doc_lengths.frombytes(self.__doc_lengths.tobytes())
+        self.__invalidate()
+
+    def __invalidate(self) -> None:
+        self.__terms = None
+        self.__rows = None
+        self.__tfs = None
+        self.__doc_lengths = None
+        self.__norms = None
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens of a text, similar to the Lucene standard analyzer."""
+
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def load_array(path: Path, dtype: type) -> np.ndarray:
+    if path.stat().st_size == 0:
+        return np.empty(0, dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+def reciprocal_rank_fusion(
+    results: Sequence[tuple[Sequence[tuple[int, float]], float]],
+) -> list[tuple[int, float]]:
+    """Fuse ranked result lists with reciprocal rank fusion.
+
+    A row ranked `rank` (from 0) in a list with penalty `penalty` scores
+    `1 / (rank + penalty + 1)`, as in MongoDB Atlas hybrid search, and the scores of
+    all lists are summed.
+
+    Args:
+        results: (ranked (row, score) pairs, penalty) of every result list.
+
+    Returns:
+        list[tuple[int, float]]: (row, fused score) pairs sorted by decreasing score.
+    """
+
+    scores: dict[int, float] = {}
+    for ranked, penalty in results:
+        for rank, (row, _) in enumerate(ranked):
+            scores[row] = scores.get(row, 0.0) + 1 / (rank + penalty + 1)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
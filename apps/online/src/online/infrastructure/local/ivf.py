@@ -0,0 +1,215 @@
+import json
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+from loguru import logger
+
+
+class IVFIndex:
+    """Inverted file (IVF) index for approximate search over normalized vectors.
+
+    Vectors are clustered with spherical k-means into `n_lists` inverted lists. A query
+    is only compared against the vectors of the `nprobe` lists whose centroids are the
+    most similar to it, so search cost scales with `nprobe / n_lists` of the index
+    instead of the whole matrix. Raising `nprobe` trades latency for recall; with
+    `nprobe == n_lists` the search is exact.
+
+    The index only stores row ids: vectors are read from the matrix of the
+    `LocalVectorIndex` it was built from.
+
+    Attributes:
+        centroids: (n_lists, dim) normalized cluster centroids.
+        rows: Row ids of the indexed vectors, grouped by list.
+        offsets: (n_lists + 1) start offsets of every list within `rows`.
+        nprobe: Default number of lists searched per query.
+    """
+
+    CENTROIDS_FILE = "ivf.centroids.f32"
+    ROWS_FILE = "ivf.rows.i64"
+    OFFSETS_FILE = "ivf.offsets.i64"
+    MANIFEST_FILE = "ivf.json"
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        rows: np.ndarray,
+        offsets: np.ndarray,
+        nprobe: int = 8,
+    ) -> None:
+        self.centroids = centroids
+        self.rows = rows
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        n_lists: int | None = None,
+        nprobe: int = 8,
+        n_iter: int = 10,
+        max_points_per_list: int = 256,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Cluster the vectors and build the inverted lists.
+
+        Args:
+            vectors: (count, dim) normalized vectors, e.g. a memory-mapped matrix.
+            n_lists: Number of inverted lists. Defaults to 4 * sqrt(count).
+            nprobe: Default number of lists searched per query.
+            n_iter: Number of k-means iterations.
+            max_points_per_list: Number of training points sampled per list.
+            seed: Seed of the training sample and initial centroids.
+
+        Returns:
+            IVFIndex: The trained index.
+        """
+
+        count = len(vectors)
+        assert count > 0, "Cannot build an IVF index over an empty matrix"
+
+        n_lists = min(n_lists or max(int(4 * np.sqrt(count)), 1), count)
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(count, n_lists * max_points_per_list)
+        sample_rows = np.sort(rng.choice(count, size=sample_size, replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+        centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = assign(sample, centroids)
+            centroids = update_centroids(sample, assignments, centroids, rng)
+
+        assignments = assign(vectors, centroids)
+        rows = np.argsort(assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(assignments, minlength=n_lists)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        logger.info(
+            f"Built IVF index over {count} vectors with {n_lists} lists "
+            f"(largest list: {counts.max()} vectors)"
+        )
+
+        return cls(centroids=centroids, rows=rows, offsets=offsets, nprobe=nprobe)
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        return (Path(directory) / cls.MANIFEST_FILE).exists()
+
+    @classmethod
+    def load(cls, directory: Path) -> "IVFIndex":
+        directory = Path(directory)
+        manifest = json.loads((directory / cls.MANIFEST_FILE).read_text(encoding="utf-8"))
+
+        centroids = np.fromfile(directory / cls.CENTROIDS_FILE, dtype=np.float32)
+
+        return cls(
+            centroids=centroids.reshape(manifest["n_lists"], -1),
+            rows=np.fromfile(directory / cls.ROWS_FILE, dtype=np.int64),
+            offsets=np.fromfile(directory / cls.OFFSETS_FILE, dtype=np.int64),
+            nprobe=manifest["nprobe"],
+        )
+
+    @classmethod
+    def delete(cls, directory: Path) -> None:
+        for file_name in (
+            cls.CENTROIDS_FILE,
+            cls.ROWS_FILE,
+            cls.OFFSETS_FILE,
+            cls.MANIFEST_FILE,
+        ):
+            (Path(directory) / file_name).unlink(missing_ok=True)
+
+    def save(self, directory: Path) -> None:
+        directory = Path(directory)
+        self.centroids.astype(np.float32).tofile(directory / self.CENTROIDS_FILE)
+        self.rows.tofile(directory / self.ROWS_FILE)
+        self.offsets.tofile(directory / self.OFFSETS_FILE)
+
+        manifest = {
+            "version": 1,
+            "n_lists": self.n_lists,
+            "count": self.count,
+            "nprobe": self.nprobe,
+        }
+        (directory / self.MANIFEST_FILE).write_text(json.dumps(manifest), encoding="utf-8")
+
+    def candidates(self, query: np.ndarray, nprobe: int | None = None) -> np.ndarray:
+        """Rows of the lists closest to the query, sorted for sequential reads.
+
+        Args:
+            query: The normalized query vector.
+            nprobe: Number of lists to search. Defaults to `self.nprobe`.
+
+        Returns:
+            np.ndarray: The candidate row ids.
+        """
+
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        centroid_scores = self.centroids @ query
+        lists = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        rows = np.concatenate(
+            [self.rows[self.offsets[i] : self.offsets[i + 1]] for i in lists]
+        )
+        rows.sort()
+
+        return rows
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid of every vector, computed in blocks."""
+
+    block_size = max(2**24 // max(len(centroids), 1), 1)
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start : start + block_size], dtype=np.float32)
+        assignments[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+    return assignments
+
+
+def update_centroids(
+    sample: np.ndarray,
+    assignments: np.ndarray,
+    centroids: np.ndarray,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    counts = np.bincount(assignments, minlength=len(centroids))
+    order = np.argsort(assignments, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    sums = np.zeros_like(centroids)
+    non_empty = counts > 0
+    sums[non_empty] = np.add.reduceat(sample[order], starts[non_empty], axis=0)
+
+    # Re-seed empty lists with random training points.
+    num_empty = int((~non_empty).sum())
+    if num_empty:
+        sums[~non_empty] = sample[rng.choice(len(sample), size=num_empty)]
+
+    norms = np.linalg.norm(sums, axis=1, keepdims=True)
+
+    return sums / np.maximum(norms, 1e-12)
+
+
+def recall_at_k(
+    approximate: Sequence[Sequence[int]], exact: Sequence[Sequence[int]]
+) -> float:
+    """Mean fraction of the exact top-k rows found by the approximate search."""
+
+    recalls = [
+        len(set(approx_rows) & set(exact_rows)) / max(len(exact_rows), 1)
+        for approx_rows, exact_rows in zip(approximate, exact)
+    ]
+
+    return float(np.mean(recalls)) if recalls else 0.0
@@ -0,0 +1,15 @@
+from .client import (
+    close_async_mongo_clients,
+    close_mongo_clients,
+    get_async_mongo_client,
+    get_mongo_client,
+)
+from .versions import IndexVersionStamp
+
+__all__ = [
+    "close_async_mongo_clients",
+    "close_mongo_clients",
+    "get_async_mongo_client",
+    "get_mongo_client",
+    "IndexVersionStamp",
+]
\ No newline at end of file
@@ -0,0 +1,135 @@
+import asyncio
+import atexit
+import os
+import threading
+import weakref
+
+from loguru import logger
+from pymongo import AsyncMongoClient, MongoClient
+
+from online.config import settings
+
+_clients: dict[tuple[str, str], MongoClient] = {}
+_lock = threading.Lock()
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple[str, str], AsyncMongoClient]
+] = weakref.WeakKeyDictionary()
+
+
+def get_mongo_client(
+    mongodb_uri: str = settings.MONGODB_URI,
+    appname: str = "online",
+    max_pool_size: int = settings.MONGODB_MAX_POOL_SIZE,
+    min_pool_size: int = settings.MONGODB_MIN_POOL_SIZE,
+) -> MongoClient:
+    """Get the process-wide MongoDB client for a URI and app name.
+
+    The first call creates the client and checks the connection with a ping. Later
+    calls reuse it, so every service and retriever of the process shares a single
+    connection pool. Pool sizes only apply when the client is created.
+
+    Args:
+        mongodb_uri: URI for connecting to MongoDB instance.
+        appname: Application name reported to the server.
+        max_pool_size: Maximum number of connections in the pool.
+        min_pool_size: Minimum number of connections kept open in the pool.
+
+    Returns:
+        MongoClient: The shared MongoDB client.
+
+    Raises:
+        Exception: If connection to MongoDB fails.
+    """
+
+    key = (mongodb_uri, appname)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = MongoClient(
+                mongodb_uri,
+                appname=appname,
+                maxPoolSize=max_pool_size,
+                minPoolSize=min_pool_size,
+            )
+            client.admin.command("ping")
+            _clients[key] = client
+            logger.debug(
+                f"Created MongoDB client '{appname}' with pool size {min_pool_size}-{max_pool_size}."
+            )
+
+    return client
+
+
+def get_async_mongo_client(
+    mongodb_uri: str = settings.MONGODB_URI,
+    appname: str = "online",
+    max_pool_size: int = settings.MONGODB_MAX_POOL_SIZE,
+    min_pool_size: int = settings.MONGODB_MIN_POOL_SIZE,
+) -> AsyncMongoClient:
+    """Get the async MongoDB client of the running event loop for a URI and app name.
+
+    Async clients are bound to the event loop they are used on, so one client (and
+    connection pool) is kept per loop instead of per process. The client connects
+    lazily on its first operation.
+
+    Args:
+        mongodb_uri: URI for connecting to MongoDB instance.
+        appname: Application name reported to the server.
+        max_pool_size: Maximum number of connections in the pool.
+        min_pool_size: Minimum number of connections kept open in the pool.
+
+    Returns:
+        AsyncMongoClient: The async MongoDB client of the running event loop.
+    """
+
+    loop = asyncio.get_running_loop()
+    key = (mongodb_uri, appname)
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = AsyncMongoClient(
+                mongodb_uri,
+                appname=appname,
+                maxPoolSize=max_pool_size,
+                minPoolSize=min_pool_size,
+            )
+            clients[key] = client
+            logger.debug(
+                f"Created async MongoDB client '{appname}' with pool size {min_pool_size}-{max_pool_size}."
+            )
+
+    return client
+
+
+async def close_async_mongo_clients() -> None:
+    """Close the async MongoDB clients of the running event loop."""
+
+    with _lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+
+    for client in clients.values():
+        await client.close()
+
+
+def close_mongo_clients() -> None:
+    """Close every MongoDB client of the process."""
+
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _reset_after_fork() -> None:
+    # MongoClient is not fork-safe: child processes must create their own clients
+    # instead of reusing (or closing) the sockets inherited from the parent.
+    global _lock
+
+    _clients.clear()
+    _async_clients.clear()
+    _lock = threading.Lock()
+
+
+atexit.register(close_mongo_clients)
+os.register_at_fork(after_in_child=_reset_after_fork)
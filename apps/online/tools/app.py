@@ -1,10 +1,12 @@
+import asyncio
 from pathlib import Path
 
 import click
 from smolagents import GradioUI
 
 from online import opik_utils
-from online.application.agents import get_agent
+from online.application.agents import get_agent, get_async_agent
+from online.infrastructure.mongo import close_async_mongo_clients
 
 @click.command()
 @click.option(
@@ -26,14 +28,30 @@ from online.application.agents import get_agent
     default="What is the feature/training/inference (FTI) pipelines architecture?",
     help="Query to run in CLI mode",
 )
-def main(retriever_config_path: Path, ui: bool, query: str) -> None:
+@click.option(
+    "--async-mode",
+    is_flag=True,
+    default=False,
+    help="Run the query with the async agent in CLI mode",
+)
+def main(retriever_config_path: Path, ui: bool, query: str, async_mode: bool) -> None:
     """Run the agent in either Gradio UI or CLI mode.
     
     Args:
         ui: If True, launches Gradio UI. If False, runs in the CLI mode
         query: Query string to run in CLI mode
+        async_mode: If True, runs the query with the async agent in CLI mode
     """
     opik_utils.configure()
+
+    if async_mode and not ui:
+        assert query, "Query is required in CLI mode"
+
+        result = asyncio.run(run_async(Path(retriever_config_path), query))
+
+        print(result)
+
+        return
     
     agent = get_agent(retriever_config_path=Path(retriever_config_path))
 
@@ -46,5 +64,15 @@ def main(retriever_config_path: Path, ui: bool, query: str) -> None:
 
         print(result)
 
+async def run_async(retriever_config_path: Path, query: str) -> str:
+    agent = get_async_agent(retriever_config_path=retriever_config_path)
+
+    try:
+        run = await agent.run(query)
+
+        return run.result
+    finally:
+        await close_async_mongo_clients()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -55,9 +55,26 @@ Explain to me:
     type=click.Path(exists=True, path_type=Path),
     help="path to the retriever configuration file",
 )
-def main(retriever_config_path: Path) -> None:
+@click.option(
+    "--task-threads",
+    type=int,
+    default=2,
+    help="number of prompts evaluated concurrently, each by its own pooled agent",
+)
+@click.option(
+    "--scoring-threads",
+    type=int,
+    default=8,
+    help="number of metrics scored concurrently, across prompts",
+)
+def main(retriever_config_path: Path, task_threads: int, scoring_threads: int) -> None:
     """Evaluate agent with custom retriever configuration"""
-    evaluate_agent(EVALUATION_PROMPTS, retriever_config_path=retriever_config_path)
+    evaluate_agent(
+        EVALUATION_PROMPTS,
+        retriever_config_path=retriever_config_path,
+        task_threads=task_threads,
+        scoring_threads=scoring_threads,
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file